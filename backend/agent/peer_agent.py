@@ -0,0 +1,343 @@
+"""Direct (LAN) transfer agent: streams a file between two peers over TCP while
+the server only does signaling.
+
+Sender (the file stays on this machine; the agent exits once the receiver has
+verified it):
+
+    python agent/peer_agent.py send --base-url http://server:8000 --email a@corp \\
+        --transfer-id <id> --file report.zip
+
+Receiver (after accepting the transfer):
+
+    python agent/peer_agent.py receive --base-url http://server:8000 --email b@corp \\
+        --transfer-id <id> --output report.zip
+
+The password is read from ULAK_PASSWORD or prompted for; ULAK_ACCESS_TOKEN skips
+the login. The sender registers its LAN addresses with
+`POST /transfers/sessions/{id}/direct/offer` and gets a short-lived transfer
+token; the receiver obtains the same token and the sender's endpoint from
+`POST .../direct/connect`, pulls the file, checks size and SHA-256 and reports
+the result with `POST .../direct/report`, which completes the session.
+
+Wire protocol, one TCP connection per attempt:
+
+    receiver -> sender  {"token": ..., "offset": n}\\n        (offset > 0 resumes)
+    sender -> receiver  {"ok": true, "size": n}\\n, then bytes offset..size
+    receiver -> sender  {"ok": true|false, "sha256": ...}\\n
+
+Bytes are not encrypted on the wire; use it on trusted networks.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import getpass
+import hashlib
+import hmac
+import json
+import os
+from pathlib import Path
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+
+_CHUNK_SIZE = 1024 * 1024
+_MAX_HEADER_BYTES = 4096
+_CONNECT_TIMEOUT = 5.0
+_IO_TIMEOUT = 60.0
+# Offers are renewed once this fraction of the token lifetime has passed.
+_RENEW_AT = 0.8
+
+
+class TransferError(Exception):
+    pass
+
+
+def api_client(args: argparse.Namespace) -> httpx.Client:
+    base_url = args.base_url.rstrip("/") + args.api_prefix
+    token = os.environ.get("ULAK_ACCESS_TOKEN")
+    if not token:
+        password = os.environ.get("ULAK_PASSWORD") or getpass.getpass(f"{args.email} password: ")
+        r = httpx.post(f"{base_url}/auth/login", json={"email": args.email, "password": password}, timeout=30)
+        r.raise_for_status()
+        token = r.json()["access_token"]
+    return httpx.Client(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=30)
+
+
+def report(client: httpx.Client, transfer_id: str, result: str, **fields: object) -> None:
+    r = client.post(f"/transfers/sessions/{transfer_id}/direct/report", json={"result": result, **fields})
+    if r.status_code >= 400:
+        print(f"report {result}: {r.status_code} {r.text}", file=sys.stderr)
+
+
+def local_addresses(base_url: str) -> list[str]:
+    """This host's LAN addresses: the one routing to the server first."""
+    addresses: list[str] = []
+    host = urlsplit(base_url).hostname or "127.0.0.1"
+    try:
+        family = socket.getaddrinfo(host, None)[0][0]
+        with socket.socket(family, socket.SOCK_DGRAM) as probe:
+            probe.connect((host, 9))  # no packet is sent for UDP connect
+            addresses.append(probe.getsockname()[0])
+    except OSError:
+        pass
+    try:
+        for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+            address = info[4][0]
+            if not address.startswith("127.") and address not in addresses:
+                addresses.append(address)
+    except OSError:
+        pass
+    return addresses or ["127.0.0.1"]
+
+
+def read_line(conn: socket.socket) -> dict:
+    data = bytearray()
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(1)
+        if not chunk:
+            raise TransferError("connection closed")
+        data += chunk
+        if len(data) > _MAX_HEADER_BYTES:
+            raise TransferError("header too long")
+    return json.loads(data)
+
+
+def write_line(conn: socket.socket, message: dict) -> None:
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+# --- sender -----------------------------------------------------------------
+
+
+class Offer:
+    """The current transfer token; renewed in the background before it expires."""
+
+    def __init__(self, client: httpx.Client, transfer_id: str, addresses: list[str], port: int) -> None:
+        self.client = client
+        self.transfer_id = transfer_id
+        self.addresses = addresses
+        self.port = port
+        self.token = ""
+        self.expires_at = 0.0
+        self.closed = threading.Event()
+
+    def publish(self) -> None:
+        r = self.client.post(
+            f"/transfers/sessions/{self.transfer_id}/direct/offer",
+            json={"addresses": self.addresses, "port": self.port},
+        )
+        if r.status_code >= 400:
+            raise TransferError(f"offer rejected: {r.status_code} {r.text}")
+        body = r.json()
+        self.token = body["token"]
+        self.expires_at = _timestamp(body["expires_at"])
+
+    def renew_until_closed(self) -> None:
+        while not self.closed.is_set():
+            lifetime = self.expires_at - time.time()
+            if self.closed.wait(max(1.0, lifetime * _RENEW_AT)):
+                return
+            try:
+                self.publish()
+            except (TransferError, httpx.HTTPError) as exc:
+                print(f"offer renewal failed: {exc}", file=sys.stderr)
+                self.closed.set()
+
+
+def serve_connection(conn: socket.socket, path: Path, offer: Offer) -> bool:
+    """Serve one receiver; True once the receiver confirmed a verified copy."""
+    conn.settimeout(_IO_TIMEOUT)
+    request = read_line(conn)
+    size = path.stat().st_size
+    offset = request.get("offset", 0)
+    if not hmac.compare_digest(str(request.get("token", "")), offer.token) or time.time() > offer.expires_at:
+        write_line(conn, {"ok": False, "error": "invalid token"})
+        return False
+    if not isinstance(offset, int) or not 0 <= offset <= size:
+        write_line(conn, {"ok": False, "error": "invalid offset"})
+        return False
+    write_line(conn, {"ok": True, "size": size})
+    with path.open("rb") as f:
+        if offset < size:
+            conn.sendfile(f, offset, size - offset)
+    result = read_line(conn)
+    return bool(result.get("ok"))
+
+
+def send(args: argparse.Namespace) -> int:
+    path = Path(args.file)
+    if not path.is_file():
+        print(f"{path}: not a file", file=sys.stderr)
+        return 2
+
+    listener = socket.create_server((args.bind, args.port), family=socket.AF_INET)
+    listener.settimeout(1.0)
+    port = listener.getsockname()[1]
+    addresses = args.advertise.split(",") if args.advertise else local_addresses(args.base_url)
+
+    with api_client(args) as client:
+        offer = Offer(client, args.transfer_id, addresses, port)
+        offer.publish()
+        renewer = threading.Thread(target=offer.renew_until_closed, daemon=True)
+        renewer.start()
+        print(f"offering {path.name} on {','.join(addresses)} port {port}")
+
+        deadline = time.monotonic() + args.wait
+        done = False
+        try:
+            while not done and not offer.closed.is_set() and time.monotonic() < deadline:
+                try:
+                    conn, peer = listener.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    try:
+                        done = serve_connection(conn, path, offer)
+                    except (OSError, TransferError, ValueError) as exc:
+                        print(f"{peer[0]}: {exc}", file=sys.stderr)
+                        continue
+                print(f"{peer[0]}: {'verified' if done else 'not verified'}")
+        finally:
+            offer.closed.set()
+            listener.close()
+
+        if not done:
+            report(client, args.transfer_id, "failed", message="Sender stopped without a verified transfer.")
+    return 0 if done else 1
+
+
+# --- receiver ---------------------------------------------------------------
+
+
+def hash_existing(path: Path) -> tuple[int, "hashlib._Hash"]:
+    hasher = hashlib.sha256()
+    size = 0
+    if path.exists():
+        with path.open("rb") as f:
+            while chunk := f.read(_CHUNK_SIZE):
+                hasher.update(chunk)
+                size += len(chunk)
+    return size, hasher
+
+
+def pull(address: str, peer: dict, part_path: Path) -> tuple[int, str, socket.socket]:
+    """Append the rest of the file to `part_path` from one sender address."""
+    offset, hasher = hash_existing(part_path)
+    if offset > peer["file_size"]:
+        part_path.unlink()
+        offset, hasher = 0, hashlib.sha256()
+
+    conn = socket.create_connection((address, peer["port"]), timeout=_CONNECT_TIMEOUT)
+    conn.settimeout(_IO_TIMEOUT)
+    try:
+        write_line(conn, {"token": peer["token"], "offset": offset})
+        header = read_line(conn)
+        if not header.get("ok"):
+            raise TransferError(header.get("error", "refused"))
+        size = header["size"]
+        buffer = bytearray(_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with part_path.open("ab") as f:
+            while offset < size:
+                n = conn.recv_into(view, min(len(buffer), size - offset))
+                if not n:
+                    raise TransferError("connection closed mid-transfer")
+                f.write(view[:n])
+                hasher.update(view[:n])
+                offset += n
+    except BaseException:
+        conn.close()
+        raise
+    return offset, hasher.hexdigest(), conn
+
+
+def fetch(peer: dict, part_path: Path) -> tuple[int, str, socket.socket]:
+    """Pull the file from the first sender address that works, resuming across attempts."""
+    errors = []
+    for address in peer["addresses"]:
+        try:
+            return pull(address, peer, part_path)
+        except (OSError, TransferError, ValueError) as exc:
+            errors.append(f"{address}: {exc}")
+    raise TransferError("; ".join(errors) or "no sender address")
+
+
+def receive(args: argparse.Namespace) -> int:
+    output = Path(args.output)
+    part_path = output.with_name(output.name + ".part")
+
+    with api_client(args) as client:
+        r = client.post(f"/transfers/sessions/{args.transfer_id}/direct/connect")
+        if r.status_code >= 400:
+            print(f"connect: {r.status_code} {r.text}", file=sys.stderr)
+            return 1
+        peer = r.json()
+        if not peer["same_network"]:
+            print("note: the server saw the peers on different networks; the sender may be unreachable")
+
+        started = time.perf_counter()
+        try:
+            size, sha256, conn = fetch(peer, part_path)
+        except (OSError, TransferError, ValueError) as exc:
+            report(client, args.transfer_id, "failed", message=f"Receiver: {exc}")
+            print(f"transfer failed: {exc}", file=sys.stderr)
+            return 1
+
+        with conn:
+            verified = size == peer["file_size"] and sha256 == peer["checksum_sha256"].lower()
+            try:
+                write_line(conn, {"ok": verified, "sha256": sha256})
+            except OSError:
+                pass
+        if not verified:
+            part_path.unlink(missing_ok=True)
+            report(client, args.transfer_id, "failed", message="Receiver: size or checksum mismatch")
+            print("size or checksum mismatch; partial file removed", file=sys.stderr)
+            return 1
+
+        part_path.replace(output)
+        report(client, args.transfer_id, "completed", size=size, sha256=sha256)
+        elapsed = time.perf_counter() - started
+        print(f"received {output} ({size} bytes, {size / 1024**2 / max(elapsed, 1e-9):.1f} MB/s), checksum verified")
+    return 0
+
+
+def _timestamp(value: str) -> float:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_args() -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--base-url", default="http://127.0.0.1:8000")
+    common.add_argument("--api-prefix", default="/api")
+    common.add_argument("--email", default=os.environ.get("ULAK_EMAIL"))
+    common.add_argument("--transfer-id", required=True)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sender = commands.add_parser("send", parents=[common], help="Offer a file to the receiver of a transfer.")
+    sender.add_argument("--file", required=True)
+    sender.add_argument("--bind", default="0.0.0.0")
+    sender.add_argument("--port", type=int, default=0, help="Listening port (default: any free port).")
+    sender.add_argument("--advertise", help="Comma-separated addresses to offer (default: detected LAN addresses).")
+    sender.add_argument("--wait", type=float, default=3600, help="Seconds to wait for the receiver.")
+
+    receiver = commands.add_parser("receive", parents=[common], help="Pull an offered file from the sender.")
+    receiver.add_argument("--output", required=True)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    sys.exit(send(arguments) if arguments.command == "send" else receive(arguments))
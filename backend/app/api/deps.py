@@ -6,11 +6,13 @@ import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.db.models import User
+from app.core.principal_cache import principal_cache
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.db.models import AuthSession, User
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_prefix}/auth/login")
@@ -24,7 +26,45 @@ def get_db() -> Session:
         db.close()
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> User:
+    return await authenticate(db, token)
+
+
+async def authenticate(db: AsyncSession, token: str) -> User:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    generation = principal_cache.generation
+    payload = decode_access_token(token)
+    subject = payload.get("sub")
+
+    try:
+        user_id = uuid.UUID(subject)
+        session_id = uuid.UUID(payload["sid"]) if payload.get("sid") else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Geçersiz token.") from exc
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Kullanıcı bulunamadı.")
+
+    # Tokens issued before `sid` was added carry no session to check.
+    if session_id is not None:
+        auth_session = await db.get(AuthSession, session_id)
+        if not auth_session or auth_session.revoked or auth_session.user_id != user.id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Oturum sonlandırıldı.")
+
+    principal_cache.put(token, user, session_id=session_id, token_exp=payload.get("exp"), generation=generation)
+    return user
+
+
+def decode_access_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
         subject = payload.get("sub")
@@ -35,13 +75,4 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token süresi doldu.")
     except JWTError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Geçersiz token.") from exc
-
-    try:
-        user_id = uuid.UUID(subject)
-    except ValueError as exc:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Geçersiz token.") from exc
-
-    user = db.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Kullanıcı bulunamadı.")
-    return user
+    return payload
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
+import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import decode_access_token, get_async_db, get_current_user, oauth2_scheme
 from app.core.config import settings
-from app.core.security import create_access_token, hash_secret, verify_secret
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import (
+    LOGIN_BY_EMAIL,
+    LOGIN_BY_IP,
+    PASSWORD_RESET_BY_EMAIL,
+    PASSWORD_RESET_BY_IP,
+    rate_limiter,
+)
+from app.core.security import (
+    create_access_token,
+    hash_secret_async,
+    verify_and_update_secret_async,
+    verify_secret_async,
+)
 from app.core.validators import generate_temp_password, validate_password_6_digits
 from app.db.models import AuthSession, User
 from app.schemas.auth import (
@@ -27,7 +41,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", status_code=201)
-def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
+async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_async_db)) -> dict:
     if payload.password != payload.password_confirm:
         raise HTTPException(status_code=400, detail="Şifreler eşleşmiyor.")
 
@@ -36,7 +50,7 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    existing = db.scalar(select(User).where(User.email == payload.email))
+    existing = await db.scalar(select(User).where(User.email == payload.email))
     if existing:
         raise HTTPException(status_code=409, detail="Bu e-posta zaten kayıtlı.")
 
@@ -44,9 +58,9 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
         first_name=payload.first_name.strip(),
         last_name=payload.last_name.strip(),
         email=str(payload.email).lower(),
-        password_hash=hash_secret(payload.password),
+        password_hash=await hash_secret_async(payload.password),
         security_question=payload.security_question.strip(),
-        security_answer_hash=hash_secret(payload.security_answer.strip().lower()),
+        security_answer_hash=await hash_secret_async(payload.security_answer.strip().lower()),
         must_change_password=False,
         failed_login_attempts=0,
         locked_until=None,
@@ -54,13 +68,16 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
         last_login_at=None,
     )
     db.add(user)
-    db.commit()
+    await db.commit()
     return {"id": str(user.id)}
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)) -> TokenResponse:
-    user = db.scalar(select(User).where(User.email == str(payload.email).lower()))
+async def login(payload: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)) -> TokenResponse:
+    # The session has not checked out a connection yet; throttled attempts never do.
+    await rate_limiter.check_attempt(request, LOGIN_BY_IP, LOGIN_BY_EMAIL, payload.email)
+
+    user = await db.scalar(select(User).where(User.email == str(payload.email).lower()))
     if not user:
         raise HTTPException(status_code=401, detail="E-posta veya şifre hatalı.")
 
@@ -69,29 +86,37 @@ def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)
     if user.locked_until and user.locked_until > now:
         raise HTTPException(status_code=423, detail="Hesap geçici olarak kilitlendi. Daha sonra tekrar deneyin.")
 
-    if not verify_secret(payload.password, user.password_hash):
+    valid, new_hash = await verify_and_update_secret_async(payload.password, user.password_hash)
+    if not valid:
         user.failed_login_attempts = (user.failed_login_attempts or 0) + 1
-        if user.failed_login_attempts >= settings.max_failed_login_attempts:
+        locked = user.failed_login_attempts >= settings.max_failed_login_attempts
+        if locked:
             user.locked_until = now + timedelta(minutes=settings.lockout_minutes)
             user.failed_login_attempts = 0
         db.add(user)
-        db.commit()
+        await db.commit()
+        if locked:
+            principal_cache.invalidate_user(user.id)
         raise HTTPException(status_code=401, detail="E-posta veya şifre hatalı.")
 
     # success
+    if new_hash:
+        user.password_hash = new_hash
     user.failed_login_attempts = 0
     user.locked_until = None
     user.last_login_at = now
 
-    token, expires_at = create_access_token(str(user.id))
+    session_id = uuid.uuid4()
+    token, expires_at = create_access_token(str(user.id), session_id=str(session_id))
     session = AuthSession(
+        id=session_id,
         user_id=user.id,
         created_at=now,
         expires_at=expires_at,
         revoked=False,
     )
     db.add_all([user, session])
-    db.commit()
+    await db.commit()
 
     return TokenResponse(
         access_token=token,
@@ -101,38 +126,48 @@ def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)
 
 
 @router.post("/forgot-password/question", response_model=ForgotPasswordQuestionResponse)
-def forgot_password_question(payload: ForgotPasswordQuestionRequest, db: Session = Depends(get_db)) -> ForgotPasswordQuestionResponse:
-    user = db.scalar(select(User).where(User.email == str(payload.email).lower()))
+async def forgot_password_question(
+    payload: ForgotPasswordQuestionRequest, request: Request, db: AsyncSession = Depends(get_async_db)
+) -> ForgotPasswordQuestionResponse:
+    await rate_limiter.check_attempt(request, PASSWORD_RESET_BY_IP, PASSWORD_RESET_BY_EMAIL, payload.email)
+    user = await db.scalar(select(User).where(User.email == str(payload.email).lower()))
     if not user:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
     return ForgotPasswordQuestionResponse(security_question=user.security_question)
 
 
 @router.post("/forgot-password/reset", response_model=ForgotPasswordResetResponse)
-def forgot_password_reset(payload: ForgotPasswordResetRequest, db: Session = Depends(get_db)) -> ForgotPasswordResetResponse:
-    user = db.scalar(select(User).where(User.email == str(payload.email).lower()))
+async def forgot_password_reset(
+    payload: ForgotPasswordResetRequest, request: Request, db: AsyncSession = Depends(get_async_db)
+) -> ForgotPasswordResetResponse:
+    await rate_limiter.check_attempt(request, PASSWORD_RESET_BY_IP, PASSWORD_RESET_BY_EMAIL, payload.email)
+    user = await db.scalar(select(User).where(User.email == str(payload.email).lower()))
     if not user:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
 
-    if not verify_secret(payload.security_answer.strip().lower(), user.security_answer_hash):
+    valid, new_answer_hash = await verify_and_update_secret_async(payload.security_answer.strip().lower(), user.security_answer_hash)
+    if not valid:
         raise HTTPException(status_code=400, detail="Güvenlik cevabı hatalı.")
+    if new_answer_hash:
+        user.security_answer_hash = new_answer_hash
 
     new_password = generate_temp_password()
-    user.password_hash = hash_secret(new_password)
+    user.password_hash = await hash_secret_async(new_password)
     user.must_change_password = True
     user.failed_login_attempts = 0
     user.locked_until = None
     db.add(user)
-    db.commit()
+    await db.commit()
+    principal_cache.invalidate_user(user.id)
 
     return ForgotPasswordResetResponse(new_password=new_password)
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     payload: ChangePasswordRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
     if payload.new_password != payload.new_password_confirm:
         raise HTTPException(status_code=400, detail="Yeni şifreler eşleşmiyor.")
@@ -142,12 +177,36 @@ def change_password(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    if not verify_secret(payload.old_password, current_user.password_hash):
+    # The principal may come from the cache; check against the stored hash.
+    await db.refresh(current_user)
+    if not await verify_secret_async(payload.old_password, current_user.password_hash):
         raise HTTPException(status_code=400, detail="Mevcut şifre hatalı.")
 
-    current_user.password_hash = hash_secret(payload.new_password)
+    current_user.password_hash = await hash_secret_async(payload.new_password)
     current_user.must_change_password = False
     db.add(current_user)
-    db.commit()
+    await db.commit()
+    principal_cache.invalidate_user(current_user.id)
+
+    return {"status": "ok"}
+
+
+@router.post("/logout")
+async def logout(
+    current_user: User = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    payload = decode_access_token(token)
+    if not payload.get("sid"):
+        return {"status": "ok"}
+
+    session_id = uuid.UUID(payload["sid"])
+    session = await db.get(AuthSession, session_id)
+    if session and session.user_id == current_user.id:
+        session.revoked = True
+        db.add(session)
+        await db.commit()
+    principal_cache.invalidate_session(session_id)
 
     return {"status": "ok"}
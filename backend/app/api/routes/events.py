@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from app.api.deps import authenticate, decode_access_token
+from app.core.config import settings
+from app.core.events import event_bus
+from app.core.principal_cache import principal_cache
+from app.db.session import AsyncSessionLocal
+
+
+router = APIRouter(prefix="/transfers", tags=["transfers"])
+
+_optional_bearer = OAuth2PasswordBearer(tokenUrl=f"{settings.api_prefix}/auth/login", auto_error=False)
+
+
+@router.get("/events")
+async def transfer_events(
+    access_token: str | None = None,
+    bearer: str | None = Depends(_optional_bearer),
+) -> StreamingResponse:
+    """Server-Sent Events stream of the caller's transfer lifecycle events.
+
+    Browsers' EventSource cannot send headers, so the token may also be passed as
+    `?access_token=`. Events are not replayed: after (re)connecting, fetch the list once.
+    """
+
+    token = bearer or access_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token gerekli.")
+
+    # Authenticate on a short-lived session; a Depends(get_async_db) session would
+    # hold a pooled connection for as long as the stream stays open.
+    async with AsyncSessionLocal() as db:
+        user = await authenticate(db, token)
+    expires_at = decode_access_token(token).get("exp")
+
+    return StreamingResponse(
+        _stream(user.id, token, expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream(user_id: uuid.UUID, token: str, expires_at: float | None) -> AsyncIterator[str]:
+    async with event_bus.subscribe(user_id) as queue:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.event_stream_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if not await _still_authorized(token, expires_at):
+                    yield "event: end\ndata: {}\n\n"
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _still_authorized(token: str, expires_at: float | None) -> bool:
+    # Ends the stream once the token expires or its session is revoked (logout,
+    # password change); the principal cache keeps this check cheap.
+    if expires_at is not None and time.time() >= expires_at:
+        return False
+    if principal_cache.get(token) is not None:
+        return True
+    try:
+        async with AsyncSessionLocal() as db:
+            await authenticate(db, token)
+    except HTTPException:
+        return False
+    return True
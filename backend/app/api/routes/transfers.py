@@ -1,24 +1,66 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+import base64
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta, timezone
+import functools
 import hashlib
 from pathlib import Path
+import shutil
+from typing import AsyncIterator, Iterator, Literal, NamedTuple
 import uuid
 
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
-from fastapi.responses import FileResponse
-from sqlalchemy import or_, select
-from sqlalchemy.orm import Session
-
-from app.api.deps import get_current_user, get_db
-from app.db.models import TransferLog, TransferSession, TransferStatus, User
-from app.schemas.transfer import TransferSessionCreateRequest, TransferSessionPublic
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import Select, and_, case, delete, func, or_, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.elements import ColumnElement
+from starlette.requests import ClientDisconnect
+
+from app.api.deps import get_async_db, get_current_user
+from app.core import blob_store, direct, resumable, storage_codec
+from app.core.audit_log import audit_log
+from app.core.events import notify_transfer
+from app.core.file_response import RangeFileResponse
+from app.core.lifecycle import purge_session
+from app.core.storage import storage
+from app.core.metrics import transfers_in_progress, upload_verification_failures
+from app.core.config import settings
+from app.core.upload_pipeline import UploadPipeline, run_io
+from app.db.models import (
+    Blob,
+    DirectOffer,
+    MultipartUpload,
+    TransferRecipient,
+    TransferSession,
+    TransferStatus,
+    UploadPart,
+    User,
+)
+from app.schemas.transfer import (
+    BlobLinkRequest,
+    DedupChallenge,
+    DirectOfferPublic,
+    DirectOfferRequest,
+    DirectPeerPublic,
+    DirectReportRequest,
+    MultipartInitRequest,
+    MultipartStatusPublic,
+    TransferRecipientPublic,
+    TransferSessionCreateRequest,
+    TransferSessionCreateResponse,
+    TransferSessionPublic,
+    UploadPartPublic,
+    UploadStatusPublic,
+)
 
 
 router = APIRouter(prefix="/transfers", tags=["transfers"])
 
 
-_STORAGE_ROOT = Path(__file__).resolve().parents[3] / "storage"
+_CHUNK_SIZE = 1024 * 1024
+_UPLOAD_REFUSED = {TransferStatus.rejected, TransferStatus.cancelled, TransferStatus.failed, TransferStatus.expired}
 
 
 def _safe_filename(name: str) -> str:
@@ -28,22 +70,40 @@ def _safe_filename(name: str) -> str:
     return name or "file"
 
 
-def _session_dir(transfer_id: uuid.UUID) -> Path:
-    return _STORAGE_ROOT / str(transfer_id)
+def _client_ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+def _session_dir(transfer_id: uuid.UUID, *, create: bool = False) -> Path:
+    return storage.staging_dir(str(transfer_id), create=create)
 
 
 def _session_file_path(session: TransferSession) -> Path:
     return _session_dir(session.id) / _safe_filename(session.file_name)
 
 
-@router.post("/sessions", response_model=TransferSessionPublic, status_code=201)
-def create_transfer_session(
+def _legacy_file_key(session: TransferSession) -> str:
+    return f"{session.id}/{_safe_filename(session.file_name)}"
+
+
+def _remove_session_dir(transfer_id: uuid.UUID, *, recursive: bool = False) -> None:
+    if not recursive:
+        try:
+            _session_dir(transfer_id).rmdir()
+        except OSError:
+            return
+    storage.remove_staging(str(transfer_id))
+
+
+@router.post("/sessions", response_model=TransferSessionCreateResponse, status_code=201)
+async def create_transfer_session(
     payload: TransferSessionCreateRequest,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> TransferSession:
-    if not payload.receiver_user_id and not payload.receiver_ip:
+    db: AsyncSession = Depends(get_async_db),
+) -> TransferSessionCreateResponse:
+    recipient_ids = await _validate_recipients(db, payload)
+    if not payload.receiver_user_id and not payload.receiver_ip and not recipient_ids:
         raise HTTPException(status_code=400, detail="Alıcı olarak receiver_user_id veya receiver_ip zorunludur.")
 
     now = datetime.now(timezone.utc)
@@ -56,43 +116,285 @@ def create_transfer_session(
         file_type=payload.file_type,
         checksum_sha256=payload.checksum_sha256,
         status=TransferStatus.pending,
+        recipient_count=len(recipient_ids) if recipient_ids else None,
         created_at=now,
         updated_at=now,
     )
 
     db.add(session)
-    db.flush()
-
-    db.add(
-        TransferLog(
+    await db.flush()
+    db.add_all(
+        TransferRecipient(
             transfer_session_id=session.id,
-            event="created",
-            message=None,
-            ip=request.client.host if request.client else None,
+            user_id=user_id,
+            status=TransferStatus.pending,
             created_at=now,
+            updated_at=now,
         )
+        for user_id in recipient_ids
     )
-    db.commit()
-    db.refresh(session)
-    return session
+
+    audit_log.record(session.id, "created", ip=_client_ip(request), created_at=now)
+    await db.commit()
+    await db.refresh(session)
+    await notify_transfer(session, "created", recipients=recipient_ids)
+
+    response = TransferSessionCreateResponse.model_validate(session)
+    if await blob_store.find(db, session.checksum_sha256, session.file_size) is not None:
+        offset, length = blob_store.challenge_for(session.id, session.file_size)
+        response.blob_available = True
+        response.dedup_challenge = DedupChallenge(offset=offset, length=length)
+    return response
+
+
+async def _validate_recipients(db: AsyncSession, payload: TransferSessionCreateRequest) -> list[uuid.UUID]:
+    if payload.receiver_user_ids is None:
+        return []
+    if payload.receiver_user_id or payload.receiver_ip:
+        raise HTTPException(
+            status_code=400, detail="receiver_user_ids, receiver_user_id veya receiver_ip ile birlikte kullanılamaz."
+        )
+
+    recipient_ids = list(dict.fromkeys(payload.receiver_user_ids))
+    if len(recipient_ids) > settings.fanout_max_recipients:
+        raise HTTPException(status_code=400, detail=f"En fazla {settings.fanout_max_recipients} alıcı seçilebilir.")
+    found = await db.scalar(select(func.count()).select_from(User).where(User.id.in_(recipient_ids)))
+    if found != len(recipient_ids):
+        raise HTTPException(status_code=400, detail="Alıcı bulunamadı.")
+    return recipient_ids
 
 
 @router.get("/sessions", response_model=list[TransferSessionPublic])
-def list_transfer_sessions(
+async def list_transfer_sessions(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = 50,
     offset: int = 0,
-) -> list[TransferSession]:
+    cursor: str | None = None,
+    status: TransferStatus | None = None,
+    role: Literal["sender", "receiver"] | None = None,
+    changed_since: str | None = None,
+) -> list[TransferSession] | Response:
+    """Newest first. Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
+
+    `offset` is still accepted for older clients but costs grow with it; cursor pages
+    cost the same at any depth.
+
+    Delta mode: with `changed_since` (`0` for a first full sync, then the last
+    `X-Change-Cursor`) only sessions created or changed after the cursor are
+    returned, oldest change first. Every response carries an `ETag`; an unchanged
+    view answers `If-None-Match` with 304.
+    """
+
     limit = max(1, min(limit, 200))
+    offset = max(0, offset)
+    if changed_since is not None:
+        if status is not None:
+            # A status filter would hide sessions that changed out of that status.
+            raise HTTPException(status_code=400, detail="changed_since ile status filtresi birlikte kullanılamaz.")
+        since = None if changed_since == "0" else _decode_cursor(changed_since)
+        until = datetime.now(timezone.utc) - timedelta(seconds=settings.change_feed_settle_seconds)
+        after = None
+    else:
+        since = until = None
+        after = _decode_cursor(cursor) if cursor else None
+        if after is not None:
+            offset = 0
+
+    # The validator is two index seeks plus a narrow count per role, read with Core;
+    # a 304 never loads sessions or serializes them.
+    validator = (await db.execute(_validator_query(current_user.id, status=status, role=role, since=since, until=until))).all()
+    etag = _listing_etag(current_user.id, request.url.query, validator)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    if changed_since is not None:
+        stmt = _changes_query(current_user.id, limit=limit, since=since, until=until, role=role)
+        sessions = list((await db.scalars(stmt)).all())
+        response.headers["X-Change-Cursor"] = (
+            _encode_cursor(sessions[-1], TransferSession.updated_at) if sessions else changed_since
+        )
+        return sessions
+
+    stmt = _listing_query(current_user.id, limit=limit, offset=offset, after=after, status=status, role=role)
+    sessions = list((await db.scalars(stmt)).all())
+
+    if len(sessions) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(sessions[-1], TransferSession.created_at)
+    return sessions
+
+
+class _View(NamedTuple):
+    """One branch of the listing: rows shaped like transfer_sessions, plus its key columns."""
+
+    stmt: Select
+    status: ColumnElement
+    created_at: ColumnElement
+    updated_at: ColumnElement
+    id: ColumnElement
+
+
+def _session_view(condition) -> _View:
+    return _View(
+        select(TransferSession).where(condition),
+        TransferSession.status,
+        TransferSession.created_at,
+        TransferSession.updated_at,
+        TransferSession.id,
+    )
+
+
+def _recipient_view(user_id: uuid.UUID, *, exclude_own: bool) -> _View:
+    # Fan-out sessions as this recipient sees them: keyed on their transfer_recipients
+    # row, with their own id as receiver and their decision folded into the status.
+    status = _recipient_status_expr()
+    replaced = {
+        "receiver_user_id": TransferRecipient.user_id,
+        "status": status,
+        "created_at": TransferRecipient.created_at,
+        "updated_at": TransferRecipient.updated_at,
+    }
+    columns = [replaced.get(c.key, c).label(c.key) for c in TransferSession.__table__.columns]
     stmt = (
-        select(TransferSession)
-        .where(or_(TransferSession.sender_user_id == current_user.id, TransferSession.receiver_user_id == current_user.id))
-        .order_by(TransferSession.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+        select(*columns)
+        .select_from(TransferRecipient)
+        .join(TransferSession, TransferSession.id == TransferRecipient.transfer_session_id)
+        .where(TransferRecipient.user_id == user_id)
     )
-    return list(db.scalars(stmt).all())
+    if exclude_own:
+        stmt = stmt.where(TransferSession.sender_user_id != user_id)
+    return _View(
+        stmt, status, TransferRecipient.created_at, TransferRecipient.updated_at, TransferRecipient.transfer_session_id
+    )
+
+
+def _role_views(user_id: uuid.UUID, role: str | None) -> list[_View]:
+    # One branch per role, merged with UNION ALL instead of an OR that forces a scan
+    # and a sort of the user's whole history. Each branch is an index range scan on
+    # (role column, created_at|updated_at, id).
+    views = []
+    if role in (None, "sender"):
+        views.append(_session_view(TransferSession.sender_user_id == user_id))
+    if role in (None, "receiver"):
+        condition = TransferSession.receiver_user_id == user_id
+        if role is None:
+            # Sessions sent to oneself are already in the sender branch.
+            condition = and_(condition, TransferSession.sender_user_id != user_id)
+        views.append(_session_view(condition))
+        views.append(_recipient_view(user_id, exclude_own=role is None))
+    return views
+
+
+def _listing_query(
+    user_id: uuid.UUID,
+    *,
+    limit: int,
+    offset: int,
+    after: tuple[datetime, uuid.UUID] | None,
+    status: TransferStatus | None,
+    role: str | None,
+):
+    branches = []
+    for view in _role_views(user_id, role):
+        stmt = view.stmt
+        if status is not None:
+            stmt = stmt.where(view.status == status)
+        if after is not None:
+            stmt = stmt.where(_keyset_before(view.created_at, view.id, after))
+        # Each branch stops after `offset + limit` rows.
+        branches.append(stmt.order_by(view.created_at.desc(), view.id.desc()).limit(limit + offset))
+
+    merged = _merge_branches(branches)
+    stmt = select(merged).order_by(merged.created_at.desc(), merged.id.desc()).limit(limit)
+    # Only legacy offset paging needs OFFSET; keyset pages stay a plain TOP n.
+    return stmt.offset(offset) if offset else stmt
+
+
+def _changes_query(
+    user_id: uuid.UUID,
+    *,
+    limit: int,
+    since: tuple[datetime, uuid.UUID] | None,
+    until: datetime,
+    role: str | None,
+):
+    branches = []
+    for view in _role_views(user_id, role):
+        stmt = view.stmt.where(view.updated_at <= until)
+        if since is not None:
+            stmt = stmt.where(_keyset_after(view.updated_at, view.id, since))
+        branches.append(stmt.order_by(view.updated_at, view.id).limit(limit))
+
+    merged = _merge_branches(branches)
+    return select(merged).order_by(merged.updated_at, merged.id).limit(limit)
+
+
+def _validator_query(
+    user_id: uuid.UUID,
+    *,
+    status: TransferStatus | None,
+    role: str | None,
+    since: tuple[datetime, uuid.UUID] | None,
+    until: datetime | None,
+):
+    # Newest change and row count per role: any insert, update or delete in the view
+    # moves one of them (updated_at is bumped on every state change).
+    branches = []
+    for view in _role_views(user_id, role):
+        stmt = view.stmt.with_only_columns(func.max(view.updated_at), func.count())
+        if status is not None:
+            stmt = stmt.where(view.status == status)
+        if until is not None:
+            stmt = stmt.where(view.updated_at <= until)
+        if since is not None:
+            stmt = stmt.where(_keyset_after(view.updated_at, view.id, since))
+        branches.append(stmt)
+    return union_all(*branches) if len(branches) > 1 else branches[0]
+
+
+def _merge_branches(branches: list):
+    # Each branch is wrapped so it keeps its own TOP/ORDER BY inside the UNION ALL.
+    wrapped = [select(branch.subquery()) for branch in branches]
+    return aliased(TransferSession, union_all(*wrapped).subquery() if len(wrapped) > 1 else wrapped[0].subquery())
+
+
+def _keyset_before(column, id_column, key: tuple[datetime, uuid.UUID]):
+    value, session_id = key
+    return or_(column < value, and_(column == value, id_column < session_id))
+
+
+def _keyset_after(column, id_column, key: tuple[datetime, uuid.UUID]):
+    value, session_id = key
+    return or_(column > value, and_(column == value, id_column > session_id))
+
+
+def _listing_etag(user_id: uuid.UUID, query: str, validator: list) -> str:
+    digest = hashlib.sha256(f"{user_id}|{query}|{validator!r}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _encode_cursor(session: TransferSession, column) -> str:
+    raw = f"{getattr(session, column.key).isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        value, session_id = raw.split("|", 1)
+        return datetime.fromisoformat(value), uuid.UUID(session_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Geçersiz cursor.") from exc
 
 
 @router.post("/sessions/{transfer_id}/upload")
@@ -101,146 +403,877 @@ async def upload_file(
     request: Request,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    session = _get_session_for_action(db, transfer_id)
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+
+    try:
+        async with _upload_lock(db, session, allow_completed=True):
+            tmp_path = await run_io(_prepare_part_path, session)
+            size, hasher = await _receive_part(session, tmp_path, _iter_upload_file(file), offset=None)
+            await _complete_upload(db, session, request, tmp_path, size, hasher.hexdigest())
+    finally:
+        await file.close()
+    return {"status": "ok"}
+
+
+@router.put("/sessions/{transfer_id}/upload", response_model=UploadStatusPublic)
+async def upload_file_raw(
+    transfer_id: uuid.UUID,
+    request: Request,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> UploadStatusPublic:
+    """Stream the raw request body straight into the session's part file.
+
+    Unlike the multipart endpoint the body is not spooled first, so every byte hits
+    disk exactly once. Without `offset` the upload starts over; with it the body is
+    appended at that offset, so an interrupted upload can be continued.
+    """
+
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    if session.status == TransferStatus.completed:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda upload edilemez.")
+
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and (offset or 0) + int(declared) > session.file_size:
+        raise HTTPException(status_code=413, detail="Gövde beyan edilen dosya boyutunu aşıyor.")
+
+    async with _upload_lock(db, session):
+        tmp_path = await run_io(_prepare_part_path, session)
+        size, hasher = await _receive_part(session, tmp_path, request.stream(), offset=offset)
+        if size < session.file_size:
+            return UploadStatusPublic(offset=size, file_size=session.file_size, status=session.status)
+
+        resumable.discard(session.id)
+        await _complete_upload(db, session, request, tmp_path, size, hasher.hexdigest())
+    return UploadStatusPublic(offset=size, file_size=session.file_size, status=session.status)
+
+
+@router.get("/sessions/{transfer_id}/upload", response_model=UploadStatusPublic)
+async def get_upload_status(
+    transfer_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> UploadStatusPublic:
+    session = await _get_session_for_action(db, transfer_id)
 
     if session.sender_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Bu transfer için upload yetkiniz yok.")
 
-    if session.status in {TransferStatus.rejected, TransferStatus.cancelled, TransferStatus.failed}:
-        raise HTTPException(status_code=400, detail="Transfer bu durumda upload edilemez.")
+    if session.status == TransferStatus.completed:
+        offset = session.file_size
+    else:
+        offset = await run_io(_part_offset, _part_path(_session_file_path(session)))
 
-    # Save to disk and compute sha256 while streaming.
-    _STORAGE_ROOT.mkdir(parents=True, exist_ok=True)
-    target_dir = _session_dir(session.id)
-    target_dir.mkdir(parents=True, exist_ok=True)
+    return UploadStatusPublic(offset=offset, file_size=session.file_size, status=session.status)
 
-    target_path = _session_file_path(session)
 
-    hasher = hashlib.sha256()
-    size = 0
-    tmp_path = target_path.with_suffix(target_path.suffix + ".part")
+@router.post("/sessions/{transfer_id}/upload/chunk", response_model=UploadStatusPublic)
+async def upload_chunk(
+    transfer_id: uuid.UUID,
+    request: Request,
+    offset: int = Query(ge=0),
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> UploadStatusPublic:
+    """Append one offset-addressed chunk to a resumable upload.
+
+    The chunk is applied atomically: if it would overrun the declared `file_size`
+    the part file is truncated back to `offset` and the running hash is left as-is.
+    Once the part file reaches `file_size` the upload is verified and completed.
+    """
+
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    if session.status == TransferStatus.completed:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda upload edilemez.")
 
     try:
-        with tmp_path.open("wb") as f:
-            while True:
-                chunk = await file.read(1024 * 1024)
-                if not chunk:
-                    break
-                size += len(chunk)
-                hasher.update(chunk)
-                f.write(chunk)
+        async with _upload_lock(db, session):
+            tmp_path = await run_io(_prepare_part_path, session)
+            size, hasher = await _receive_part(session, tmp_path, _iter_upload_file(file), offset=offset)
+            if size < session.file_size:
+                return UploadStatusPublic(offset=size, file_size=session.file_size, status=session.status)
+
+            resumable.discard(session.id)
+            await _complete_upload(db, session, request, tmp_path, size, hasher.hexdigest())
     finally:
         await file.close()
+    return UploadStatusPublic(offset=size, file_size=session.file_size, status=session.status)
 
-    if size != session.file_size:
-        tmp_path.unlink(missing_ok=True)
-        session.status = TransferStatus.failed
+
+@router.post("/sessions/{transfer_id}/upload/link", response_model=UploadStatusPublic)
+async def link_existing_blob(
+    transfer_id: uuid.UUID,
+    payload: BlobLinkRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> UploadStatusPublic:
+    """Complete a session by referencing content the server already stores.
+
+    The sender proves it holds the bytes by sending the SHA-256 of the byte range
+    given in `dedup_challenge` when the session was created.
+    """
+
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    if session.status == TransferStatus.completed:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda upload edilemez.")
+
+    checksum = session.checksum_sha256.lower()
+    blob = await blob_store.find(db, checksum, session.file_size)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Bu içerik sunucuda bulunamadı; dosyayı upload edin.")
+
+    if not await run_io(blob_store.verify_challenge, blob, session.id, payload.proof_sha256):
+        raise HTTPException(status_code=400, detail="İçerik kanıtı doğrulanamadı.")
+
+    async with _upload_lock(db, session):
+        if not await blob_store.acquire(db, checksum):
+            raise HTTPException(status_code=404, detail="Bu içerik sunucuda bulunamadı; dosyayı upload edin.")
+
+        resumable.discard(session.id)
+        session.blob_sha256 = checksum
+        session.status = TransferStatus.completed
         session.updated_at = datetime.now(timezone.utc)
         db.add(session)
-        db.add(
-            TransferLog(
-                transfer_session_id=session.id,
-                event="upload_failed",
-                message=f"Size mismatch: expected={session.file_size} got={size}",
-                ip=request.client.host if request.client else None,
-                created_at=session.updated_at,
-            )
+        audit_log.record(
+            session.id,
+            "uploaded",
+            message="Linked to existing content",
+            ip=_client_ip(request),
+            created_at=session.updated_at,
+        )
+        await _touch_recipients(db, session)
+        await db.commit()
+
+    await notify_transfer(session, "completed", recipients=await _recipient_ids(db, session))
+    await run_io(_remove_session_dir, session.id)
+    return UploadStatusPublic(offset=session.file_size, file_size=session.file_size, status=session.status)
+
+
+@router.post("/sessions/{transfer_id}/multipart", response_model=MultipartStatusPublic)
+async def initiate_multipart_upload(
+    transfer_id: uuid.UUID,
+    payload: MultipartInitRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> MultipartStatusPublic:
+    """Start (or restart with a new part size) a parallel multi-part upload."""
+
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    if session.status == TransferStatus.completed:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda upload edilemez.")
+
+    upload = await db.get(MultipartUpload, session.id)
+    if upload is not None and upload.part_size == payload.part_size:
+        return await _multipart_status(db, upload)
+
+    if upload is not None:
+        await db.execute(delete(UploadPart).where(UploadPart.transfer_session_id == session.id))
+        await run_io(shutil.rmtree, _parts_dir(session.id), True)
+        upload.part_size = payload.part_size
+    else:
+        upload = MultipartUpload(transfer_session_id=session.id, part_size=payload.part_size)
+    upload.part_count = max(1, -(-session.file_size // payload.part_size))
+    upload.created_at = datetime.now(timezone.utc)
+    db.add(upload)
+    await db.commit()
+
+    return await _multipart_status(db, upload)
+
+
+@router.get("/sessions/{transfer_id}/multipart", response_model=MultipartStatusPublic)
+async def get_multipart_status(
+    transfer_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> MultipartStatusPublic:
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    return await _multipart_status(db, await _get_multipart_upload(db, session))
+
+
+@router.put("/sessions/{transfer_id}/multipart/{part_number}", response_model=UploadPartPublic)
+async def upload_part(
+    transfer_id: uuid.UUID,
+    part_number: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> UploadPartPublic:
+    """Upload one part as a raw body; parts may arrive concurrently and in any order.
+
+    The part is verified against the `X-Part-Sha256` request header before it is
+    recorded. Every part except the last must be exactly `part_size` bytes.
+    """
+
+    expected_sha = (request.headers.get("x-part-sha256") or "").lower()
+    if len(expected_sha) != 64:
+        raise HTTPException(status_code=400, detail="X-Part-Sha256 başlığı zorunludur.")
+
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    upload = await _get_multipart_upload(db, session)
+    if not 1 <= part_number <= upload.part_count:
+        raise HTTPException(status_code=400, detail="Geçersiz parça numarası.")
+
+    expected_size = min(upload.part_size, session.file_size - (part_number - 1) * upload.part_size)
+    parts_dir = await run_io(_prepare_parts_dir, session.id)
+    part_path = parts_dir / f"{part_number:06d}"
+    tmp_path = _part_path(part_path)
+
+    in_progress = transfers_in_progress.labels("upload", session.status.value)
+    with _exclusive_upload(session.id, part_number), in_progress.track_inprogress():
+        pipeline = await UploadPipeline.open(tmp_path, "wb", hashlib.sha256())
+        try:
+            async for chunk in request.stream():
+                if pipeline.size + len(chunk) > expected_size:
+                    raise HTTPException(status_code=413, detail="Parça beklenen boyutu aşıyor.")
+                await pipeline.feed(chunk)
+            await pipeline.close()
+        except BaseException:
+            await pipeline.abort()
+            await run_io(tmp_path.unlink, True)
+            raise
+
+        if pipeline.size != expected_size or pipeline.hasher.hexdigest() != expected_sha:
+            await run_io(tmp_path.unlink, True)
+            raise HTTPException(status_code=400, detail="Parça boyutu veya checksum uyuşmuyor.")
+
+        await run_io(tmp_path.replace, part_path)
+        part = UploadPart(
+            transfer_session_id=session.id,
+            part_number=part_number,
+            size=pipeline.size,
+            sha256=expected_sha,
+            created_at=datetime.now(timezone.utc),
         )
-        db.commit()
+        recorded = await _record_part(db, part)
+
+    received = await db.scalar(select(func.sum(UploadPart.size)).where(UploadPart.transfer_session_id == session.id))
+    await notify_transfer(session, "progress", offset=received or 0)
+    return recorded
+
+
+@router.post("/sessions/{transfer_id}/multipart/complete", response_model=UploadStatusPublic)
+async def complete_multipart_upload(
+    transfer_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> UploadStatusPublic:
+    """Assemble the parts in one sequential pass, hashing while copying, and verify the file."""
+
+    session = await _get_session_for_upload(db, transfer_id, current_user)
+    upload = await _get_multipart_upload(db, session)
+    parts = await _list_parts(db, session.id)
+
+    missing = sorted(set(range(1, upload.part_count + 1)) - {p.part_number for p in parts})
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Eksik parçalar: {missing[:20]}")
+
+    parts_dir = _parts_dir(session.id)
+    part_paths = [parts_dir / f"{p.part_number:06d}" for p in parts]
+
+    async with _upload_lock(db, session):
+        tmp_path = await run_io(_prepare_part_path, session)
+        resumable.discard(session.id)
+        size, checksum = await run_io(_assemble_parts, part_paths, tmp_path)
+        await _finish_multipart(db, session, request, tmp_path, size, checksum)
+
+    return UploadStatusPublic(offset=size, file_size=session.file_size, status=session.status)
+
+
+def _parts_dir(transfer_id: uuid.UUID) -> Path:
+    return _session_dir(transfer_id) / "parts"
+
+
+def _prepare_parts_dir(transfer_id: uuid.UUID) -> Path:
+    path = _session_dir(transfer_id, create=True) / "parts"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+async def _get_multipart_upload(db: AsyncSession, session: TransferSession) -> MultipartUpload:
+    upload = await db.get(MultipartUpload, session.id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Bu transfer için multipart upload başlatılmamış.")
+    return upload
+
+
+async def _list_parts(db: AsyncSession, transfer_id: uuid.UUID) -> list[UploadPart]:
+    stmt = select(UploadPart).where(UploadPart.transfer_session_id == transfer_id).order_by(UploadPart.part_number)
+    return list((await db.scalars(stmt)).all())
+
+
+async def _multipart_status(db: AsyncSession, upload: MultipartUpload) -> MultipartStatusPublic:
+    return MultipartStatusPublic(
+        part_size=upload.part_size,
+        part_count=upload.part_count,
+        parts=[UploadPartPublic.model_validate(p) for p in await _list_parts(db, upload.transfer_session_id)],
+    )
+
+
+async def _record_part(db: AsyncSession, part: UploadPart) -> UploadPartPublic:
+    part = await db.merge(part)
+    await db.commit()
+    return UploadPartPublic.model_validate(part)
+
+
+def _assemble_parts(part_paths: list[Path], target: Path) -> tuple[int, str]:
+    hasher = hashlib.sha256()
+    size = 0
+    with target.open("wb") as out:
+        for path in part_paths:
+            with path.open("rb") as f:
+                while chunk := f.read(_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+    return size, hasher.hexdigest()
+
+
+async def _finish_multipart(
+    db: AsyncSession, session: TransferSession, request: Request, tmp_path: Path, size: int, checksum: str
+) -> None:
+    await run_io(shutil.rmtree, _parts_dir(session.id), True)
+    await _complete_upload(db, session, request, tmp_path, size, checksum, multipart=True)
+
+
+async def _drop_multipart(db: AsyncSession, session: TransferSession) -> None:
+    await db.execute(delete(UploadPart).where(UploadPart.transfer_session_id == session.id))
+    await db.execute(delete(MultipartUpload).where(MultipartUpload.transfer_session_id == session.id))
+
+
+async def _iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(_CHUNK_SIZE):
+        yield chunk
+
+
+async def _receive_part(
+    session: TransferSession,
+    tmp_path: Path,
+    chunks: AsyncIterator[bytes],
+    *,
+    offset: int | None,
+) -> tuple[int, "hashlib._Hash"]:
+    """Stream `chunks` into the session's part file through the upload pipeline.
+
+    With `offset=None` the part file is started over; otherwise the chunks are
+    appended at `offset`, which must match what the server already holds. Bytes past
+    the declared `file_size` are refused with 413 as soon as they arrive, and the part
+    file is rolled back to where this request started. If the client disconnects,
+    whatever arrived is kept so the upload can be resumed. The caller holds the
+    session's `_upload_lock`.
+    """
+
+    in_progress = transfers_in_progress.labels("upload", session.status.value)
+    with in_progress.track_inprogress():
+        if offset is None:
+            resumable.discard(session.id)
+            state = resumable.UploadState()
+            mode = "wb"
+        else:
+            state = await run_io(resumable.load, session.id, tmp_path)
+            if offset != state.offset:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload offset uyuşmuyor: beklenen={state.offset}",
+                    headers={"Upload-Offset": str(state.offset)},
+                )
+            mode = "ab"
+
+        pipeline = await UploadPipeline.open(tmp_path, mode, state.hasher.copy())
+        loop = asyncio.get_running_loop()
+        next_progress = loop.time() + settings.upload_progress_interval_seconds
+        try:
+            async for chunk in chunks:
+                if state.offset + pipeline.size + len(chunk) > session.file_size:
+                    raise HTTPException(status_code=413, detail="Gövde beyan edilen dosya boyutunu aşıyor.")
+                await pipeline.feed(chunk)
+                if loop.time() >= next_progress:
+                    await notify_transfer(session, "progress", offset=state.offset + pipeline.size)
+                    next_progress = loop.time() + settings.upload_progress_interval_seconds
+            await pipeline.drain()
+        except ClientDisconnect:
+            await pipeline.close()
+            state = resumable.UploadState(offset=state.offset + pipeline.size, hasher=pipeline.hasher)
+            resumable.save(session.id, state, tmp_path)
+            raise
+        except BaseException:
+            await pipeline.abort(truncate_to=state.offset)
+            raise
+        await pipeline.close()
+
+        size = state.offset + pipeline.size
+        resumable.save(session.id, resumable.UploadState(offset=size, hasher=pipeline.hasher), tmp_path)
+    if size < session.file_size:
+        await notify_transfer(session, "progress", offset=size)
+    return size, pipeline.hasher
+
+
+async def _get_session_for_upload(db: AsyncSession, transfer_id: uuid.UUID, current_user: User) -> TransferSession:
+    session = await _get_session_for_action(db, transfer_id)
+
+    if session.sender_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Bu transfer için upload yetkiniz yok.")
+
+    if session.status == TransferStatus.expired:
+        # Retention, or an upload left idle for too long, released its storage.
+        raise HTTPException(status_code=410, detail="Transferin süresi doldu.")
+    if session.status in _UPLOAD_REFUSED:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda upload edilemez.")
+
+    return session
+
+
+def _prepare_part_path(session: TransferSession) -> Path:
+    _session_dir(session.id, create=True)
+    return _part_path(_session_file_path(session))
+
+
+def _part_path(target_path: Path) -> Path:
+    return target_path.with_suffix(target_path.suffix + ".part")
+
+
+def _part_offset(part_path: Path) -> int:
+    return part_path.stat().st_size if part_path.exists() else 0
+
+
+@asynccontextmanager
+async def _upload_lock(
+    db: AsyncSession, session: TransferSession, *, allow_completed: bool = False
+) -> AsyncIterator[None]:
+    """Hold the session's upload lock from the first byte through the completing commit.
+
+    The session is re-read under the lock: a request that raced another one to the
+    lock and finds the session completed or closed meanwhile gets 409 instead of
+    touching a part file that is being verified or moved into the blob store.
+    """
+
+    with _exclusive_upload(session.id):
+        await db.refresh(session)
+        refused = _UPLOAD_REFUSED if allow_completed else _UPLOAD_REFUSED | {TransferStatus.completed}
+        if session.status in refused:
+            raise HTTPException(status_code=409, detail="Transfer başka bir istek tarafından güncellendi.")
+        yield
+
+
+@contextmanager
+def _exclusive_upload(transfer_id: uuid.UUID, part_number: int | None = None) -> Iterator[None]:
+    try:
+        with resumable.exclusive(transfer_id, part_number):
+            yield
+    except resumable.UploadBusyError as exc:
+        raise HTTPException(status_code=409, detail="Bu transfer için devam eden bir upload var.") from exc
+
+
+async def _complete_upload(
+    db: AsyncSession,
+    session: TransferSession,
+    request: Request,
+    tmp_path: Path,
+    size: int,
+    checksum: str,
+    *,
+    multipart: bool = False,
+) -> None:
+    if size != session.file_size:
+        upload_verification_failures.labels("size").inc()
+        message = f"Size mismatch: expected={session.file_size} got={size}"
+        await _fail_upload(db, session, request, tmp_path, message, multipart=multipart)
         raise HTTPException(status_code=400, detail="Dosya boyutu uyuşmuyor.")
 
-    checksum = hasher.hexdigest()
     if checksum.lower() != (session.checksum_sha256 or "").lower():
-        tmp_path.unlink(missing_ok=True)
-        session.status = TransferStatus.failed
-        session.updated_at = datetime.now(timezone.utc)
-        db.add(session)
-        db.add(
-            TransferLog(
-                transfer_session_id=session.id,
-                event="upload_failed",
-                message="Checksum mismatch",
-                ip=request.client.host if request.client else None,
-                created_at=session.updated_at,
-            )
-        )
-        db.commit()
+        upload_verification_failures.labels("checksum").inc()
+        await _fail_upload(db, session, request, tmp_path, "Checksum mismatch", multipart=multipart)
         raise HTTPException(status_code=400, detail="Checksum uyuşmuyor.")
 
-    # Move into final place.
-    tmp_path.replace(target_path)
+    # Move into the content-addressed store (or keep the part file if identical bytes
+    # are already there) before the first write: compression or an S3 upload must
+    # not run inside the write transaction.
+    pending = await blob_store.store(
+        db, tmp_path, checksum, size, file_type=session.file_type, file_name=session.file_name
+    )
+    if multipart:
+        await _drop_multipart(db, session)
+    # Reference the new content before releasing the old one, which may be the same blob.
+    duplicate = await blob_store.adopt(db, pending)
+    released = await blob_store.release(db, session.blob_sha256) if session.blob_sha256 else None
+    session.blob_sha256 = pending.sha256
 
     session.status = TransferStatus.completed
     session.updated_at = datetime.now(timezone.utc)
     db.add(session)
-    db.add(
-        TransferLog(
-            transfer_session_id=session.id,
-            event="uploaded",
-            message=None,
-            ip=request.client.host if request.client else None,
-            created_at=session.updated_at,
-        )
+    audit_log.record(session.id, "uploaded", ip=_client_ip(request), created_at=session.updated_at)
+    await _touch_recipients(db, session)
+    await db.commit()
+    await notify_transfer(session, "completed", recipients=await _recipient_ids(db, session))
+
+    for key in (released, duplicate):
+        if key is not None:
+            await run_io(blob_store.remove, key)
+    await run_io(_remove_session_dir, session.id)
+
+
+async def _fail_upload(
+    db: AsyncSession,
+    session: TransferSession,
+    request: Request,
+    tmp_path: Path,
+    message: str,
+    *,
+    multipart: bool = False,
+) -> None:
+    await run_io(tmp_path.unlink, True)
+    if multipart:
+        await _drop_multipart(db, session)
+    session.status = TransferStatus.failed
+    session.updated_at = datetime.now(timezone.utc)
+    db.add(session)
+    audit_log.record(
+        session.id, "upload_failed", message=message, ip=_client_ip(request), created_at=session.updated_at
     )
-    db.commit()
+    await _touch_recipients(db, session)
+    await db.commit()
+    await notify_transfer(session, "failed", recipients=await _recipient_ids(db, session))
 
-    return {"status": "ok"}
 
+@router.api_route("/sessions/{transfer_id}/download", methods=["GET", "HEAD"])
+async def download_file(
+    transfer_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> RangeFileResponse:
+    session = await _get_session_for_action(db, transfer_id)
+
+    recipient = None
+    if session.recipient_count is not None:
+        recipient = await _get_recipient(db, session, current_user.id)
+        if recipient is None:
+            raise HTTPException(status_code=403, detail="Bu transferi indirme yetkiniz yok.")
+        status = _recipient_status(session.status, recipient.status)
+    else:
+        if session.receiver_user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Bu transferi indirme yetkiniz yok.")
+        status = session.status
+
+    if status not in {TransferStatus.accepted, TransferStatus.completed}:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda indirilemez.")
+
+    # Sessions completed before the blob store existed keep their per-session file.
+    blob = await db.get(Blob, session.blob_sha256) if session.blob_sha256 else None
+    encoding = blob.encoding if blob is not None else None
+    key = blob_store.blob_key(blob.sha256, encoding) if blob is not None else _legacy_file_key(session)
+    stored = await run_io(storage.stat, key)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı.")
+
+    # Compressed blobs go out as stored when the client takes the encoding for the
+    # whole file; range requests (resumed and segmented downloads) get the
+    # original bytes, decoded on the fly. Blobs compressed above the size limit
+    # (stored before it was lowered) cannot serve ranges at a bounded cost.
+    accept_ranges = encoding is None or storage_codec.range_decodable(session.file_size)
+    send_encoded = (
+        encoding is not None
+        and ("range" not in request.headers or not accept_ranges)
+        and storage_codec.accepts(request.headers.get("accept-encoding"), encoding)
+    )
+    response = RangeFileResponse(
+        stored.local_path,
+        request_headers=request.headers,
+        opener=None if stored.local_path else functools.partial(storage.open, key),
+        size=stored.size,
+        mtime=stored.mtime,
+        checksum_sha256=session.checksum_sha256,
+        filename=_safe_filename(session.file_name),
+        transfer_status=status.value,
+        content_encoding=encoding if send_encoded else None,
+        decode=encoding if not send_encoded else None,
+        decoded_size=session.file_size,
+        accept_ranges=accept_ranges,
+    )
+
+    # Resumed and parallel segment requests belong to the same logical download;
+    # only the request that starts at byte 0 is audited.
+    if request.method == "GET" and response.is_initial_segment:
+        recipient_user_id = recipient.user_id if recipient is not None else None
+        audit_log.record(session.id, "downloaded", ip=_client_ip(request), recipient_user_id=recipient_user_id)
+        if recipient is not None and recipient.downloaded_at is None:
+            await _mark_downloaded(db, session, recipient)
+
+    return response
+
+
+async def _mark_downloaded(db: AsyncSession, session: TransferSession, recipient: TransferRecipient) -> None:
+    now = datetime.now(timezone.utc)
+    recipient.downloaded_at = now
+    recipient.updated_at = now
+    session.updated_at = now
+    db.add_all((recipient, session))
+    await db.commit()
+
+
+# Direct (LAN) transfers: the server is only the rendezvous. The sender agent
+# offers its endpoint, the receiver agent connects to it with the transfer token
+# and reports the verified result; see app/core/direct.py.
 
-@router.get("/sessions/{transfer_id}/download")
-def download_file(
+
+def _require_direct_enabled() -> None:
+    if not settings.direct_transfer_enabled:
+        raise HTTPException(status_code=404, detail="Doğrudan aktarım kapalı.")
+
+
+@router.post("/sessions/{transfer_id}/direct/offer", response_model=DirectOfferPublic)
+async def offer_direct_transfer(
     transfer_id: uuid.UUID,
+    payload: DirectOfferRequest,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    session = _get_session_for_action(db, transfer_id)
+    db: AsyncSession = Depends(get_async_db),
+) -> DirectOfferPublic:
+    _require_direct_enabled()
+    session = await _get_session_for_action(db, transfer_id)
+
+    if session.sender_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Bu transfer için doğrudan gönderim yetkiniz yok.")
+
+    if session.recipient_count is not None:
+        raise HTTPException(status_code=400, detail="Çok alıcılı transferler doğrudan gönderilemez.")
+
+    if session.status not in {TransferStatus.pending, TransferStatus.accepted, TransferStatus.in_progress}:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda doğrudan gönderilemez.")
+
+    try:
+        addresses = direct.parse_addresses(payload.addresses)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Geçersiz adres.") from exc
+
+    now = datetime.now(timezone.utc)
+    offer = await db.get(DirectOffer, session.id)
+    if offer is None:
+        offer = DirectOffer(transfer_session_id=session.id)
+    offer.addresses = ",".join(addresses)
+    offer.port = payload.port
+    offer.observed_ip = _client_ip(request)
+    offer.nonce = direct.new_nonce()
+    offer.expires_at = now + timedelta(seconds=settings.direct_token_ttl_seconds)
+    offer.created_at = now
+
+    db.add(offer)
+    endpoint = f"{offer.addresses} port {offer.port}"
+    audit_log.record(session.id, "direct_offered", message=endpoint, ip=_client_ip(request), created_at=now)
+    await db.commit()
+    await notify_transfer(session, "direct_offered")
+
+    return DirectOfferPublic(token=direct.transfer_token(session.id, offer.nonce), expires_at=offer.expires_at)
+
+
+@router.post("/sessions/{transfer_id}/direct/connect", response_model=DirectPeerPublic)
+async def connect_direct_transfer(
+    transfer_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> DirectPeerPublic:
+    _require_direct_enabled()
+    session = await _get_session_for_action(db, transfer_id)
 
     if session.receiver_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Bu transferi indirme yetkiniz yok.")
 
-    if session.status not in {TransferStatus.accepted, TransferStatus.completed}:
+    if session.status not in {TransferStatus.accepted, TransferStatus.in_progress}:
         raise HTTPException(status_code=400, detail="Transfer bu durumda indirilemez.")
 
-    path = _session_file_path(session)
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Dosya bulunamadı.")
+    now = datetime.now(timezone.utc)
+    offer = await db.scalar(
+        select(DirectOffer).where(DirectOffer.transfer_session_id == session.id, DirectOffer.expires_at > now)
+    )
+    if offer is None:
+        raise HTTPException(status_code=404, detail="Gönderici doğrudan aktarım için hazır değil.")
 
-    db.add(
-        TransferLog(
-            transfer_session_id=session.id,
-            event="downloaded",
-            message=None,
-            ip=request.client.host if request.client else None,
-            created_at=datetime.now(timezone.utc),
+    session.status = TransferStatus.in_progress
+    session.updated_at = now
+    db.add(session)
+    audit_log.record(session.id, "direct_started", ip=_client_ip(request), created_at=now)
+    await db.commit()
+    await notify_transfer(session, "in_progress")
+
+    return DirectPeerPublic(
+        addresses=offer.addresses.split(","),
+        port=offer.port,
+        token=direct.transfer_token(session.id, offer.nonce),
+        expires_at=offer.expires_at,
+        file_size=session.file_size,
+        checksum_sha256=session.checksum_sha256,
+        same_network=offer.observed_ip is not None and offer.observed_ip == _client_ip(request),
+    )
+
+
+@router.post("/sessions/{transfer_id}/direct/report")
+async def report_direct_transfer(
+    transfer_id: uuid.UUID,
+    payload: DirectReportRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    _require_direct_enabled()
+    session = await _get_session_for_action(db, transfer_id)
+
+    if current_user.id not in {session.sender_user_id, session.receiver_user_id}:
+        raise HTTPException(status_code=403, detail="Bu transfer için yetkiniz yok.")
+
+    if payload.result == "completed":
+        if current_user.id != session.receiver_user_id:
+            raise HTTPException(status_code=403, detail="Aktarımı yalnızca alıcı tamamlayabilir.")
+        if session.status != TransferStatus.in_progress:
+            raise HTTPException(status_code=400, detail="Transfer bu durumda tamamlanamaz.")
+        verified = (
+            payload.size == session.file_size and (payload.sha256 or "").lower() == session.checksum_sha256.lower()
         )
+    else:
+        verified = False
+
+    now = datetime.now(timezone.utc)
+    session.updated_at = now
+    if verified:
+        session.status = TransferStatus.completed
+        await db.execute(delete(DirectOffer).where(DirectOffer.transfer_session_id == session.id))
+        audit_log.record(session.id, "direct_completed", ip=_client_ip(request), created_at=now)
+    else:
+        # Back to accepted: the peers may retry, or fall back to the server.
+        if session.status == TransferStatus.in_progress:
+            session.status = TransferStatus.accepted
+        message = payload.message if payload.result == "failed" else "Checksum mismatch"
+        audit_log.record(session.id, "direct_failed", message=message, ip=_client_ip(request), created_at=now)
+    db.add(session)
+    await db.commit()
+    await notify_transfer(session, "completed" if verified else "direct_failed")
+
+    if payload.result == "completed" and not verified:
+        raise HTTPException(status_code=400, detail="Checksum uyuşmuyor.")
+    return {"status": "ok"}
+
+
+# Fan-out sessions: one session, one upload and one blob for a set of recipients.
+# Each recipient has a narrow transfer_recipients row holding only their own
+# decision (pending/accepted/rejected) and download time; what they see is that
+# decision combined with the session status (see _recipient_status).
+
+_SESSION_CLOSED = {TransferStatus.cancelled, TransferStatus.failed, TransferStatus.expired}
+
+
+def _recipient_status(session_status: TransferStatus, decision: TransferStatus) -> TransferStatus:
+    if session_status in _SESSION_CLOSED:
+        return session_status
+    if decision != TransferStatus.accepted:
+        return decision
+    return TransferStatus.completed if session_status == TransferStatus.completed else TransferStatus.accepted
+
+
+def _recipient_status_expr():
+    # SQL form of _recipient_status, for the listing.
+    return case(
+        (TransferSession.status.in_(_SESSION_CLOSED), TransferSession.status),
+        (TransferRecipient.status != TransferStatus.accepted, TransferRecipient.status),
+        (TransferSession.status == TransferStatus.completed, TransferSession.status),
+        else_=TransferRecipient.status,
     )
-    db.commit()
 
-    return FileResponse(
-        path=str(path),
-        filename=_safe_filename(session.file_name),
-        media_type="application/octet-stream",
+
+async def _get_recipient(db: AsyncSession, session: TransferSession, user_id: uuid.UUID) -> TransferRecipient | None:
+    return await db.get(TransferRecipient, (session.id, user_id))
+
+
+async def _recipient_ids(db: AsyncSession, session: TransferSession) -> list[uuid.UUID]:
+    if session.recipient_count is None:
+        return []
+    stmt = select(TransferRecipient.user_id).where(TransferRecipient.transfer_session_id == session.id)
+    return list((await db.scalars(stmt)).all())
+
+
+async def _touch_recipients(db: AsyncSession, session: TransferSession) -> None:
+    """Move every recipient's row along with a session change they all see."""
+    if session.recipient_count is not None:
+        await db.execute(
+            update(TransferRecipient)
+            .where(TransferRecipient.transfer_session_id == session.id)
+            .values(updated_at=session.updated_at)
+        )
+
+
+async def _record_decision(
+    db: AsyncSession, session: TransferSession, recipient: TransferRecipient, decision: TransferStatus, request: Request
+) -> None:
+    now = datetime.now(timezone.utc)
+    recipient.status = decision
+    recipient.updated_at = now
+    # The sender's listing shows the session as changed as well.
+    session.updated_at = now
+
+    db.add_all((recipient, session))
+    audit_log.record(
+        session.id, decision.value, ip=_client_ip(request), created_at=now, recipient_user_id=recipient.user_id
     )
+    await db.commit()
+    await notify_transfer(session, decision.value, recipients=[recipient.user_id], recipient_user_id=str(recipient.user_id))
+
+
+@router.get("/sessions/{transfer_id}/recipients", response_model=list[TransferRecipientPublic])
+async def list_transfer_recipients(
+    transfer_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> list[TransferRecipientPublic]:
+    """Per-recipient state of a fan-out session, for its sender."""
+
+    session = await _get_session_for_action(db, transfer_id)
+
+    if session.sender_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Bu transfer için yetkiniz yok.")
+
+    if session.recipient_count is None:
+        raise HTTPException(status_code=400, detail="Bu transfer çok alıcılı değil.")
+
+    stmt = select(TransferRecipient).where(TransferRecipient.transfer_session_id == session.id)
+    return [
+        TransferRecipientPublic(
+            user_id=recipient.user_id,
+            status=_recipient_status(session.status, recipient.status),
+            downloaded_at=recipient.downloaded_at,
+            updated_at=recipient.updated_at,
+        )
+        for recipient in (await db.scalars(stmt)).all()
+    ]
 
 
-def _get_session_for_action(db: Session, transfer_id: uuid.UUID) -> TransferSession:
-    session = db.get(TransferSession, transfer_id)
+async def _get_session_for_action(db: AsyncSession, transfer_id: uuid.UUID) -> TransferSession:
+    session = await db.get(TransferSession, transfer_id)
     if not session:
         raise HTTPException(status_code=404, detail="Transfer oturumu bulunamadı.")
     return session
 
 
 @router.post("/sessions/{transfer_id}/accept")
-def accept_transfer(
+async def accept_transfer(
     transfer_id: uuid.UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    session = _get_session_for_action(db, transfer_id)
+    session = await _get_session_for_action(db, transfer_id)
+
+    if session.recipient_count is not None:
+        recipient = await _get_recipient(db, session, current_user.id)
+        if recipient is None:
+            raise HTTPException(status_code=403, detail="Bu transferi kabul etme yetkiniz yok.")
+        if recipient.status != TransferStatus.pending or session.status in _SESSION_CLOSED:
+            raise HTTPException(status_code=400, detail="Transfer bu durumda kabul edilemez.")
+        await _record_decision(db, session, recipient, TransferStatus.accepted, request)
+        return {"status": "ok"}
 
     if session.receiver_user_id and session.receiver_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Bu transferi kabul etme yetkiniz yok.")
@@ -257,28 +1290,30 @@ def accept_transfer(
     session.updated_at = now
 
     db.add(session)
-    db.add(
-        TransferLog(
-            transfer_session_id=session.id,
-            event="accepted",
-            message=None,
-            ip=request.client.host if request.client else None,
-            created_at=now,
-        )
-    )
-    db.commit()
+    audit_log.record(session.id, "accepted", ip=_client_ip(request), created_at=now)
+    await db.commit()
+    await notify_transfer(session, "accepted")
 
     return {"status": "ok"}
 
 
 @router.post("/sessions/{transfer_id}/reject")
-def reject_transfer(
+async def reject_transfer(
     transfer_id: uuid.UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    session = _get_session_for_action(db, transfer_id)
+    session = await _get_session_for_action(db, transfer_id)
+
+    if session.recipient_count is not None:
+        recipient = await _get_recipient(db, session, current_user.id)
+        if recipient is None:
+            raise HTTPException(status_code=403, detail="Bu transferi reddetme yetkiniz yok.")
+        if recipient.status != TransferStatus.pending or session.status in _SESSION_CLOSED:
+            raise HTTPException(status_code=400, detail="Transfer bu durumda reddedilemez.")
+        await _record_decision(db, session, recipient, TransferStatus.rejected, request)
+        return {"status": "ok"}
 
     if session.receiver_user_id and session.receiver_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Bu transferi reddetme yetkiniz yok.")
@@ -291,28 +1326,21 @@ def reject_transfer(
     session.updated_at = now
 
     db.add(session)
-    db.add(
-        TransferLog(
-            transfer_session_id=session.id,
-            event="rejected",
-            message=None,
-            ip=request.client.host if request.client else None,
-            created_at=now,
-        )
-    )
-    db.commit()
+    audit_log.record(session.id, "rejected", ip=_client_ip(request), created_at=now)
+    await db.commit()
+    await notify_transfer(session, "rejected")
 
     return {"status": "ok"}
 
 
 @router.post("/sessions/{transfer_id}/cancel")
-def cancel_transfer(
+async def cancel_transfer(
     transfer_id: uuid.UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    session = _get_session_for_action(db, transfer_id)
+    session = await _get_session_for_action(db, transfer_id)
 
     if session.sender_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Bu transferi iptal etme yetkiniz yok.")
@@ -325,15 +1353,38 @@ def cancel_transfer(
     session.updated_at = now
 
     db.add(session)
-    db.add(
-        TransferLog(
-            transfer_session_id=session.id,
-            event="cancelled",
-            message=None,
-            ip=request.client.host if request.client else None,
-            created_at=now,
-        )
-    )
-    db.commit()
+    audit_log.record(session.id, "cancelled", ip=_client_ip(request), created_at=now)
+    await _touch_recipients(db, session)
+    await db.commit()
+    await notify_transfer(session, "cancelled", recipients=await _recipient_ids(db, session))
+
+    return {"status": "ok"}
+
+
+@router.delete("/sessions/{transfer_id}")
+async def delete_transfer_session(
+    transfer_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    session = await _get_session_for_action(db, transfer_id)
+
+    if session.sender_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Bu transferi silme yetkiniz yok.")
+
+    if session.status not in {
+        TransferStatus.completed,
+        TransferStatus.rejected,
+        TransferStatus.cancelled,
+        TransferStatus.failed,
+        TransferStatus.expired,
+    }:
+        raise HTTPException(status_code=400, detail="Transfer bu durumda silinemez; önce iptal edin.")
+
+    with _exclusive_upload(session.id):
+        _, released = await purge_session(db, session.id)
+        if released is not None:
+            await run_io(blob_store.remove, released)
+        await run_io(functools.partial(_remove_session_dir, session.id, recursive=True))
 
     return {"status": "ok"}
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import TextIO
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.models import TransferLog
+from app.db.session import engine
+
+
+logger = logging.getLogger(__name__)
+
+
+# TransferLog rows are audit records that nothing reads on the request path, so
+# they are buffered here and written in bulk off the request's transaction: one
+# executemany per batch (fast_executemany on SQL Server), triggered by batch size or
+# by the flush interval, and on shutdown.
+#
+# With a spill directory configured every event is also appended to a local
+# segment file. The appends run on one dedicated thread, in record order, so a
+# slow disk (typically while the database is down and nothing else drains)
+# never stalls the event loop. A segment is deleted only after its events are
+# committed; segments left behind by a crash are replayed on startup.
+# Event ids are assigned here, so a replay of rows that did reach the database is
+# skipped instead of duplicated.
+
+_BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+# Segments younger than this may still be open in another worker.
+_REPLAY_MIN_AGE_SECONDS = 60
+
+
+class AuditLogWriter:
+    def __init__(self, *, batch_size: int, flush_interval: float, spill_dir: Path | None) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self._pending: list[dict] = []
+        self._segment: TextIO | None = None
+        self._segment_path: Path | None = None
+        # Segments whose events are all in `_pending` (or in the batch being written).
+        self._sealed: list[Path] = []
+        # Owns `_segment`: every spill write and segment close runs here, in order.
+        self._spill_thread = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-spill") if spill_dir is not None else None
+        )
+        self._lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._size_flush: asyncio.Task | None = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        transfer_session_id: uuid.UUID,
+        event: str,
+        *,
+        message: str | None = None,
+        ip: str | None = None,
+        created_at: datetime | None = None,
+        recipient_user_id: uuid.UUID | None = None,
+    ) -> None:
+        row = {
+            "id": uuid.uuid4().hex,
+            "transfer_session_id": transfer_session_id.hex,
+            "event": event,
+            "recipient_user_id": recipient_user_id.hex if recipient_user_id else None,
+            "message": message,
+            "ip": ip,
+            "created_at": (created_at or datetime.now(timezone.utc)).isoformat(),
+        }
+        if self._spill_thread is not None:
+            self._spill_thread.submit(self._spill, row)
+        self._pending.append(row)
+        self.recorded += 1
+
+        if len(self._pending) >= self.batch_size and (self._size_flush is None or self._size_flush.done()):
+            try:
+                self._size_flush = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass  # no loop (scripts); the next flush picks it up
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            # Queued behind the spill writes of exactly the events in `batch`.
+            await self._seal_segment()
+            sealed = list(self._sealed)
+            try:
+                skipped = await run_in_threadpool(_insert_rows, batch)
+            except Exception:
+                # Database unavailable: keep everything (memory and spill) for the next attempt.
+                self.failed_flushes += 1
+                self._pending = batch + self._pending
+                logger.exception("Audit log flush of %s events failed; will retry.", len(batch))
+                return
+            self.written += len(batch) - skipped
+            self.dropped += skipped
+            for path in sealed:
+                self._sealed.remove(path)
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError:
+                    logger.warning("Could not remove audit spill segment %s", path)
+
+    async def start(self) -> None:
+        """Replay segments left by a previous run, then flush every `flush_interval` seconds."""
+        if self.spill_dir is not None:
+            await run_in_threadpool(self.spill_dir.mkdir, parents=True, exist_ok=True)
+            replayed = await run_in_threadpool(self._load_orphaned_segments)
+            if replayed:
+                logger.info("Replaying %s audit events from spill segments.", replayed)
+                await self.flush()
+        self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        await self._seal_segment()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _spill(self, row: dict) -> None:
+        """Append one event to the open segment; runs on the spill thread."""
+        try:
+            if self._segment is None:
+                assert self.spill_dir is not None
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                self._segment_path = self.spill_dir / f"{time.time_ns()}-{os.getpid()}.jsonl"
+                # Line buffered: every event reaches the OS as soon as the thread gets to it.
+                self._segment = self._segment_path.open("a", encoding="utf-8", buffering=1)
+            self._segment.write(json.dumps(row, separators=(",", ":")) + "\n")
+        except OSError:
+            logger.exception("Could not spill audit event %s to disk.", row["id"])
+
+    async def _seal_segment(self) -> None:
+        if self._spill_thread is None:
+            return
+        path = await asyncio.wrap_future(self._spill_thread.submit(self._close_segment))
+        if path is not None:
+            self._sealed.append(path)
+
+    def _close_segment(self) -> Path | None:
+        """Close the open segment and return its path; runs on the spill thread."""
+        if self._segment is None:
+            return None
+        path = self._segment_path
+        self._segment.close()
+        self._segment = None
+        self._segment_path = None
+        return path
+
+    def _load_orphaned_segments(self) -> int:
+        assert self.spill_dir is not None
+        cutoff = time.time() - _REPLAY_MIN_AGE_SECONDS
+        loaded = 0
+        for path in sorted(self.spill_dir.glob("*.jsonl")):
+            if path.stat().st_mtime > cutoff:
+                continue
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._pending.append(json.loads(line))
+                        loaded += 1
+                    except json.JSONDecodeError:
+                        # A crash can cut the last line short.
+                        self.dropped += 1
+            self._sealed.append(path)
+        return loaded
+
+
+def _insert_rows(rows: list[dict]) -> int:
+    """Insert a batch; returns how many rows the database refused."""
+    values = [
+        {
+            "id": uuid.UUID(row["id"]),
+            "transfer_session_id": uuid.UUID(row["transfer_session_id"]),
+            "event": row["event"],
+            # Absent in segments spilled before fan-out sessions existed.
+            "recipient_user_id": uuid.UUID(row["recipient_user_id"]) if row.get("recipient_user_id") else None,
+            "message": row["message"],
+            "ip": row["ip"],
+            "created_at": datetime.fromisoformat(row["created_at"]),
+        }
+        for row in rows
+    ]
+    stmt = insert(TransferLog.__table__)
+    try:
+        with engine.begin() as conn:
+            conn.execute(stmt, values)
+        return 0
+    except IntegrityError:
+        pass
+
+    # Replayed rows that already exist, or events of a session deleted meanwhile:
+    # insert one by one and skip the rows the database refuses.
+    skipped = 0
+    for value in values:
+        try:
+            with engine.begin() as conn:
+                conn.execute(stmt, value)
+        except IntegrityError:
+            skipped += 1
+            logger.debug("Skipping audit event %s: %s", value["id"], value["event"])
+    return skipped
+
+
+audit_log = AuditLogWriter(
+    batch_size=settings.audit_log_batch_size,
+    flush_interval=settings.audit_log_flush_interval_seconds,
+    spill_dir=_BACKEND_ROOT / settings.audit_log_spill_dir if settings.audit_log_spill_dir else None,
+)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+from pathlib import Path
+import uuid
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.util import await_only
+
+from app.core import storage_codec
+from app.core.storage import shard, storage
+from app.core.upload_pipeline import run_io
+from app.db.models import Blob
+
+
+# Content-addressed store: one file per distinct SHA-256, shared by every transfer
+# session that declares that checksum. Rows in `blobs` carry a reference count;
+# the file is removed once the last referencing session is deleted. A blob may be
+# stored compressed (`Blob.encoding`); its file name then carries the codec suffix.
+#
+# A blob file whose row goes away is renamed to a tombstone inside the same
+# transaction, and only the tombstone is deleted after the commit. Once the row
+# is gone another upload may store the same content under the same key again;
+# deleting by the canonical key after the commit could remove that new file. If
+# the transaction rolls back, the tombstone is renamed back.
+
+_CHALLENGE_LENGTH = 64 * 1024
+_RETIRED = "blob_store_retired"
+
+
+def blob_key(sha256: str, encoding: str | None = None) -> str:
+    return "blobs/" + shard(sha256) + (storage_codec.SUFFIXES[encoding] if encoding else "")
+
+
+async def find(db: AsyncSession, sha256: str, size: int) -> Blob | None:
+    blob = await db.get(Blob, sha256.lower())
+    if blob is None or blob.size != size or blob.ref_count <= 0:
+        return None
+    return blob
+
+
+async def acquire(db: AsyncSession, sha256: str) -> bool:
+    """Add a reference to an existing blob. Returns False if it vanished meanwhile."""
+    result = await db.execute(
+        update(Blob).where(Blob.sha256 == sha256.lower(), Blob.ref_count > 0).values(ref_count=Blob.ref_count + 1)
+    )
+    return result.rowcount == 1
+
+
+@dataclass
+class PendingBlob:
+    """A verified part file on its way into the store; see `store` and `adopt`."""
+
+    sha256: str
+    size: int
+    part_path: Path
+    file_type: str | None = None
+    file_name: str | None = None
+    # Whether the file is already in the store, under blob_key(sha256, encoding).
+    stored: bool = False
+    encoding: str | None = None
+
+
+async def store(
+    db: AsyncSession,
+    part_path: Path,
+    sha256: str,
+    size: int,
+    *,
+    file_type: str | None = None,
+    file_name: str | None = None,
+) -> PendingBlob:
+    """Move a verified part file into the store, without writing to the database.
+
+    Skipped when the blob already exists (the part file then stays until `adopt`
+    has taken a reference). New content is compressed on the way in when the
+    storage codec is enabled and the file looks compressible. Call it before the
+    first write of the transaction: compressing or uploading a large file must
+    not run while the transaction holds write locks (on SQLite, the only one).
+    """
+
+    pending = PendingBlob(sha256.lower(), size, part_path, file_type, file_name)
+    if await find(db, pending.sha256, size) is None:
+        await _store_pending(pending)
+    return pending
+
+
+async def adopt(db: AsyncSession, pending: PendingBlob) -> str | None:
+    """Give the caller's session one reference to a blob prepared by `store`.
+
+    Only row writes, so the caller's write transaction stays short. Returns the
+    key of a duplicate copy to remove once the caller has committed (when another
+    session stored the same content first, with another encoding).
+    """
+
+    if not pending.stored:
+        if await acquire(db, pending.sha256):
+            await run_io(pending.part_path.unlink, True)
+            return None
+        # Released since `store` looked; rare enough to store it here after all.
+        await _store_pending(pending)
+
+    try:
+        async with db.begin_nested():
+            db.add(Blob(sha256=pending.sha256, size=pending.size, ref_count=1, encoding=pending.encoding))
+    except IntegrityError:
+        # Another session finished the same content first; share its row.
+        if not await acquire(db, pending.sha256):
+            raise
+        winner = await db.scalar(select(Blob.encoding).where(Blob.sha256 == pending.sha256))
+        if winner != pending.encoding:
+            return await _retire(db, blob_key(pending.sha256, pending.encoding))
+    return None
+
+
+async def _store_pending(pending: PendingBlob) -> None:
+    pending.encoding = await run_io(
+        _move_into_store, pending.part_path, pending.sha256, pending.file_type, pending.file_name
+    )
+    pending.stored = True
+
+
+async def release(db: AsyncSession, sha256: str) -> str | None:
+    """Drop one reference. Returns the key to remove once the caller has committed.
+
+    That is the key of the last reference's file, already moved aside (see `_retire`).
+    """
+    sha256 = sha256.lower()
+    await db.execute(update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count - 1))
+    encoding = await db.scalar(select(Blob.encoding).where(Blob.sha256 == sha256, Blob.ref_count <= 0))
+    result = await db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0))
+    return await _retire(db, blob_key(sha256, encoding)) if result.rowcount else None
+
+
+async def _retire(db: AsyncSession, key: str) -> str | None:
+    """Rename `key` to a tombstone while the caller's transaction still holds the row locks.
+
+    The tombstone ends in `.tmp`, so the lifecycle blob sweep picks it up if the
+    process dies before removing it.
+    """
+    tombstone = f"{key}.{uuid.uuid4().hex}.tmp"
+    if not await run_io(storage.rename, key, tombstone):
+        return None
+    db.info.setdefault(_RETIRED, []).append((key, tombstone))
+    return tombstone
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_retired(session: Session) -> None:
+    session.info.pop(_RETIRED, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _restore_retired(session: Session, transaction: SessionTransaction) -> None:
+    # Still listed at the end of the outer transaction: it did not commit.
+    if transaction.nested or transaction.parent is not None:
+        return
+    for key, tombstone in reversed(session.info.pop(_RETIRED, ())):
+        # Runs inside the AsyncSession's greenlet, like the SQLite write gate.
+        await_only(run_io(storage.rename, tombstone, key))
+
+
+def _move_into_store(part_path: Path, sha256: str, file_type: str | None, file_name: str | None) -> str | None:
+    encoding = storage_codec.choose_encoding(part_path, file_type, file_name)
+    if encoding is None:
+        storage.store(blob_key(sha256), part_path)
+        return None
+
+    compressed = part_path.with_name(part_path.name + ".compressed")
+    try:
+        storage_codec.compress_file(part_path, compressed, encoding)
+        storage.store(blob_key(sha256, encoding), compressed)
+    except BaseException:
+        compressed.unlink(missing_ok=True)
+        raise
+    part_path.unlink()
+    return encoding
+
+
+def remove(key: str) -> None:
+    storage.delete(key)
+
+
+def challenge_for(transfer_id: uuid.UUID, size: int) -> tuple[int, int]:
+    """Byte range a sender must hash to prove it holds the content it references.
+
+    Derived from the (random, server-issued) session id, so it cannot be precomputed
+    from the checksum alone.
+    """
+
+    length = min(_CHALLENGE_LENGTH, size)
+    span = size - length
+    offset = int.from_bytes(hashlib.sha256(transfer_id.bytes).digest()[:8], "big") % (span + 1)
+    return offset, length
+
+
+def verify_challenge(blob: Blob, transfer_id: uuid.UUID, proof_sha256: str) -> bool:
+    offset, length = challenge_for(transfer_id, blob.size)
+    with storage_codec.open_decoded(storage.open(blob_key(blob.sha256, blob.encoding)), blob.encoding) as f:
+        f.seek(offset)
+        data = f.read(length)
+    return hashlib.sha256(data).hexdigest() == proof_sha256.lower()
+
@@ -20,30 +20,103 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(default=60, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
 
+    principal_cache_ttl_seconds: float = Field(default=30, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+    principal_cache_max_entries: int = Field(default=10000, alias="PRINCIPAL_CACHE_MAX_ENTRIES")
+
     max_failed_login_attempts: int = Field(default=5, alias="MAX_FAILED_LOGIN_ATTEMPTS")
     lockout_minutes: int = Field(default=15, alias="LOCKOUT_MINUTES")
 
+    rate_limit_enabled: bool = Field(default=True, alias="RATE_LIMIT_ENABLED")
+    rate_limit_backend: str = Field(default="memory", alias="RATE_LIMIT_BACKEND")
+    rate_limit_redis_url: str | None = Field(default=None, alias="RATE_LIMIT_REDIS_URL")
+    login_attempts_per_minute_per_ip: int = Field(default=30, alias="LOGIN_ATTEMPTS_PER_MINUTE_PER_IP")
+    login_attempts_per_minute_per_email: int = Field(default=10, alias="LOGIN_ATTEMPTS_PER_MINUTE_PER_EMAIL")
+    password_reset_attempts_per_minute_per_ip: int = Field(default=10, alias="PASSWORD_RESET_ATTEMPTS_PER_MINUTE_PER_IP")
+    password_reset_attempts_per_minute_per_email: int = Field(
+        default=5, alias="PASSWORD_RESET_ATTEMPTS_PER_MINUTE_PER_EMAIL"
+    )
+
+    bcrypt_rounds: int = Field(default=12, alias="BCRYPT_ROUNDS")
+    bcrypt_workers: int | None = Field(default=None, alias="BCRYPT_WORKERS")
+    bcrypt_queue_size: int = Field(default=32, alias="BCRYPT_QUEUE_SIZE")
+    bcrypt_executor: str = Field(default="thread", alias="BCRYPT_EXECUTOR")
+
     ip_allowlist: str | None = Field(default=None, alias="IP_ALLOWLIST")
     ip_blocklist: str | None = Field(default=None, alias="IP_BLOCKLIST")
+    ip_allowlist_file: str | None = Field(default=None, alias="IP_ALLOWLIST_FILE")
+    ip_blocklist_file: str | None = Field(default=None, alias="IP_BLOCKLIST_FILE")
+    ip_list_reload_interval_seconds: float = Field(default=5, alias="IP_LIST_RELOAD_INTERVAL_SECONDS")
+    trusted_proxies: str | None = Field(default=None, alias="TRUSTED_PROXIES")
 
     database_url: str = Field(alias="DATABASE_URL")
+    async_database_url: str | None = Field(default=None, alias="ASYNC_DATABASE_URL")
+    db_pool_size: int = Field(default=20, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(default=30, alias="DB_POOL_TIMEOUT_SECONDS")
+    sqlite_pool_size: int = Field(default=4, alias="SQLITE_POOL_SIZE")
+    sqlite_busy_timeout_ms: int = Field(default=5000, alias="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_synchronous: str = Field(default="NORMAL", alias="SQLITE_SYNCHRONOUS")
+    sqlite_cache_size_kb: int = Field(default=65536, alias="SQLITE_CACHE_SIZE_KB")
+    sqlite_mmap_size_bytes: int = Field(default=256 * 1024**2, alias="SQLITE_MMAP_SIZE_BYTES")
+
+    slow_request_ms: float = Field(default=1000, alias="SLOW_REQUEST_MS")
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    event_loop_lag_interval_seconds: float = Field(default=0.5, alias="EVENT_LOOP_LAG_INTERVAL_SECONDS")
 
     cors_origins: str | None = Field(default=None, alias="CORS_ORIGINS")
 
+    upload_io_workers: int = Field(default=8, alias="UPLOAD_IO_WORKERS")
+    upload_pipeline_depth: int = Field(default=4, alias="UPLOAD_PIPELINE_DEPTH")
+
+    storage_backend: str = Field(default="local", alias="STORAGE_BACKEND")
+    storage_volumes: str | None = Field(default=None, alias="STORAGE_VOLUMES")
+    storage_min_free_bytes: int = Field(default=1024**3, alias="STORAGE_MIN_FREE_BYTES")
+    storage_staging_dir: str | None = Field(default=None, alias="STORAGE_STAGING_DIR")
+    s3_bucket: str | None = Field(default=None, alias="S3_BUCKET")
+    s3_prefix: str | None = Field(default=None, alias="S3_PREFIX")
+    s3_endpoint_url: str | None = Field(default=None, alias="S3_ENDPOINT_URL")
+    s3_region: str | None = Field(default=None, alias="S3_REGION")
+    s3_access_key_id: str | None = Field(default=None, alias="S3_ACCESS_KEY_ID")
+    s3_secret_access_key: str | None = Field(default=None, alias="S3_SECRET_ACCESS_KEY")
+
+    fanout_max_recipients: int = Field(default=500, alias="FANOUT_MAX_RECIPIENTS")
+
+    direct_transfer_enabled: bool = Field(default=True, alias="DIRECT_TRANSFER_ENABLED")
+    direct_token_ttl_seconds: int = Field(default=600, alias="DIRECT_TOKEN_TTL_SECONDS")
+
+    lifecycle_enabled: bool = Field(default=False, alias="LIFECYCLE_ENABLED")
+    lifecycle_interval_seconds: float = Field(default=3600, alias="LIFECYCLE_INTERVAL_SECONDS")
+    lifecycle_retention_days: str = Field(
+        default="completed:30,rejected:7,cancelled:7,failed:7",
+        alias="LIFECYCLE_RETENTION_DAYS",
+    )
+    lifecycle_orphan_grace_seconds: float = Field(default=86400, alias="LIFECYCLE_ORPHAN_GRACE_SECONDS")
+    lifecycle_staging_idle_seconds: float = Field(default=7 * 86400, alias="LIFECYCLE_STAGING_IDLE_SECONDS")
+    lifecycle_deletes_per_second: float = Field(default=10, alias="LIFECYCLE_DELETES_PER_SECOND")
+    lifecycle_lock_file: str = Field(default="storage/lifecycle.lock", alias="LIFECYCLE_LOCK_FILE")
+
+    download_chunk_size: int = Field(default=4 * 1024 * 1024, alias="DOWNLOAD_CHUNK_SIZE")
+    download_zerocopy: bool = Field(default=True, alias="DOWNLOAD_ZEROCOPY")
+
+    storage_compression: str = Field(default="none", alias="STORAGE_COMPRESSION")
+    storage_compression_level: int = Field(default=0, alias="STORAGE_COMPRESSION_LEVEL")
+    storage_compression_min_bytes: int = Field(default=4096, alias="STORAGE_COMPRESSION_MIN_BYTES")
+    storage_compression_max_bytes: int = Field(default=64 * 1024 * 1024, alias="STORAGE_COMPRESSION_MAX_BYTES")
+
+    audit_log_batch_size: int = Field(default=500, alias="AUDIT_LOG_BATCH_SIZE")
+    audit_log_flush_interval_seconds: float = Field(default=1, alias="AUDIT_LOG_FLUSH_INTERVAL_SECONDS")
+    audit_log_spill_dir: str = Field(default="storage/audit", alias="AUDIT_LOG_SPILL_DIR")
+
+    change_feed_settle_seconds: float = Field(default=2, alias="CHANGE_FEED_SETTLE_SECONDS")
+
+    event_queue_size: int = Field(default=100, alias="EVENT_QUEUE_SIZE")
+    event_stream_heartbeat_seconds: float = Field(default=15, alias="EVENT_STREAM_HEARTBEAT_SECONDS")
+    upload_progress_interval_seconds: float = Field(default=1, alias="UPLOAD_PROGRESS_INTERVAL_SECONDS")
+
     def parsed_cors_origins(self) -> list[str]:
         if not self.cors_origins:
             return []
         return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
 
-    def parsed_ip_allowlist(self) -> set[str]:
-        if not self.ip_allowlist:
-            return set()
-        return {i.strip() for i in self.ip_allowlist.split(",") if i.strip()}
-
-    def parsed_ip_blocklist(self) -> set[str]:
-        if not self.ip_blocklist:
-            return set()
-        return {i.strip() for i in self.ip_blocklist.split(",") if i.strip()}
-
 
 settings = Settings()  # type: ignore[call-arg]
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+import functools
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Per-request database accounting. Engine events add query time, the timed pool
+# adds checkout wait (queueing for a connection plus the pre-ping round trip) to
+# the DbUsage of the request that is currently running, and the middleware folds
+# it into per-route totals once the response is sent.
+
+
+@dataclass
+class DbUsage:
+    queries: int = 0
+    query_seconds: float = 0.0
+    checkouts: int = 0
+    checkout_seconds: float = 0.0
+
+
+@dataclass
+class _RouteTotals:
+    requests: int = 0
+    queries: int = 0
+    query_seconds: float = 0.0
+    checkouts: int = 0
+    checkout_seconds: float = 0.0
+    max_queries: int = 0
+    max_checkout_seconds: float = 0.0
+    slow_requests: int = 0
+
+
+_current: ContextVar[DbUsage | None] = ContextVar("db_usage", default=None)
+
+
+class DbProfiler:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], _RouteTotals] = {}
+        self.pre_ping_failures = 0
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+
+    def record_checkout(self, seconds: float) -> None:
+        usage = _current.get()
+        if usage is not None:
+            usage.checkouts += 1
+            usage.checkout_seconds += seconds
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+
+    def record_pre_ping_failure(self) -> None:
+        with self._lock:
+            self.pre_ping_failures += 1
+
+    def record_request(self, method: str, route: str, usage: DbUsage, *, slow: bool) -> None:
+        with self._lock:
+            totals = self._routes.get((method, route))
+            if totals is None:
+                totals = self._routes[(method, route)] = _RouteTotals()
+            totals.requests += 1
+            totals.queries += usage.queries
+            totals.query_seconds += usage.query_seconds
+            totals.checkouts += usage.checkouts
+            totals.checkout_seconds += usage.checkout_seconds
+            totals.max_queries = max(totals.max_queries, usage.queries)
+            totals.max_checkout_seconds = max(totals.max_checkout_seconds, usage.checkout_seconds)
+            totals.slow_requests += int(slow)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = [
+                {
+                    "method": method,
+                    "route": route,
+                    "requests": t.requests,
+                    "queries": t.queries,
+                    "queries_per_request": round(t.queries / t.requests, 2),
+                    "max_queries": t.max_queries,
+                    "query_ms_total": round(t.query_seconds * 1000, 3),
+                    "query_ms_avg": round(t.query_seconds * 1000 / t.requests, 3),
+                    "checkout_ms_total": round(t.checkout_seconds * 1000, 3),
+                    "checkout_ms_avg": round(t.checkout_seconds * 1000 / t.requests, 3),
+                    "checkout_ms_max": round(t.max_checkout_seconds * 1000, 3),
+                    "slow_requests": t.slow_requests,
+                }
+                for (method, route), t in self._routes.items()
+            ]
+            return {
+                "checkouts": self.checkouts,
+                "checkout_ms_total": round(self.checkout_seconds * 1000, 3),
+                "pre_ping_failures": self.pre_ping_failures,
+                "routes": sorted(routes, key=lambda r: r["query_ms_total"], reverse=True),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self.pre_ping_failures = 0
+            self.checkouts = 0
+            self.checkout_seconds = 0.0
+
+
+db_profiler = DbProfiler()
+
+
+class _TimedCheckout:
+    def connect(self):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        try:
+            return super().connect()  # type: ignore[misc]
+        finally:
+            db_profiler.record_checkout(time.perf_counter() - started)
+
+
+@functools.cache
+def _timed(pool_class: type[Pool]) -> type[Pool]:
+    # A subclass rather than a wrapped instance: Engine.dispose() recreates the pool
+    # from its class, and the timing has to survive that.
+    return type(f"Timed{pool_class.__name__}", (_TimedCheckout, pool_class), {})
+
+
+def pool_class_for(url: str) -> type[Pool]:
+    """The dialect's default pool class for `url`, timing every checkout.
+
+    Except a SQLite file behind aiosqlite, where SQLAlchemy defaults to NullPool:
+    every checkout would start a connection thread and rerun the pragmas.
+    """
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite+aiosqlite" and parsed.database not in (None, "", ":memory:"):
+        if settings.sqlite_pool_size > 0:
+            return _timed(AsyncAdaptedQueuePool)
+    return _timed(parsed.get_dialect().get_pool_class(parsed))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach query timing and pre-ping failure counting to a (sync) Engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        _finish_query(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context) -> None:  # noqa: ANN001
+        if context.is_pre_ping:
+            db_profiler.record_pre_ping_failure()
+            logger.warning("Pool pre-ping failed; connection will be replaced: %s", context.original_exception)
+        elif context.connection is not None:
+            _finish_query(context.connection)
+
+
+def _finish_query(conn) -> None:  # noqa: ANN001
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    usage = _current.get()
+    if usage is not None:
+        usage.queries += 1
+        usage.query_seconds += elapsed
+
+
+def pool_status(engine: Engine) -> dict:
+    pool = engine.pool
+    status: dict = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    return status
+
+
+class DbProfilingMiddleware:
+    """Pure ASGI middleware: opens a DbUsage per HTTP request and records it per route."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = DbUsage()
+        token = _current.set(usage)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            slow = settings.slow_request_ms > 0 and elapsed_ms >= settings.slow_request_ms
+            db_profiler.record_request(scope["method"], route_path, usage, slow=slow)
+            if slow:
+                logger.warning(
+                    "Slow request %s %s -> %s in %.1f ms (db: %d queries, %.1f ms query, %d checkouts, %.1f ms checkout wait)",
+                    scope["method"],
+                    route_path,
+                    status_code,
+                    elapsed_ms,
+                    usage.queries,
+                    usage.query_seconds * 1000,
+                    usage.checkouts,
+                    usage.checkout_seconds * 1000,
+                )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import secrets
+import uuid
+
+from app.core.config import settings
+from app.core.ip_filter import parse_address
+
+
+# Direct (peer-to-peer) transfers. The sender's peer agent listens on its LAN
+# addresses and registers them with an offer; the receiver's agent fetches them
+# together with a transfer token and pulls the file straight from the sender
+# (see agent/peer_agent.py). The server never sees the bytes: it authorizes both
+# sides, relays the endpoint and records the outcome the agents report.
+
+MAX_ADDRESSES = 8
+
+
+def new_nonce() -> str:
+    return secrets.token_hex(16)
+
+
+def transfer_token(session_id: uuid.UUID, nonce: str) -> str:
+    """Session-scoped token the receiver presents to the sender agent.
+
+    Derived rather than stored, so the `direct_offers` table holds no usable
+    secret; a new offer (new nonce) invalidates every earlier token.
+    """
+    message = f"direct:{session_id}:{nonce}".encode("utf-8")
+    digest = hmac.new(settings.jwt_secret.encode("utf-8"), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def parse_addresses(values: list[str]) -> list[str]:
+    """Normalized, de-duplicated unicast IP addresses; raises ValueError otherwise."""
+    addresses: list[str] = []
+    for value in values:
+        address = parse_address(value)
+        if address is None or address.is_multicast or address.is_unspecified:
+            raise ValueError(value)
+        if str(address) not in addresses:
+            addresses.append(str(address))
+    if not addresses or len(addresses) > MAX_ADDRESSES:
+        raise ValueError("address count")
+    return addresses
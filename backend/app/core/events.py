@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import itertools
+import logging
+from typing import AsyncIterator, Iterable
+import uuid
+
+from app.core.config import settings
+from app.db.models import TransferSession
+
+
+logger = logging.getLogger(__name__)
+
+
+# Transfer lifecycle notifications, addressed to user ids. The in-process bus only
+# reaches subscribers connected to the same worker; to fan out across workers,
+# replace `event_bus` with an implementation with the same publish/subscribe
+# surface that relays through a broker (Redis pub/sub, NATS, ...).
+
+
+class EventBus:
+    def __init__(self, *, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscribers: dict[uuid.UUID, set[asyncio.Queue]] = {}
+        self._sequence = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    async def publish(self, user_ids: Iterable[uuid.UUID | None], event: dict) -> None:
+        """Deliver `event` to every open stream of the given users without ever blocking.
+
+        A subscriber that falls `queue_size` events behind loses its oldest events.
+        """
+        event = {"seq": next(self._sequence), "at": datetime.now(timezone.utc).isoformat(), **event}
+        self.published += 1
+        for user_id in {u for u in user_ids if u is not None}:
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped += 1
+                queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: uuid.UUID) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "subscribers": sum(len(q) for q in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+event_bus = EventBus(queue_size=settings.event_queue_size)
+
+
+async def notify_transfer(
+    session: TransferSession, event: str, *, recipients: Iterable[uuid.UUID] = (), **extra: object
+) -> None:
+    """Publish to the sender and receiver, and to the given fan-out recipients."""
+    await event_bus.publish(
+        (session.sender_user_id, session.receiver_user_id, *recipients),
+        {
+            "type": f"transfer.{event}",
+            "transfer_id": str(session.id),
+            "status": session.status.value,
+            "sender_user_id": str(session.sender_user_id),
+            "receiver_user_id": str(session.receiver_user_id) if session.receiver_user_id else None,
+            "recipient_count": session.recipient_count,
+            "file_name": session.file_name,
+            "file_size": session.file_size,
+            **extra,
+        },
+    )
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+from email.utils import formatdate
+import functools
+import mmap
+import os
+from pathlib import Path
+import re
+from secrets import token_hex
+from typing import BinaryIO, Callable
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core import storage_codec
+from app.core.config import settings
+from app.core.metrics import disk_read_seconds, download_bytes, transfers_in_progress
+
+
+_RANGE_SPEC_RE = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+_MAX_RANGES = 32
+
+# Local files are sent with the ASGI zero-copy extension when the server offers
+# it: the server hands the file descriptor to sendfile() and no byte passes
+# through Python. Otherwise they are read with pread() in large page-aligned
+# chunks, with the kernel told the access is sequential and asked to read ahead
+# the next chunks while the current one is being sent. Decoded and remote
+# (S3) content is streamed through a file object.
+_ZEROCOPY_EXTENSION = "http.response.zerocopy"
+_READ_AHEAD_CHUNKS = 2
+
+
+def _page_aligned(size: int) -> int:
+    return max(mmap.PAGESIZE, size // mmap.PAGESIZE * mmap.PAGESIZE)
+
+
+def _advise(fd: int, offset: int, length: int, advice: str) -> None:
+    """posix_fadvise where the platform has it; the hint is best-effort."""
+    if length <= 0 or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice))
+    except OSError:
+        pass
+
+
+def _read_at(fd: int, size: int, offset: int, read_ahead: int) -> bytes:
+    chunk = os.pread(fd, size, offset)
+    _advise(fd, offset + len(chunk), read_ahead, "POSIX_FADV_WILLNEED")
+    return chunk
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(value: str, file_size: int) -> list[tuple[int, int]] | None:
+    """Parse a `Range: bytes=...` header into sorted, merged, half-open ranges.
+
+    Returns None when the header is malformed or should be ignored (the caller then
+    serves the whole file, as RFC 9110 allows). Raises RangeNotSatisfiable when the
+    header is well-formed but no range overlaps the file.
+    """
+
+    units, _, spec = value.partition("=")
+    if units.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges: list[tuple[int, int]] = []
+    for part in spec.split(","):
+        match = _RANGE_SPEC_RE.match(part)
+        if not match:
+            return None
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else file_size
+            if last and end <= start:
+                return None
+        elif last:
+            start = max(file_size - int(last), 0)
+            end = file_size
+        else:
+            return None
+        if start < file_size and end > start:
+            ranges.append((start, min(end, file_size)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    if len(merged) > _MAX_RANGES:
+        return None
+    return merged
+
+
+class RangeFileResponse(Response):
+    """File response with byte-range support keyed on a content checksum.
+
+    Supports `Range` (single and multiple ranges), `If-Range`, `If-None-Match` and
+    `HEAD`. The ETag is derived from the stored SHA-256 so it stays stable across
+    re-uploads of identical bytes and across workers.
+
+    The content is read from `path`, or, for objects that are not local files,
+    from `opener` with `size` and `mtime` given. For a compressed file,
+    `content_encoding` sends the stored bytes labelled with that encoding (under
+    their own ETag), while `decode` streams the original `decoded_size` bytes,
+    decompressing on the fly. With `accept_ranges=False` a `Range` header is
+    ignored and the whole file is sent.
+    """
+
+    chunk_size = _page_aligned(settings.download_chunk_size)
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str] | None,
+        *,
+        request_headers: Headers,
+        opener: Callable[[], BinaryIO] | None = None,
+        size: int | None = None,
+        mtime: float | None = None,
+        checksum_sha256: str,
+        filename: str | None = None,
+        media_type: str = "application/octet-stream",
+        transfer_status: str = "",
+        content_encoding: str | None = None,
+        decode: str | None = None,
+        decoded_size: int | None = None,
+        accept_ranges: bool = True,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.opener = opener
+        self.transfer_status = transfer_status
+        self.decode = decode
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers()
+
+        if size is None or mtime is None:
+            assert self.path is not None
+            stat_result = self.path.stat()
+            size, mtime = stat_result.st_size, stat_result.st_mtime
+        self.file_size = decoded_size if decode and decoded_size is not None else size
+        self.etag = f'"{checksum_sha256.lower()}"'
+        if content_encoding:
+            self.etag = f'"{checksum_sha256.lower()}+{content_encoding}"'
+        self.last_modified = formatdate(mtime, usegmt=True)
+
+        self.headers["accept-ranges"] = "bytes" if accept_ranges else "none"
+        self.headers["etag"] = self.etag
+        self.headers["last-modified"] = self.last_modified
+        if content_encoding:
+            self.headers["content-encoding"] = content_encoding
+        if content_encoding or decode:
+            self.headers["vary"] = "Accept-Encoding"
+        if filename is not None:
+            quoted = quote(filename)
+            if quoted != filename:
+                self.headers["content-disposition"] = f"attachment; filename*=utf-8''{quoted}"
+            else:
+                self.headers["content-disposition"] = f'attachment; filename="{filename}"'
+
+        self.not_modified = self._matches_etag(request_headers.get("if-none-match"))
+        self.unsatisfiable = False
+        self.ranges: list[tuple[int, int]] | None = None
+
+        http_range = request_headers.get("range")
+        if (
+            http_range
+            and accept_ranges
+            and not self.not_modified
+            and self._should_use_range(request_headers.get("if-range"))
+        ):
+            try:
+                self.ranges = parse_range_header(http_range, self.file_size)
+            except RangeNotSatisfiable:
+                self.unsatisfiable = True
+
+    @property
+    def is_initial_segment(self) -> bool:
+        """True when this response carries the first byte of the file (a logical download start)."""
+        if self.not_modified or self.unsatisfiable:
+            return False
+        return self.ranges is None or self.ranges[0][0] == 0
+
+    def _matches_etag(self, value: str | None) -> bool:
+        if not value:
+            return False
+        candidates = {v.strip().removeprefix("W/") for v in value.split(",")}
+        return "*" in candidates or self.etag in candidates
+
+    def _should_use_range(self, if_range: str | None) -> bool:
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            # Weak validators never match for If-Range.
+            return if_range == self.etag
+        return if_range == self.last_modified
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        send_header_only = scope["method"].upper() == "HEAD"
+
+        if self.not_modified:
+            self.status_code = 304
+            await self._send_start(send)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.unsatisfiable:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{self.file_size}"
+            self.headers["content-length"] = "0"
+            await self._send_start(send)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.ranges is None:
+            self.headers["content-length"] = str(self.file_size)
+            await self._send_start(send)
+            await self._send_ranges(scope, send, [(0, self.file_size)], send_header_only)
+        elif len(self.ranges) == 1:
+            start, end = self.ranges[0]
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{self.file_size}"
+            self.headers["content-length"] = str(end - start)
+            await self._send_start(send)
+            await self._send_ranges(scope, send, self.ranges, send_header_only)
+        else:
+            await self._send_multipart(scope, send, send_header_only)
+
+    async def _send_start(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+    async def _send_ranges(
+        self,
+        scope: Scope,
+        send: Send,
+        ranges: list[tuple[int, int]],
+        send_header_only: bool,
+        *,
+        separators: list[bytes] | None = None,
+        trailer: bytes = b"",
+    ) -> None:
+        if send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        local = self.path is not None and self.opener is None and self.decode is None
+        with transfers_in_progress.labels("download", self.transfer_status).track_inprogress():
+            if local and settings.download_zerocopy and _ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await self._send_zerocopy(send, ranges, separators)
+            elif local and hasattr(os, "pread"):
+                await self._send_preads(send, ranges, separators)
+            else:
+                await self._send_stream(send, ranges, separators)
+        await send({"type": "http.response.body", "body": trailer, "more_body": False})
+
+    async def _send_zerocopy(self, send: Send, ranges: list[tuple[int, int]], separators: list[bytes] | None) -> None:
+        sent_bytes = download_bytes.labels()
+        file = await anyio.to_thread.run_sync(functools.partial(open, self.path, "rb", buffering=0))
+        try:
+            for index, (start, end) in enumerate(ranges):
+                if separators:
+                    await send({"type": "http.response.body", "body": separators[index], "more_body": True})
+                await send(
+                    {"type": _ZEROCOPY_EXTENSION, "file": file, "offset": start, "count": end - start, "more_body": True}
+                )
+                sent_bytes.inc(end - start)
+        finally:
+            file.close()
+
+    async def _send_preads(self, send: Send, ranges: list[tuple[int, int]], separators: list[bytes] | None) -> None:
+        read_seconds = disk_read_seconds.labels()
+        sent_bytes = download_bytes.labels()
+        chunk_size = self.chunk_size
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            for index, (start, end) in enumerate(ranges):
+                if separators:
+                    await send({"type": "http.response.body", "body": separators[index], "more_body": True})
+                _advise(fd, start, end - start, "POSIX_FADV_SEQUENTIAL")
+                while start < end:
+                    # The first read stops at a chunk boundary, so later reads are page aligned.
+                    size = min(chunk_size - start % chunk_size, end - start)
+                    read_ahead = min(chunk_size * _READ_AHEAD_CHUNKS, end - start - size)
+                    with read_seconds.time():
+                        chunk = await anyio.to_thread.run_sync(_read_at, fd, size, start, read_ahead)
+                    if not chunk:
+                        raise RuntimeError(f"File at path {self.path} shrank while streaming.")
+                    start += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    sent_bytes.inc(len(chunk))
+        finally:
+            os.close(fd)
+
+    async def _send_stream(self, send: Send, ranges: list[tuple[int, int]], separators: list[bytes] | None) -> None:
+        read_seconds = disk_read_seconds.labels()
+        sent_bytes = download_bytes.labels()
+        async with await self._open() as file:
+            for index, (start, end) in enumerate(ranges):
+                if separators:
+                    await send({"type": "http.response.body", "body": separators[index], "more_body": True})
+                await file.seek(start)
+                while start < end:
+                    with read_seconds.time():
+                        chunk = await file.read(min(self.chunk_size, end - start))
+                    if not chunk:
+                        raise RuntimeError(f"File at path {self.path} shrank while streaming.")
+                    start += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    sent_bytes.inc(len(chunk))
+
+    async def _open(self) -> anyio.AsyncFile:
+        if self.decode is None and self.opener is None:
+            return await anyio.open_file(self.path, mode="rb")
+        return anyio.wrap_file(await anyio.to_thread.run_sync(self._open_sync))
+
+    def _open_sync(self) -> BinaryIO:
+        raw = self.opener() if self.opener is not None else self.path.open("rb")
+        # Decoding streams only seek forward, which is all the sorted ranges need.
+        return storage_codec.open_decoded(raw, self.decode)
+
+    async def _send_multipart(self, scope: Scope, send: Send, send_header_only: bool) -> None:
+        assert self.ranges is not None
+        boundary = token_hex(13)
+        separators = []
+        for index, (start, end) in enumerate(self.ranges):
+            part_header = (
+                f"--{boundary}\r\n"
+                f"Content-Type: {self.media_type}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{self.file_size}\r\n"
+                "\r\n"
+            ).encode("latin-1")
+            separators.append((b"\r\n" if index else b"") + part_header)
+        trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        content_length = sum(len(s) for s in separators) + sum(end - start for start, end in self.ranges) + len(trailer)
+
+        self.status_code = 206
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length)
+        await self._send_start(send)
+        await self._send_ranges(scope, send, self.ranges, send_header_only, separators=separators, trailer=trailer)
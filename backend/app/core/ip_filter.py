@@ -1,22 +1,242 @@
 from __future__ import annotations
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass
+import ipaddress
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.core.config import settings
 
 
-class IPFilterMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        client_host = request.client.host if request.client else ""
-        allowlist = settings.parsed_ip_allowlist()
-        blocklist = settings.parsed_ip_blocklist()
+logger = logging.getLogger(__name__)
+
+
+_Address = ipaddress.IPv4Address | ipaddress.IPv6Address
+_Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+class IPRangeSet:
+    """Immutable set of IPv4/IPv6 networks with O(log n) membership.
+
+    Networks are merged into disjoint, sorted [first, last] integer intervals per
+    address family, so a lookup is one bisect regardless of how many CIDR
+    entries (or single addresses) the list had.
+    """
+
+    def __init__(self, networks: Iterable[_Network] = ()) -> None:
+        by_version: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            by_version[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        self.size = 0
+        for version, intervals in by_version.items():
+            merged: list[list[int]] = []
+            for first, last in sorted(intervals):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], last)
+                else:
+                    merged.append([first, last])
+            self._starts[version] = [first for first, _ in merged]
+            self._ends[version] = [last for _, last in merged]
+            self.size += len(intervals)
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __contains__(self, address: _Address) -> bool:
+        starts = self._starts[address.version]
+        i = bisect_right(starts, int(address)) - 1
+        return i >= 0 and int(address) <= self._ends[address.version][i]
+
+
+def parse_networks(entries: Iterable[str]) -> list[_Network]:
+    """Parse addresses and CIDR ranges; host bits in a range are ignored."""
+    networks = []
+    for entry in entries:
+        entry = entry.split("#", 1)[0].strip()
+        if entry:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+    return networks
+
+
+def parse_address(value: str) -> _Address | None:
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except ValueError:
+        return None
+    # Dual-stack sockets report IPv4 peers as ::ffff:a.b.c.d.
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+        return address.ipv4_mapped
+    return address
+
+
+@dataclass(frozen=True)
+class IPFilterRules:
+    allow: IPRangeSet
+    block: IPRangeSet
+    trusted_proxies: IPRangeSet
+
+    def client_address(self, peer: str | None, forwarded_for: str | None) -> _Address | None:
+        """The originating client: the peer itself, or, when the peer is a trusted
+        proxy, the right-most X-Forwarded-For hop that is not a trusted proxy."""
+        address = parse_address(peer) if peer else None
+        if address is None or not forwarded_for or address not in self.trusted_proxies:
+            return address
+        for hop in reversed(forwarded_for.split(",")):
+            hop_address = parse_address(hop)
+            if hop_address is None:
+                # A forged or garbled hop: nothing to its left can be trusted either.
+                return None
+            address = hop_address
+            if address not in self.trusted_proxies:
+                break
+        return address
+
+    def check(self, address: _Address | None) -> str | None:
+        """None when allowed, otherwise the rejection message."""
+        if address is not None and address in self.block:
+            return "IP engellendi."
+        if self.allow and (address is None or address not in self.allow):
+            return "IP izinli listede değil."
+        return None
+
+
+def _split_setting(value: str | None) -> list[str]:
+    return value.split(",") if value else []
+
+
+def _read_list_file(path: str | None) -> list[str]:
+    if not path:
+        return []
+    return Path(path).read_text(encoding="utf-8").splitlines()
+
+
+def load_rules() -> IPFilterRules:
+    """Compile the allow/block/trusted-proxy lists from settings and list files."""
+    return IPFilterRules(
+        allow=IPRangeSet(
+            parse_networks(_split_setting(settings.ip_allowlist) + _read_list_file(settings.ip_allowlist_file))
+        ),
+        block=IPRangeSet(
+            parse_networks(_split_setting(settings.ip_blocklist) + _read_list_file(settings.ip_blocklist_file))
+        ),
+        trusted_proxies=IPRangeSet(parse_networks(_split_setting(settings.trusted_proxies))),
+    )
+
+
+class IPFilter:
+    """Holds the active rules; `reload` swaps them in with a single assignment, so
+    a request always sees one complete rule set."""
+
+    def __init__(self) -> None:
+        self.rules = load_rules()
+        self.reloads = 0
+        self.rejected = 0
+        self._file_state = self._list_file_state()
+
+    def reload(self) -> bool:
+        try:
+            rules = load_rules()
+        except (OSError, ValueError):
+            logger.exception("IP list reload failed; keeping the previous rules.")
+            return False
+        self.rules = rules
+        self.reloads += 1
+        logger.info(
+            "IP lists loaded: %s allow, %s block, %s trusted proxy entries.",
+            rules.allow.size,
+            rules.block.size,
+            rules.trusted_proxies.size,
+        )
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Reload whenever an IP list file changes."""
+        while True:
+            await asyncio.sleep(interval)
+            state = await asyncio.to_thread(self._list_file_state)
+            if state != self._file_state:
+                self._file_state = state
+                await asyncio.to_thread(self.reload)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "allow_entries": self.rules.allow.size,
+            "block_entries": self.rules.block.size,
+            "trusted_proxies": self.rules.trusted_proxies.size,
+            "reloads": self.reloads,
+            "rejected": self.rejected,
+        }
+
+    @staticmethod
+    def _list_file_state() -> tuple:
+        state = []
+        for path in (settings.ip_allowlist_file, settings.ip_blocklist_file):
+            try:
+                stat = os.stat(path) if path else None
+            except OSError:
+                stat = None
+            state.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+        return tuple(state)
+
+
+ip_filter = IPFilter()
+
+
+class IPFilterMiddleware:
+    """Pure ASGI middleware rejecting clients by the compiled allow/block lists.
+
+    Behind a trusted proxy the resolved client address replaces `scope["client"]`,
+    so `request.client` downstream (audit log, rate limiting) sees the real client.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in {"http", "websocket"}:
+            await self.app(scope, receive, send)
+            return
+
+        rules = ip_filter.rules
+        peer = scope.get("client")
+        forwarded_for = None
+        if rules.trusted_proxies:
+            values = [v.decode("latin-1") for k, v in scope["headers"] if k == b"x-forwarded-for"]
+            forwarded_for = ",".join(values) or None
+        address = rules.client_address(peer[0] if peer else None, forwarded_for)
 
-        if client_host in blocklist:
-            return JSONResponse(status_code=403, content={"detail": "IP engellendi."})
+        if forwarded_for and address is not None and peer and str(address) != peer[0]:
+            scope = {**scope, "client": (str(address), 0)}
 
-        if allowlist and client_host not in allowlist:
-            return JSONResponse(status_code=403, content={"detail": "IP izinli listede değil."})
+        detail = rules.check(address)
+        if detail is None:
+            await self.app(scope, receive, send)
+            return
 
-        return await call_next(request)
+        ip_filter.rejected += 1
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 403,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+import logging
+import os
+from pathlib import Path
+import re
+import time
+from typing import Iterator, TypeVar
+import uuid
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import blob_store, resumable, storage_codec
+from app.core.audit_log import audit_log
+from app.core.config import settings
+from app.core.events import notify_transfer
+from app.core.storage import StoredObject, storage
+from app.db.models import (
+    Blob,
+    DirectOffer,
+    MultipartUpload,
+    TransferLog,
+    TransferRecipient,
+    TransferSession,
+    TransferStatus,
+    UploadPart,
+)
+from app.db.session import AsyncSessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+
+# Storage lifecycle. A background task started from the app lifespan that, every
+# LIFECYCLE_INTERVAL_SECONDS:
+#
+# - with LIFECYCLE_ENABLED, expires sessions whose status has not changed for
+#   longer than that status' retention: their stored file is released and the
+#   session is marked `expired`, while the session, its recipients and its audit
+#   log are kept,
+# - removes staging directories no upload will continue in: the session is gone,
+#   no longer accepts uploads, or completed into the blob store,
+# - removes staging directories of uploads abandoned for longer than
+#   LIFECYCLE_STAGING_IDLE_SECONDS and marks their session `expired`,
+# - removes blob files without a matching `blobs` row (a crash between storing
+#   the file and committing the row), temporary files of interrupted moves, and
+#   upload lock files left by dead workers.
+#
+# Orphans are only touched once unmodified for LIFECYCLE_ORPHAN_GRACE_SECONDS,
+# which leaves uploads and commits in flight alone; a staging directory is only
+# removed under its upload lock. Deletions run one at a time,
+# at most LIFECYCLE_DELETES_PER_SECOND, on the default thread pool rather than
+# the upload I/O pool. With several workers, a lock file lets one of them run.
+
+_BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+_BATCH_SIZE = 200
+# A lock file not refreshed for this long belongs to a worker that died mid-run.
+_LOCK_STALE_SECONDS = 900
+_LOCK_REFRESH_SECONDS = 60
+
+# Sessions in these states never write to their staging directory again.
+_CLOSED_STATUSES = {TransferStatus.rejected, TransferStatus.cancelled, TransferStatus.failed, TransferStatus.expired}
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_KINDS = ("expired", "staging", "blob")
+
+T = TypeVar("T")
+
+
+def parse_retention(value: str | None) -> dict[TransferStatus, timedelta]:
+    """`status:days,...`; statuses not listed, or with 0 days, are kept forever."""
+    retention = {}
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        status, _, days = entry.partition(":")
+        ttl = timedelta(days=float(days))
+        if ttl > timedelta(0):
+            retention[TransferStatus(status.strip().lower())] = ttl
+    return retention
+
+
+async def purge_session(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    *,
+    status: TransferStatus | None = None,
+    updated_before: datetime | None = None,
+) -> tuple[bool, str | None]:
+    """Delete a transfer session and its dependent rows in one transaction.
+
+    With `status` / `updated_before`, only while the session still matches them.
+    Returns whether it was deleted, and the blob key to remove now that the last
+    reference is gone (the caller also removes the staging directory).
+    """
+    conditions = [TransferSession.id == session_id]
+    if status is not None:
+        conditions.append(TransferSession.status == status)
+    if updated_before is not None:
+        conditions.append(TransferSession.updated_at < updated_before)
+
+    # Buffered audit events reference the session; write them before it goes.
+    await audit_log.flush()
+    session = (await db.scalars(select(TransferSession).where(*conditions))).first()
+    if session is None:
+        return False, None
+    blob_sha256 = session.blob_sha256
+    recipients = await _recipient_ids(db, session)
+    await db.execute(delete(UploadPart).where(UploadPart.transfer_session_id == session_id))
+    await db.execute(delete(MultipartUpload).where(MultipartUpload.transfer_session_id == session_id))
+    await db.execute(delete(TransferLog).where(TransferLog.transfer_session_id == session_id))
+    await db.execute(delete(DirectOffer).where(DirectOffer.transfer_session_id == session_id))
+    await db.execute(delete(TransferRecipient).where(TransferRecipient.transfer_session_id == session_id))
+    result = await db.execute(delete(TransferSession).where(*conditions))
+    if result.rowcount != 1:
+        # Changed or purged by another worker since the read above.
+        await db.rollback()
+        return False, None
+    released = await blob_store.release(db, blob_sha256) if blob_sha256 else None
+    await db.commit()
+    resumable.discard(session_id)
+    await notify_transfer(session, "deleted", recipients=recipients)
+    return True, released
+
+
+async def expire_session(
+    db: AsyncSession, session_id: uuid.UUID, *, status: TransferStatus, updated_before: datetime
+) -> tuple[bool, str | None]:
+    """Release a session's stored content and mark it expired, in one transaction.
+
+    Only while the session still has `status` and was last updated before
+    `updated_before`. The session row, its recipients and its audit log stay.
+    Returns whether it was expired, and the blob key to remove now that the last
+    reference is gone (the caller also removes the staging directory).
+    """
+    conditions = [
+        TransferSession.id == session_id,
+        TransferSession.status == status,
+        TransferSession.updated_at < updated_before,
+    ]
+    session = (await db.scalars(select(TransferSession).where(*conditions))).first()
+    if session is None:
+        return False, None
+    blob_sha256 = session.blob_sha256
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        update(TransferSession)
+        .where(*conditions)
+        .values(status=TransferStatus.expired, blob_sha256=None, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        # Changed or expired by another worker since the read above.
+        await db.rollback()
+        return False, None
+    await db.execute(delete(UploadPart).where(UploadPart.transfer_session_id == session_id))
+    await db.execute(delete(MultipartUpload).where(MultipartUpload.transfer_session_id == session_id))
+    await db.execute(delete(DirectOffer).where(DirectOffer.transfer_session_id == session_id))
+    await db.execute(
+        update(TransferRecipient)
+        .where(TransferRecipient.transfer_session_id == session_id)
+        .values(updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    released = await blob_store.release(db, blob_sha256) if blob_sha256 else None
+    recipients = await _recipient_ids(db, session)
+    await db.commit()
+    audit_log.record(session_id, "expired", created_at=now)
+    resumable.discard(session_id)
+    await notify_transfer(session, "expired", recipients=recipients, status=TransferStatus.expired.value)
+    return True, released
+
+
+async def _recipient_ids(db: AsyncSession, session: TransferSession) -> list[uuid.UUID]:
+    if session.recipient_count is None:
+        return []
+    stmt = select(TransferRecipient.user_id).where(TransferRecipient.transfer_session_id == session.id)
+    return list((await db.scalars(stmt)).all())
+
+
+class _Pacer:
+    """Spaces successive `wait` calls at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+class _RunLock:
+    """Lock file held for the duration of a run; stale once not refreshed for a while."""
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self._refreshed = 0.0
+
+    def acquire(self) -> bool:
+        if self.path is None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - self.path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if age < _LOCK_STALE_SECONDS:
+                    return False
+                self.path.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            self._refreshed = time.monotonic()
+            return True
+        return False
+
+    def refresh(self) -> None:
+        if self.path is None or time.monotonic() - self._refreshed < _LOCK_REFRESH_SECONDS:
+            return
+        self._refreshed = time.monotonic()
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def release(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+class LifecycleManager:
+    def __init__(
+        self,
+        *,
+        retention: dict[TransferStatus, timedelta],
+        interval: float,
+        orphan_grace: float,
+        staging_idle: float,
+        deletes_per_second: float,
+        lock_path: Path | None,
+    ) -> None:
+        self.retention = retention
+        self.interval = interval
+        self.orphan_grace = orphan_grace
+        self.staging_idle = staging_idle
+        self._pacer = _Pacer(deletes_per_second)
+        self._lock = _RunLock(lock_path)
+        self.runs = 0
+        self.failed_runs = 0
+        self.deleted = dict.fromkeys(_KINDS, 0)
+        self.reclaimed_bytes = dict.fromkeys(_KINDS, 0)
+
+    async def run_forever(self) -> None:
+        # Let startup finish before the first pass.
+        await asyncio.sleep(min(self.interval, 60))
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                self.failed_runs += 1
+                logger.exception("Storage lifecycle run failed.")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> dict[str, tuple[int, int]] | None:
+        """One pass. Returns `{kind: (deleted, bytes)}`, or None if another worker is running one."""
+        if not await asyncio.to_thread(self._lock.acquire):
+            return None
+        report = {kind: (0, 0) for kind in _KINDS}
+        started = time.perf_counter()
+        try:
+            await self._expire_sessions(report)
+            await self._sweep_staging(report)
+            await self._sweep_blobs(report)
+            await asyncio.to_thread(resumable.remove_stale_locks, self.orphan_grace)
+        finally:
+            await asyncio.to_thread(self._lock.release)
+        self.runs += 1
+        logger.info(
+            "Lifecycle run reclaimed %s bytes in %.1fs: %s expired sessions, %s staging dirs, %s blob files.",
+            sum(size for _, size in report.values()),
+            time.perf_counter() - started,
+            report["expired"][0],
+            report["staging"][0],
+            report["blob"][0],
+        )
+        return report
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "deleted": dict(self.deleted),
+            "reclaimed_bytes": dict(self.reclaimed_bytes),
+        }
+
+    async def _pace(self) -> None:
+        await self._pacer.wait()
+        self._lock.refresh()
+
+    def _count(self, report: dict[str, tuple[int, int]], kind: str, size: int) -> None:
+        deleted, reclaimed = report[kind]
+        report[kind] = (deleted + 1, reclaimed + size)
+        self.deleted[kind] += 1
+        self.reclaimed_bytes[kind] += size
+
+    async def _expire_sessions(self, report: dict[str, tuple[int, int]]) -> None:
+        now = datetime.now(timezone.utc)
+        for status, ttl in self.retention.items():
+            cutoff = now - ttl
+            while True:
+                async with AsyncSessionLocal() as db:
+                    ids = (
+                        await db.scalars(
+                            select(TransferSession.id)
+                            .where(TransferSession.status == status, TransferSession.updated_at < cutoff)
+                            .order_by(TransferSession.updated_at)
+                            .limit(_BATCH_SIZE)
+                        )
+                    ).all()
+                expired = 0
+                for session_id in ids:
+                    expired += await self._expire(session_id, status, cutoff, report)
+                # Sessions skipped (busy, changed meanwhile) would come back in the same batch.
+                if len(ids) < _BATCH_SIZE or not expired:
+                    break
+
+    async def _expire(
+        self, session_id: uuid.UUID, status: TransferStatus, cutoff: datetime, report: dict[str, tuple[int, int]]
+    ) -> bool:
+        await self._pace()
+        try:
+            with resumable.exclusive(session_id):
+                async with AsyncSessionLocal() as db:
+                    expired, released = await expire_session(db, session_id, status=status, updated_before=cutoff)
+                if not expired:
+                    return False
+                size = await asyncio.to_thread(_remove_session_content, str(session_id), released)
+        except resumable.UploadBusyError:
+            return False
+        self._count(report, "expired", size)
+        return True
+
+    async def _sweep_staging(self, report: dict[str, tuple[int, int]]) -> None:
+        entries = storage.iter_staging()
+        while batch := await asyncio.to_thread(_take, entries, _BATCH_SIZE):
+            candidates = [(_parse_session_id(name), path) for name, path in batch]
+            candidates = [(session_id, path) for session_id, path in candidates if session_id is not None]
+            if not candidates:
+                continue
+            async with AsyncSessionLocal() as db:
+                rows = {
+                    row.id: row
+                    for row in await db.execute(
+                        select(TransferSession.id, TransferSession.status, TransferSession.blob_sha256).where(
+                            TransferSession.id.in_({session_id for session_id, _ in candidates})
+                        )
+                    )
+                }
+            for session_id, path in candidates:
+                row = rows.get(session_id)
+                # Completed sessions without a blob predate the blob store: the
+                # directory holds their file.
+                orphaned = row is None or (
+                    row.status in _CLOSED_STATUSES or (row.status == TransferStatus.completed and row.blob_sha256)
+                )
+                if not orphaned and (row.status == TransferStatus.completed or not self.staging_idle):
+                    continue
+                idle = self.orphan_grace if orphaned else self.staging_idle
+                if await asyncio.to_thread(storage.staging_dir, str(session_id)) != path:
+                    continue  # a stray copy; removed once it is the one uploads would use
+                if time.time() - await asyncio.to_thread(_latest_mtime, path) < idle:
+                    continue
+                await self._pace()
+                try:
+                    with resumable.exclusive(session_id):
+                        if not orphaned and not await self._abandon(session_id, row.status, path):
+                            continue
+                        size = await asyncio.to_thread(_remove_session_content, str(session_id), None)
+                except resumable.UploadBusyError:
+                    continue
+                self._count(report, "staging", size)
+
+    async def _abandon(self, session_id: uuid.UUID, status: TransferStatus, path: Path) -> bool:
+        """Expire a session whose upload went idle; the caller holds its upload lock."""
+        # A chunk may have landed between the first look and taking the lock.
+        if time.time() - await asyncio.to_thread(_latest_mtime, path) < self.staging_idle:
+            return False
+        async with AsyncSessionLocal() as db:
+            expired, _ = await expire_session(db, session_id, status=status, updated_before=datetime.now(timezone.utc))
+        return expired
+
+    async def _sweep_blobs(self, report: dict[str, tuple[int, int]]) -> None:
+        objects = storage.iter_objects("blobs/")
+        while batch := await asyncio.to_thread(_take, objects, _BATCH_SIZE):
+            cutoff = time.time() - self.orphan_grace
+            orphans: list[StoredObject] = []
+            stored: dict[str, list[tuple[StoredObject, str | None]]] = {}
+            for obj in batch:
+                if obj.mtime > cutoff:
+                    continue
+                if obj.key.endswith(".tmp"):
+                    # Left by a move into the store that did not finish.
+                    orphans.append(obj)
+                    continue
+                parsed = _parse_blob_key(obj.key)
+                if parsed is not None:
+                    stored.setdefault(parsed[0], []).append((obj, parsed[1]))
+            if stored:
+                async with AsyncSessionLocal() as db:
+                    encodings = dict(
+                        (await db.execute(select(Blob.sha256, Blob.encoding).where(Blob.sha256.in_(stored)))).all()
+                    )
+                for sha256, entries in stored.items():
+                    orphans.extend(
+                        obj for obj, encoding in entries if sha256 not in encodings or encodings[sha256] != encoding
+                    )
+            for obj in orphans:
+                await self._pace()
+                await asyncio.to_thread(storage.delete, obj.key)
+                self._count(report, "blob", obj.size)
+
+
+def _take(iterator: Iterator[T], n: int) -> list[T]:
+    return list(islice(iterator, n))
+
+
+def _parse_session_id(name: str) -> uuid.UUID | None:
+    try:
+        session_id = uuid.UUID(name)
+    except ValueError:
+        return None
+    return session_id if str(session_id) == name else None
+
+
+def _parse_blob_key(key: str) -> tuple[str, str | None] | None:
+    """`(sha256, encoding)` of a blob file at its canonical key, else None."""
+    name = key.rsplit("/", 1)[-1]
+    encoding = None
+    for codec, suffix in storage_codec.SUFFIXES.items():
+        if name.endswith(suffix):
+            name, encoding = name[: -len(suffix)], codec
+            break
+    if not _SHA256_RE.match(name) or blob_store.blob_key(name, encoding) != key:
+        return None
+    return name, encoding
+
+
+def _remove_session_content(name: str, blob_key: str | None) -> int:
+    """Remove a session's staging directory and released blob; returns the bytes freed."""
+    size = 0
+    if blob_key is not None:
+        stored = storage.stat(blob_key)
+        storage.delete(blob_key)
+        size += stored.size if stored is not None else 0
+    size += _tree_size(storage.staging_dir(name))
+    storage.remove_staging(name)
+    return size
+
+
+def _tree_size(path: Path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def _latest_mtime(path: Path) -> float:
+    try:
+        latest = path.stat().st_mtime
+    except OSError:
+        return 0.0
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime)
+            except OSError:
+                pass
+    return latest
+
+
+lifecycle = LifecycleManager(
+    retention=parse_retention(settings.lifecycle_retention_days) if settings.lifecycle_enabled else {},
+    interval=settings.lifecycle_interval_seconds,
+    orphan_grace=settings.lifecycle_orphan_grace_seconds,
+    staging_idle=settings.lifecycle_staging_idle_seconds,
+    deletes_per_second=settings.lifecycle_deletes_per_second,
+    lock_path=_BACKEND_ROOT / settings.lifecycle_lock_file if settings.lifecycle_lock_file else None,
+)
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Minimal Prometheus text exposition without a client library.
+#
+# Every metric child keeps one slot array per thread that records into it, and only
+# that thread ever writes its slots, so recording is a plain `+=` with no lock and
+# no contention between the event loop and worker threads. A scrape sums the shards.
+# Values are per process; with several workers, scrape each one (or run one worker).
+
+_Labels = tuple[str, ...]
+# name, type, help, [(labels, value)]
+Family = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+IO_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+HASH_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _Shards:
+    def __init__(self, width: int) -> None:
+        self._width = width
+        self._by_thread: dict[int, list[float]] = {}
+
+    def local(self) -> list[float]:
+        ident = threading.get_ident()
+        shard = self._by_thread.get(ident)
+        if shard is None:
+            shard = self._by_thread.setdefault(ident, [0.0] * self._width)
+        return shard
+
+    def totals(self) -> list[float]:
+        totals = [0.0] * self._width
+        for shard in list(self._by_thread.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[_Labels, object] = {}
+
+    def labels(self, *values: str):  # type: ignore[no-untyped-def]
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def _label_dict(self, values: _Labels) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(self._label_dict(values), child))
+        return lines
+
+    def _render_child(self, labels: dict[str, str], child: object) -> list[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._shards.local()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _render_child(self, labels: dict[str, str], child: _CounterChild) -> list[str]:
+        return [_sample(self.name, labels, child.value())]
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount: float = 1) -> None:
+        self._shards.local()[0] -= amount
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Gauge(Counter):
+    """Up/down gauge; the value is the sum of every shard's increments and decrements."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._buckets = buckets
+        # One slot per bucket, one for +Inf, then sum and count.
+        self._shards = _Shards(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        shard = self._shards.local()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), *, buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_child(self, labels: dict[str, str], child: _HistogramChild) -> list[str]:
+        totals = child._shards.totals()
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip((*self.buckets, float("inf")), totals):
+            cumulative += count
+            lines.append(_sample(f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+        lines.append(_sample(f"{self.name}_sum", labels, totals[-2]))
+        lines.append(_sample(f"{self.name}_count", labels, totals[-1]))
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Add a callback that reads already-maintained in-memory state at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(_sample(name, labels, value) for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _sample(name: str, labels: dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return f"{name}{{{rendered}}} {_format_value(value)}"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(
+    Histogram("ulak_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"))
+)
+upload_bytes = registry.register(Counter("ulak_upload_bytes_total", "Request body bytes accepted into upload files."))
+download_bytes = registry.register(Counter("ulak_download_bytes_total", "File bytes streamed to downloaders."))
+disk_write_seconds = registry.register(
+    Histogram("ulak_upload_disk_write_seconds", "Time per upload chunk write on the I/O pool.", buckets=IO_BUCKETS)
+)
+disk_read_seconds = registry.register(
+    Histogram("ulak_download_disk_read_seconds", "Time per download chunk read.", buckets=IO_BUCKETS)
+)
+storage_bytes = registry.register(
+    Counter("ulak_storage_compressed_bytes_total", "Bytes of compressed blobs before and after compression.", ("kind",))
+)
+transfers_in_progress = registry.register(
+    Gauge("ulak_transfers_in_progress", "Uploads and downloads currently streaming.", ("direction", "status"))
+)
+upload_verification_failures = registry.register(
+    Counter("ulak_upload_verification_failures_total", "Completed uploads rejected by verification.", ("reason",))
+)
+for _reason in ("size", "checksum"):
+    upload_verification_failures.labels(_reason)
+password_hash_seconds = registry.register(
+    Histogram(
+        "ulak_password_hash_seconds",
+        "Wall time of password hashing jobs, queueing included.",
+        buckets=HASH_BUCKETS,
+    )
+)
+event_loop_lag = registry.register(
+    Histogram("ulak_event_loop_lag_seconds", "How late the event loop woke a periodic timer.", buckets=LAG_BUCKETS)
+)
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, loop.time() - started - interval))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request by method, route template and status."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            http_request_duration.labels(scope["method"], route, str(status_code)).observe(time.perf_counter() - started)
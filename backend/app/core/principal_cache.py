@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+import uuid
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.db.models import User
+
+
+# Bearer token -> authenticated principal, so hot polling paths skip both
+# jwt.decode and the users lookup. Entries live for at most PRINCIPAL_CACHE_TTL
+# seconds and never past the token's own expiry. Invalidation is per process; the
+# TTL bounds how long another worker can serve a stale principal.
+
+
+@dataclass
+class _Entry:
+    user: User
+    session_id: uuid.UUID | None
+    expires_at: float
+
+
+class PrincipalCache:
+    def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, token: str) -> User | None:
+        """Return a detached snapshot of the user; merge it into a Session with load=False."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry.user
+
+    def put(self, token: str, user: User, *, session_id: uuid.UUID | None, token_exp: float | None, generation: int) -> None:
+        """Cache a principal loaded while the cache was at `generation`.
+
+        If anything was invalidated since, the load may predate the change and is dropped.
+        """
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+        snapshot = _snapshot(user)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[token] = _Entry(user=snapshot, session_id=session_id, expires_at=expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """Drop every cached token of a user (password changed, account locked, ...)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for token in [t for t, e in self._entries.items() if e.user.id == user_id]:
+                del self._entries[token]
+
+    def invalidate_session(self, session_id: uuid.UUID) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for token in [t for t, e in self._entries.items() if e.session_id == session_id]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _snapshot(user: User) -> User:
+    # A detached copy with the same identity: Session.merge(..., load=False) can attach
+    # it to a request's session without emitting SQL, and the original stays untouched.
+    mapper = inspect(User)
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    max_entries=settings.principal_cache_max_entries,
+)
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import math
+import threading
+import time
+from typing import Protocol
+import zlib
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Pre-authentication throttling. Login and password-reset attempts are charged
+# against token buckets keyed by client IP and by normalized e-mail before the
+# route touches the database or bcrypt, so a credential-stuffing run is turned
+# away for the cost of a dict lookup.
+#
+# Buckets are per process by default. With several workers, set
+# RATE_LIMIT_BACKEND=redis so every worker draws from the same buckets.
+
+
+class RateLimitBackend(Protocol):
+    async def acquire(self, key: str, *, capacity: float, refill_per_second: float) -> float:
+        """Take one token from `key`'s bucket: 0 when granted, otherwise the
+        seconds until a token becomes available."""
+        ...
+
+    async def close(self) -> None: ...
+
+
+@dataclass
+class _Bucket:
+    tokens: float
+    updated: float
+
+
+class _Shard:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.buckets: dict[str, _Bucket] = {}
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets in this process, spread over independently locked shards.
+
+    Each shard keeps its buckets in least-recently-used order. A shard that grows
+    past `max_keys_per_shard` drops its least recently used bucket, which after
+    enough idle time is simply a full bucket again.
+    """
+
+    def __init__(self, *, shards: int = 16, max_keys_per_shard: int = 10000) -> None:
+        self._shards = [_Shard() for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+
+    async def acquire(self, key: str, *, capacity: float, refill_per_second: float) -> float:
+        shard = self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+        now = time.monotonic()
+        with shard.lock:
+            bucket = shard.buckets.pop(key, None)
+            if bucket is None:
+                if len(shard.buckets) >= self.max_keys_per_shard:
+                    del shard.buckets[next(iter(shard.buckets))]
+                bucket = _Bucket(tokens=capacity, updated=now)
+            else:
+                bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * refill_per_second)
+                bucket.updated = now
+            shard.buckets[key] = bucket
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / refill_per_second
+
+    async def close(self) -> None:
+        return None
+
+
+# KEYS[1] bucket key; ARGV capacity, refill per second. Redis' clock keeps every
+# worker on the same time base.
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Shared token buckets in Redis, updated atomically by a Lua script.
+
+    Requires the optional `redis` package (`pip install redis`).
+    """
+
+    def __init__(self, url: str, *, prefix: str = "ulak:ratelimit:") -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package.") from exc
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, *, capacity: float, refill_per_second: float) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[capacity, refill_per_second])
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def _create_backend() -> RateLimitBackend:
+    if settings.rate_limit_backend == "redis":
+        if not settings.rate_limit_redis_url:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires RATE_LIMIT_REDIS_URL.")
+        return RedisRateLimitBackend(settings.rate_limit_redis_url)
+    return InMemoryRateLimitBackend()
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    per_minute: int
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+        self.rejected: dict[str, int] = {}
+        self.backend_errors = 0
+
+    async def check(self, rule: Rule, key: str) -> None:
+        """Charge one attempt to `rule` for `key`; raise 429 when the bucket is empty.
+
+        The bucket holds `per_minute` attempts and refills at that rate, so short
+        bursts are fine while sustained guessing is capped.
+        """
+        if not rule.enabled or not settings.rate_limit_enabled:
+            return
+        try:
+            wait = await self.backend.acquire(
+                f"{rule.name}:{key}", capacity=rule.per_minute, refill_per_second=rule.per_minute / 60
+            )
+        except Exception:
+            # A shared backend outage must not lock everyone out; the account
+            # lockout still applies.
+            self.backend_errors += 1
+            logger.exception("Rate limit backend failed; allowing request.")
+            return
+        if wait > 0:
+            self.rejected[rule.name] = self.rejected.get(rule.name, 0) + 1
+            raise HTTPException(
+                status_code=429,
+                detail="Çok fazla deneme. Lütfen daha sonra tekrar deneyin.",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+    async def check_attempt(self, request: Request, ip_rule: Rule, email_rule: Rule, email: str) -> None:
+        """Throttle an unauthenticated attempt by client IP and by target e-mail."""
+        client_ip = request.client.host if request.client else "unknown"
+        await self.check(ip_rule, client_ip)
+        await self.check(email_rule, normalize_email(email))
+
+    def stats(self) -> dict[str, int]:
+        return {**self.rejected, "backend_errors": self.backend_errors}
+
+
+def normalize_email(email: str) -> str:
+    return str(email).strip().lower()
+
+
+LOGIN_BY_IP = Rule("login:ip", settings.login_attempts_per_minute_per_ip)
+LOGIN_BY_EMAIL = Rule("login:email", settings.login_attempts_per_minute_per_email)
+PASSWORD_RESET_BY_IP = Rule("password_reset:ip", settings.password_reset_attempts_per_minute_per_ip)
+PASSWORD_RESET_BY_EMAIL = Rule("password_reset:email", settings.password_reset_attempts_per_minute_per_email)
+
+rate_limiter = RateLimiter(_create_backend())
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import hashlib
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Iterator
+import uuid
+
+from app.core.storage import storage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+# The running SHA-256 state of a resumable upload lives in process memory; the
+# `.part` file on disk is the source of truth for the offset. If the two drift
+# apart (worker restart, another worker took the previous chunk) the part file
+# is re-hashed once and the state is rebuilt from it.
+#
+# Only one request at a time may write a part file, across all workers: an
+# in-process set turns away concurrent requests of this worker cheaply, and an
+# OS lock on a per-upload lock file (storage.lock_path) those of other workers.
+
+_HASH_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class UploadState:
+    offset: int = 0
+    hasher: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+    # Modification time of the part file when the state was saved; a different
+    # one means another worker wrote to it meanwhile.
+    mtime_ns: int = 0
+
+
+class UploadBusyError(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_states: dict[uuid.UUID, UploadState] = {}
+_busy: set[str] = set()
+
+
+@contextmanager
+def exclusive(transfer_id: uuid.UUID, part_number: int | None = None) -> Iterator[None]:
+    """Allow only one writer per part file at a time (the upload's, or one multipart part's)."""
+    name = str(transfer_id) if part_number is None else f"{transfer_id}.{part_number}"
+    with _lock:
+        if name in _busy:
+            raise UploadBusyError(name)
+        _busy.add(name)
+    try:
+        path = storage.lock_path(name)
+        fd = _lock_file(path)
+        if fd is None:
+            raise UploadBusyError(name)
+        try:
+            yield
+        finally:
+            _unlock_file(path, fd)
+    finally:
+        with _lock:
+            _busy.discard(name)
+
+
+def _lock_file(path: Path) -> int | None:
+    """Open `path` and lock it without waiting; None if another process holds it."""
+    while True:
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            continue
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return None
+        # The previous holder unlinks the file on release; if that happened between
+        # our open and lock, we hold a lock nobody else will see. Start over.
+        try:
+            if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def _unlock_file(path: Path, fd: int) -> None:
+    # Unlinked while still locked, so a waiter that opened it notices (see _lock_file).
+    try:
+        path.unlink()
+    except OSError:
+        pass  # Windows: still open in another process, which reuses it
+    if fcntl is None:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)
+
+
+def remove_stale_locks(older_than: float) -> int:
+    """Remove lock files a process left behind when it died holding them; returns how many.
+
+    A lock file normally disappears on release. One that has existed for longer
+    than `older_than` seconds and can be locked right away has no holder.
+    """
+    # Every lock file lives in the same directory.
+    directory = storage.lock_path("_").parent
+    cutoff = time.time() - older_than
+    removed = 0
+    for path in directory.glob("*.lock") if directory.is_dir() else ():
+        try:
+            if path.stat().st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        fd = _lock_file(path)
+        if fd is not None:
+            _unlock_file(path, fd)
+            removed += 1
+    return removed
+
+
+def load(transfer_id: uuid.UUID, part_path: Path) -> UploadState:
+    try:
+        st = part_path.stat()
+        on_disk, mtime_ns = st.st_size, st.st_mtime_ns
+    except FileNotFoundError:
+        on_disk, mtime_ns = 0, 0
+    with _lock:
+        state = _states.get(transfer_id)
+    if state is not None and state.offset == on_disk and state.mtime_ns == mtime_ns:
+        return state
+
+    state = UploadState()
+    if on_disk:
+        with part_path.open("rb") as f:
+            while chunk := f.read(_HASH_READ_SIZE):
+                state.hasher.update(chunk)
+                state.offset += len(chunk)
+    save(transfer_id, state, part_path)
+    return state
+
+
+def save(transfer_id: uuid.UUID, state: UploadState, part_path: Path | None = None) -> None:
+    if part_path is not None:
+        try:
+            state.mtime_ns = part_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            state.mtime_ns = 0
+    with _lock:
+        _states[transfer_id] = state
+
+
+def discard(transfer_id: uuid.UUID) -> None:
+    with _lock:
+        _states.pop(transfer_id, None)
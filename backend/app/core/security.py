@@ -1,25 +1,72 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
+import os
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.hash_executor import HashExecutor
 
 
-_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default rounds: any stored hash with a different cost is flagged by
+# verify_and_update and transparently rehashed on the next successful login.
+_pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
+hash_executor = HashExecutor(
+    workers=settings.bcrypt_workers or os.cpu_count() or 1,
+    queue_size=settings.bcrypt_queue_size,
+    kind=settings.bcrypt_executor,
+)
 
-def hash_secret(secret: str) -> str:
+
+def _hash(secret: str) -> str:
     return _pwd_context.hash(secret)
 
 
-def verify_secret(plain: str, hashed: str) -> bool:
+def _verify(plain: str, hashed: str) -> bool:
     return _pwd_context.verify(plain, hashed)
 
 
-def create_access_token(subject: str, *, expires_minutes: int | None = None) -> tuple[str, datetime]:
+def _verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return _pwd_context.verify_and_update(plain, hashed)
+
+
+def hash_secret(secret: str) -> str:
+    return hash_executor.run(_hash, secret)
+
+
+def verify_secret(plain: str, hashed: str) -> bool:
+    return hash_executor.run(_verify, plain, hashed)
+
+
+def verify_and_update_secret(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify, and return a replacement hash when the stored one uses outdated parameters."""
+    return hash_executor.run(_verify_and_update, plain, hashed)
+
+
+async def hash_secret_async(secret: str) -> str:
+    return await hash_executor.run_async(_hash, secret)
+
+
+async def verify_secret_async(plain: str, hashed: str) -> bool:
+    return await hash_executor.run_async(_verify, plain, hashed)
+
+
+async def verify_and_update_secret_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await hash_executor.run_async(_verify_and_update, plain, hashed)
+
+
+def create_access_token(
+    subject: str, *, session_id: str | None = None, expires_minutes: int | None = None
+) -> tuple[str, datetime]:
     now = datetime.now(timezone.utc)
     expire = now + timedelta(minutes=expires_minutes or settings.access_token_expire_minutes)
     payload = {
@@ -27,5 +74,7 @@ def create_access_token(subject: str, *, expires_minutes: int | None = None) ->
         "iat": int(now.timestamp()),
         "exp": int(expire.timestamp()),
     }
+    if session_id:
+        payload["sid"] = session_id
     token = jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return token, expire
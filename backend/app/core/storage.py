@@ -0,0 +1,455 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import io
+import logging
+import os
+from pathlib import Path
+import random
+import shutil
+import threading
+from typing import BinaryIO, Iterator, Protocol
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Where transfer content lives. Keys are relative, "/"-separated names such as
+# `blobs/ab/cd/<sha256>`; the backend decides which disk or bucket holds them.
+#
+# Uploads are always written to a local staging directory first (resumable part
+# files need random access). `store` then hands the finished file to the backend:
+# a rename when it is staged on the volume that keeps it, an upload for S3.
+
+_BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+
+def shard(name: str) -> str:
+    """`<n0n1>/<n2n3>/<name>`: two levels of 256 directories for hex-like names."""
+    name = name.lower()
+    return f"{name[:2]}/{name[2:4]}/{name}"
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    mtime: float
+    # Set when the object is a plain local file that can be served directly.
+    local_path: Path | None = None
+
+
+class StorageBackend(Protocol):
+    def staging_dir(self, name: str, *, create: bool = False) -> Path:
+        """Local directory for the in-progress upload `name`; created on first use."""
+        ...
+
+    def remove_staging(self, name: str) -> None: ...
+
+    def lock_path(self, name: str) -> Path:
+        """Local lock file that guards the staging of `name` across worker processes."""
+        ...
+
+    def store(self, key: str, source: Path) -> None:
+        """Take ownership of the local file `source` as `key`."""
+        ...
+
+    def stat(self, key: str) -> StoredObject | None: ...
+
+    def open(self, key: str) -> BinaryIO:
+        """Readable binary stream of `key`; forward seeks are cheap."""
+        ...
+
+    def rename(self, key: str, new_key: str) -> bool:
+        """Move `key` to `new_key` (same volume / bucket). False if `key` does not exist."""
+        ...
+
+    def delete(self, key: str) -> None: ...
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        """Every object whose key starts with `prefix`, in no particular order."""
+        ...
+
+    def iter_staging(self) -> Iterator[tuple[str, Path]]:
+        """`(name, directory)` of every staging directory on local disk."""
+        ...
+
+    def status(self) -> list[dict]: ...
+
+
+@dataclass(frozen=True)
+class Volume:
+    root: Path
+    weight: float = 1.0
+
+    def free_bytes(self) -> int:
+        try:
+            return shutil.disk_usage(self.root).free
+        except OSError:
+            return 0
+
+
+def parse_volumes(value: str | None) -> list[Volume]:
+    """`path[@weight],path[@weight],...`; relative paths are taken from backend/."""
+    volumes = []
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, _, weight = entry.rpartition("@") if "@" in entry else (entry, "", "")
+        volumes.append(Volume(root=_BACKEND_ROOT / path.strip(), weight=float(weight) if weight else 1.0))
+    return volumes or [Volume(root=_BACKEND_ROOT / "storage")]
+
+
+class _StagingDirs:
+    """Resolved staging directories, so hot paths do not re-probe every volume."""
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._dirs: dict[str, Path] = {}
+        self.max_entries = max_entries
+
+    def get(self, name: str) -> Path | None:
+        return self._dirs.get(name)
+
+    def put(self, name: str, path: Path) -> None:
+        with self._lock:
+            if len(self._dirs) >= self.max_entries:
+                self._dirs.clear()
+            self._dirs[name] = path
+
+    def discard(self, name: str) -> None:
+        with self._lock:
+            self._dirs.pop(name, None)
+
+
+class LocalVolumesBackend:
+    """Objects spread over one or more local volumes (disks or mount points).
+
+    A new upload is staged on a volume picked at random with probability
+    proportional to `free space x weight`, skipping volumes below
+    STORAGE_MIN_FREE_BYTES, and its blob stays on that volume. Reads probe the
+    volumes in order, so volumes can be added at any time.
+    """
+
+    def __init__(self, volumes: list[Volume], *, min_free_bytes: int = 0) -> None:
+        self.volumes = volumes
+        self.min_free_bytes = min_free_bytes
+        self._staging = _StagingDirs()
+        for volume in volumes:
+            try:
+                volume.root.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                # Unmounted disk: it reports no free space and takes no new uploads.
+                logger.warning("Storage volume %s is not available.", volume.root)
+
+    def choose_volume(self) -> Volume:
+        candidates = [(v, v.free_bytes()) for v in self.volumes]
+        usable = [(v, free) for v, free in candidates if free > self.min_free_bytes and v.weight > 0]
+        if not usable:
+            # Every volume is at its reserve: fall back to the one with the most room.
+            return max(candidates, key=lambda c: c[1])[0]
+        volumes, weights = zip(*((v, free * v.weight) for v, free in usable))
+        return random.choices(volumes, weights=weights)[0]
+
+    def staging_dir(self, name: str, *, create: bool = False) -> Path:
+        path = self._staging.get(name)
+        if path is not None and not create and not path.is_dir():
+            # The cache is per process: another worker, the lifecycle sweep or a
+            # deleted session may have removed the directory since.
+            self._staging.discard(name)
+            path = None
+        if path is None:
+            candidates = [v.root / "uploads" / shard(name) for v in self.volumes]
+            # Before sharding, uploads were staged directly under the first volume.
+            candidates.append(self.volumes[0].root / name)
+            path = next((p for p in candidates if p.is_dir()), None)
+            if path is None:
+                if not create:
+                    return candidates[0]
+                path = self.choose_volume().root / "uploads" / shard(name)
+        if create:
+            # Also for a directory found above: it can be removed concurrently.
+            path.mkdir(parents=True, exist_ok=True)
+        self._staging.put(name, path)
+        return path
+
+    def remove_staging(self, name: str) -> None:
+        path = self.staging_dir(name)
+        self._staging.discard(name)
+        shutil.rmtree(path, ignore_errors=True)
+        volume = self._volume_of(path)
+        if volume is not None:
+            _remove_empty_parents(path, stop=volume.root / "uploads")
+
+    def lock_path(self, name: str) -> Path:
+        # Fixed to the first volume: the staging directory's volume is only known once created.
+        return self.volumes[0].root / "locks" / f"{name}.lock"
+
+    def store(self, key: str, source: Path) -> None:
+        source_volume = self._volume_of(source)
+        volume = source_volume or self.choose_volume()
+        target = volume.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if source_volume is not None:
+            source.replace(target)
+        else:
+            staging = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            shutil.move(source, staging)
+            staging.replace(target)
+
+    def stat(self, key: str) -> StoredObject | None:
+        path = self._find(key)
+        if path is None:
+            return None
+        st = path.stat()
+        return StoredObject(key=key, size=st.st_size, mtime=st.st_mtime, local_path=path)
+
+    def open(self, key: str) -> BinaryIO:
+        path = self._find(key)
+        if path is None:
+            raise FileNotFoundError(key)
+        return path.open("rb")
+
+    def rename(self, key: str, new_key: str) -> bool:
+        path = self._find(key)
+        if path is None:
+            return False
+        volume = self._volume_of(path)
+        try:
+            path.replace(volume.root / new_key)
+        except FileNotFoundError:
+            return False  # removed meanwhile
+        return True
+
+    def delete(self, key: str) -> None:
+        for volume in self.volumes:
+            path = volume.root / key
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            _remove_empty_parents(path, stop=volume.root / key.split("/", 1)[0])
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        for volume in self.volumes:
+            for path in (volume.root / prefix).rglob("*"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue  # removed meanwhile
+                if path.is_file():
+                    key = path.relative_to(volume.root).as_posix()
+                    yield StoredObject(key=key, size=st.st_size, mtime=st.st_mtime, local_path=path)
+
+    def iter_staging(self) -> Iterator[tuple[str, Path]]:
+        for volume in self.volumes:
+            for path in (volume.root / "uploads").glob("*/*/*"):
+                if path.is_dir():
+                    yield path.name, path
+        # Legacy layout: per-session directories directly under the first volume.
+        root = self.volumes[0].root
+        if root.is_dir():
+            for path in root.iterdir():
+                if path.is_dir() and path.name not in {"uploads", "blobs", "locks"}:
+                    yield path.name, path
+
+    def status(self) -> list[dict]:
+        return [
+            {"volume": str(v.root), "weight": v.weight, "free_bytes": v.free_bytes()} for v in self.volumes
+        ]
+
+    def _find(self, key: str) -> Path | None:
+        for volume in self.volumes:
+            path = volume.root / key
+            if path.is_file():
+                return path
+        return None
+
+    def _volume_of(self, path: Path) -> Volume | None:
+        for volume in self.volumes:
+            if path.is_relative_to(volume.root):
+                return volume
+        return None
+
+
+class _S3ObjectReader(io.RawIOBase):
+    """Seekable reader over one S3 object; each seek starts a ranged GET."""
+
+    def __init__(self, client, bucket: str, key: str, size: int) -> None:  # noqa: ANN001
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._size = size
+        self._position = 0
+        self._body = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        if offset != self._position:
+            self._close_body()
+            self._position = offset
+        return self._position
+
+    def readinto(self, buffer) -> int:  # noqa: ANN001
+        if self._position >= self._size:
+            return 0
+        if self._body is None:
+            response = self._client.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={self._position}-")
+            self._body = response["Body"]
+        data = self._body.read(len(buffer))
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._close_body()
+        super().close()
+
+    def _close_body(self) -> None:
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+
+class S3Backend:
+    """Objects in an S3-compatible bucket (AWS S3, MinIO, Ceph RGW, ...).
+
+    Requires the optional `boto3` package. Uploads are staged on local disk under
+    STORAGE_STAGING_DIR and sent with a managed (multipart) upload once verified.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket: str,
+        prefix: str = "",
+        staging_root: Path,
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+    ) -> None:
+        try:
+            import boto3
+        except ImportError as exc:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package.") from exc
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.staging_root = staging_root
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+        self._missing = self._client.exceptions.ClientError
+
+    def staging_dir(self, name: str, *, create: bool = False) -> Path:
+        path = self.staging_root / "uploads" / shard(name)
+        if create:
+            path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def remove_staging(self, name: str) -> None:
+        path = self.staging_dir(name)
+        shutil.rmtree(path, ignore_errors=True)
+        _remove_empty_parents(path, stop=self.staging_root / "uploads")
+
+    def lock_path(self, name: str) -> Path:
+        return self.staging_root / "locks" / f"{name}.lock"
+
+    def store(self, key: str, source: Path) -> None:
+        self._client.upload_file(str(source), self.bucket, self.prefix + key)
+        source.unlink()
+
+    def stat(self, key: str) -> StoredObject | None:
+        try:
+            head = self._client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self._missing as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+        return StoredObject(key=key, size=head["ContentLength"], mtime=head["LastModified"].timestamp())
+
+    def open(self, key: str) -> BinaryIO:
+        stored = self.stat(key)
+        if stored is None:
+            raise FileNotFoundError(key)
+        reader = _S3ObjectReader(self._client, self.bucket, self.prefix + key, stored.size)
+        return io.BufferedReader(reader, buffer_size=1024 * 1024)  # type: ignore[return-value]
+
+    def rename(self, key: str, new_key: str) -> bool:
+        # S3 has no rename: a server-side (multipart for large objects) copy, then delete.
+        try:
+            self._client.copy({"Bucket": self.bucket, "Key": self.prefix + key}, self.bucket, self.prefix + new_key)
+        except self._missing as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return False
+            raise
+        self.delete(key)
+        return True
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    key=item["Key"][len(self.prefix) :], size=item["Size"], mtime=item["LastModified"].timestamp()
+                )
+
+    def iter_staging(self) -> Iterator[tuple[str, Path]]:
+        for path in (self.staging_root / "uploads").glob("*/*/*"):
+            if path.is_dir():
+                yield path.name, path
+
+    def status(self) -> list[dict]:
+        return [{"bucket": self.bucket, "prefix": self.prefix}]
+
+
+def _remove_empty_parents(path: Path, *, stop: Path) -> None:
+    """Remove now-empty shard directories between `path` and `stop` (exclusive)."""
+    for parent in path.parents:
+        if parent == stop or not parent.is_relative_to(stop):
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+
+
+def _create_backend() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        if not settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET.")
+        return S3Backend(
+            bucket=settings.s3_bucket,
+            prefix=settings.s3_prefix or "",
+            staging_root=_BACKEND_ROOT / (settings.storage_staging_dir or "storage"),
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+        )
+    return LocalVolumesBackend(parse_volumes(settings.storage_volumes), min_free_bytes=settings.storage_min_free_bytes)
+
+
+storage = _create_backend()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+import shutil
+from typing import BinaryIO
+import zlib
+
+from app.core.config import settings
+from app.core.metrics import storage_bytes
+
+
+# Optional compression of stored blobs. Content is compressed once, when a
+# verified upload enters the blob store; downloads either send the stored bytes
+# with `Content-Encoding` or decode them on the fly. gzip is always available;
+# zstd needs the optional `zstandard` package.
+
+ENCODINGS = ("gzip", "zstd")
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Already-compressed formats, by extension (what the app sends as file_type) or MIME type.
+_INCOMPRESSIBLE_EXTENSIONS = {
+    "7z", "aac", "apk", "avi", "avif", "br", "bz2", "cab", "docx", "flac", "gif", "gz", "heic", "jar",
+    "jpeg", "jpg", "lz4", "lzma", "m4a", "m4v", "mkv", "mov", "mp3", "mp4", "mpeg", "mpg", "odp", "ods",
+    "odt", "ogg", "opus", "png", "pptx", "rar", "tgz", "txz", "webm", "webp", "wmv", "xlsx", "xz", "zip",
+    "zst",
+}
+_INCOMPRESSIBLE_MIME_PREFIXES = ("image/", "video/", "audio/")
+_INCOMPRESSIBLE_MIME_TYPES = {
+    "application/gzip",
+    "application/vnd.rar",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-rar-compressed",
+    "application/x-xz",
+    "application/zip",
+    "application/zstd",
+}
+
+# Skip compression when a fast trial on the first chunk saves less than this.
+_SAMPLE_SIZE = 256 * 1024
+_MIN_SAMPLE_SAVING = 0.10
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _zstandard():  # type: ignore[no-untyped-def]
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("STORAGE_COMPRESSION=zstd requires the 'zstandard' package.") from exc
+    return zstandard
+
+
+def configured_encoding() -> str | None:
+    encoding = (settings.storage_compression or "").strip().lower()
+    if encoding in ("", "none"):
+        return None
+    if encoding not in ENCODINGS:
+        raise RuntimeError(f"Unsupported STORAGE_COMPRESSION: {settings.storage_compression}")
+    if encoding == "zstd":
+        _zstandard()
+    return encoding
+
+
+def likely_incompressible(file_type: str | None, file_name: str | None = None) -> bool:
+    for value in (file_type, Path(file_name).suffix if file_name else None):
+        value = (value or "").strip().lower()
+        if not value:
+            continue
+        if "/" in value:
+            mime = value.split(";", 1)[0].strip()
+            if mime.startswith(_INCOMPRESSIBLE_MIME_PREFIXES) or mime in _INCOMPRESSIBLE_MIME_TYPES:
+                return True
+        elif value.lstrip(".") in _INCOMPRESSIBLE_EXTENSIONS:
+            return True
+    return False
+
+
+def range_decodable(size: int) -> bool:
+    """Whether range requests on a compressed blob of `size` original bytes are served.
+
+    Decoding always starts at the first byte, so a range costs as much CPU as
+    everything before its end; past STORAGE_COMPRESSION_MAX_BYTES that is not
+    bounded any more and the whole file is sent instead.
+    """
+    limit = settings.storage_compression_max_bytes
+    return limit <= 0 or size <= limit
+
+
+def choose_encoding(path: Path, file_type: str | None, file_name: str | None = None) -> str | None:
+    """The encoding to store `path` with, or None to store it as-is."""
+    encoding = configured_encoding()
+    if encoding is None or likely_incompressible(file_type, file_name):
+        return None
+    size = path.stat().st_size
+    if size < settings.storage_compression_min_bytes or not range_decodable(size):
+        return None
+    with path.open("rb") as f:
+        sample = f.read(_SAMPLE_SIZE)
+    if len(zlib.compress(sample, 1)) > len(sample) * (1 - _MIN_SAMPLE_SAVING):
+        return None
+    return encoding
+
+
+def compress_file(source: Path, target: Path, encoding: str) -> int:
+    """Write `source` compressed to `target`; returns the stored size."""
+    level = settings.storage_compression_level
+    with source.open("rb") as src, target.open("wb") as dst:
+        if encoding == "gzip":
+            # mtime=0 keeps the output a pure function of the content.
+            with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=level or 6, mtime=0) as out:
+                shutil.copyfileobj(src, out, _COPY_CHUNK_SIZE)
+        else:
+            zstandard = _zstandard()
+            compressor = zstandard.ZstdCompressor(level=level or 3, write_checksum=True)
+            compressor.copy_stream(src, dst, size=source.stat().st_size, write_size=_COPY_CHUNK_SIZE)
+    stored = target.stat().st_size
+    storage_bytes.labels("original").inc(source.stat().st_size)
+    storage_bytes.labels("stored").inc(stored)
+    return stored
+
+
+class _GzipReader(gzip.GzipFile):
+    """GzipFile that also closes the stream it decodes."""
+
+    def close(self) -> None:
+        raw = self.fileobj
+        try:
+            super().close()
+        finally:
+            if raw is not None:
+                raw.close()
+
+
+def open_decoded(raw: BinaryIO, encoding: str | None) -> BinaryIO:
+    """Wrap a stored blob's stream so it reads the original bytes; closing closes `raw`.
+
+    Forward seeks are supported (by decoding and discarding).
+    """
+    if encoding is None:
+        return raw
+    if encoding == "gzip":
+        return _GzipReader(fileobj=raw, mode="rb")  # type: ignore[return-value]
+    return _zstandard().ZstdDecompressor().stream_reader(raw, closefd=True)
+
+
+def accepts(accept_encoding: str | None, encoding: str) -> bool:
+    """Whether an `Accept-Encoding` header allows `encoding` (q-values honoured)."""
+    if not accept_encoding:
+        return False
+    wildcard: bool | None = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == encoding or (encoding == "gzip" and name == "x-gzip"):
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from app.core.config import settings
+from app.core.metrics import disk_write_seconds, upload_bytes
+
+
+# Shared, bounded pool for upload disk writes and hash updates. Both release the GIL
+# for large buffers, so a handful of threads keeps many uploads moving without ever
+# touching the event loop or the AnyIO pool used by sync endpoints.
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=settings.upload_io_workers, thread_name_prefix="ulak-upload-io")
+
+
+async def run_io(fn: Callable, *args: object) -> object:
+    """Run a long blocking file operation on the upload I/O pool instead of the AnyIO pool."""
+    return await asyncio.get_running_loop().run_in_executor(_IO_EXECUTOR, fn, *args)
+
+
+class UploadPipeline:
+    """Write chunks to a file and hash them on worker threads.
+
+    Writes and hash updates each run in order on their own lane, so hashing chunk N
+    overlaps writing chunk N-1. At most `depth` chunks are in flight; `feed` waits
+    when the pipeline is full, which applies back-pressure to the request body.
+    """
+
+    def __init__(self, file: BinaryIO, hasher: "hashlib._Hash", *, depth: int | None = None) -> None:
+        self._file = file
+        self._hasher = hasher
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(depth or settings.upload_pipeline_depth)
+        self._write_tail: asyncio.Task | None = None
+        self._hash_tail: asyncio.Task | None = None
+        self._error: BaseException | None = None
+        self._releasers: set[asyncio.Task] = set()
+        self.size = 0
+
+    @classmethod
+    async def open(cls, path: Path, mode: str, hasher: "hashlib._Hash") -> UploadPipeline:
+        file = await asyncio.get_running_loop().run_in_executor(_IO_EXECUTOR, path.open, mode)
+        return cls(file, hasher)
+
+    @property
+    def hasher(self) -> "hashlib._Hash":
+        return self._hasher
+
+    async def feed(self, chunk: bytes) -> None:
+        self._raise_if_failed()
+        await self._slots.acquire()
+        self._write_tail = self._loop.create_task(self._after(self._write_tail, self._write, chunk))
+        self._hash_tail = self._loop.create_task(self._after(self._hash_tail, self._hasher.update, chunk))
+        releaser = self._loop.create_task(self._release_when_done(self._write_tail, self._hash_tail))
+        self._releasers.add(releaser)
+        releaser.add_done_callback(self._releasers.discard)
+        self.size += len(chunk)
+        upload_bytes.inc(len(chunk))
+
+    async def drain(self) -> None:
+        """Wait for every queued write and hash update; re-raise the first failure."""
+        tails = [t for t in (self._write_tail, self._hash_tail) if t is not None]
+        if tails:
+            await asyncio.wait(tails)
+        # A failure anywhere in a lane propagates down the chain to its tail.
+        for task in tails:
+            if task.exception() is not None:
+                raise task.exception()
+        self._raise_if_failed()
+
+    async def close(self) -> None:
+        try:
+            await self.drain()
+        finally:
+            await self._run(self._file.close)
+
+    async def abort(self, truncate_to: int | None = None) -> None:
+        """Stop the pipeline, optionally truncating the file back to a known-good offset."""
+        tails = [t for t in (self._write_tail, self._hash_tail) if t is not None]
+        if tails:
+            await asyncio.wait(tails)
+        try:
+            if truncate_to is not None:
+                await self._run(self._file.flush)
+                await self._run(self._file.truncate, truncate_to)
+        finally:
+            await self._run(self._file.close)
+
+    async def _after(self, previous: asyncio.Task | None, fn: Callable[[bytes], object], chunk: bytes) -> None:
+        if previous is not None:
+            await previous
+        await self._run(fn, chunk)
+
+    def _write(self, chunk: bytes) -> None:
+        with disk_write_seconds.labels().time():
+            self._file.write(chunk)
+
+    async def _release_when_done(self, *tasks: asyncio.Task) -> None:
+        await asyncio.wait(tasks)
+        for task in tasks:
+            if not task.cancelled() and task.exception() is not None and self._error is None:
+                self._error = task.exception()
+        self._slots.release()
+
+    async def _run(self, fn: Callable, *args: object) -> object:
+        return await self._loop.run_in_executor(_IO_EXECUTOR, fn, *args)
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from pathlib import Path
 import re
 
 from sqlalchemy import create_engine, text
@@ -15,7 +16,7 @@ _DB_NAME_RE = re.compile(r"^[A-Za-z0-9_\-]+$")
 def init_db() -> None:
     """Ensure database exists and create tables.
 
-    - Creates DB if missing (SQL Server).
+    - Creates DB if missing (SQL Server), or the directory of the database file (SQLite).
     - Creates tables via SQLAlchemy metadata.
 
     Notes:
@@ -25,8 +26,11 @@ def init_db() -> None:
     url = make_url(settings.database_url)
     db_name = url.database
 
-    if db_name:
+    # Only a server database has to be created first; a SQLite file is created on connect.
+    if db_name and url.get_backend_name() == "mssql":
         _ensure_database_exists(db_name)
+    elif db_name and db_name != ":memory:" and url.get_backend_name() == "sqlite":
+        Path(db_name).parent.mkdir(parents=True, exist_ok=True)
 
     # Import models to register them with Base.metadata
     from app.db import models  # noqa: F401
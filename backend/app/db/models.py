@@ -4,11 +4,11 @@ import enum
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, Text
-from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
+from sqlalchemy import BigInteger, Boolean, Enum, ForeignKey, Index, Integer, String, Text, Uuid
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.db.types import UtcDateTime
 
 
 class TransferStatus(str, enum.Enum):
@@ -19,12 +19,14 @@ class TransferStatus(str, enum.Enum):
     completed = "completed"
     cancelled = "cancelled"
     failed = "failed"
+    # Retention released the stored file; the session and its audit log remain.
+    expired = "expired"
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[uuid.UUID] = mapped_column(UNIQUEIDENTIFIER(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     first_name: Mapped[str] = mapped_column(String(100))
     last_name: Mapped[str] = mapped_column(String(100))
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
@@ -37,10 +39,10 @@ class User(Base):
     must_change_password: Mapped[bool] = mapped_column(Boolean, default=False)
 
     failed_login_attempts: Mapped[int] = mapped_column(Integer, default=0)
-    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    locked_until: Mapped[datetime | None] = mapped_column(UtcDateTime, nullable=True)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    last_login_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+    last_login_at: Mapped[datetime | None] = mapped_column(UtcDateTime, nullable=True)
 
     sessions: Mapped[list[AuthSession]] = relationship(back_populates="user")
 
@@ -48,10 +50,10 @@ class User(Base):
 class AuthSession(Base):
     __tablename__ = "auth_sessions"
 
-    id: Mapped[uuid.UUID] = mapped_column(UNIQUEIDENTIFIER(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UNIQUEIDENTIFIER(as_uuid=True), ForeignKey("users.id"))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.id"))
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at: Mapped[datetime] = mapped_column(UtcDateTime)
     revoked: Mapped[bool] = mapped_column(Boolean, default=False)
 
     user: Mapped[User] = relationship(back_populates="sessions")
@@ -60,12 +62,12 @@ class AuthSession(Base):
 class TransferSession(Base):
     __tablename__ = "transfer_sessions"
 
-    id: Mapped[uuid.UUID] = mapped_column(UNIQUEIDENTIFIER(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
 
-    sender_user_id: Mapped[uuid.UUID] = mapped_column(UNIQUEIDENTIFIER(as_uuid=True), ForeignKey("users.id"))
+    sender_user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.id"))
 
     receiver_user_id: Mapped[uuid.UUID | None] = mapped_column(
-        UNIQUEIDENTIFIER(as_uuid=True),
+        Uuid,
         ForeignKey("users.id"),
         nullable=True,
     )
@@ -75,29 +77,116 @@ class TransferSession(Base):
     file_size: Mapped[int] = mapped_column(Integer)
     file_type: Mapped[str | None] = mapped_column(String(128), nullable=True)
     checksum_sha256: Mapped[str] = mapped_column(String(64))
+    blob_sha256: Mapped[str | None] = mapped_column(String(64), ForeignKey("blobs.sha256"), nullable=True)
 
     status: Mapped[TransferStatus] = mapped_column(Enum(TransferStatus), default=TransferStatus.pending)
+    # Fan-out sessions: number of rows in transfer_recipients (receiver_user_id and
+    # receiver_ip stay NULL). NULL for a session with a single receiver.
+    recipient_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True),
+        UtcDateTime,
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
     )
 
 
-class TransferLog(Base):
-    __tablename__ = "transfer_logs"
+class TransferRecipient(Base):
+    """One recipient of a fan-out session; file, upload and blob stay on the session."""
+
+    __tablename__ = "transfer_recipients"
+
+    transfer_session_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("transfer_sessions.id"), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.id"), primary_key=True)
+    # The recipient's own decision: pending, accepted or rejected.
+    status: Mapped[TransferStatus] = mapped_column(Enum(TransferStatus), default=TransferStatus.pending)
+    downloaded_at: Mapped[datetime | None] = mapped_column(UtcDateTime, nullable=True)
+
+    # Listing keys: created_at is the session's; updated_at moves with every change
+    # this recipient sees, including the session's own.
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime)
+    updated_at: Mapped[datetime] = mapped_column(UtcDateTime)
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Storage codec of the blob file ("gzip", "zstd"); NULL means stored as uploaded.
+    encoding: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class MultipartUpload(Base):
+    __tablename__ = "multipart_uploads"
+
+    transfer_session_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("transfer_sessions.id"), primary_key=True)
+    part_size: Mapped[int] = mapped_column(BigInteger)
+    part_count: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
 
-    id: Mapped[uuid.UUID] = mapped_column(UNIQUEIDENTIFIER(as_uuid=True), primary_key=True, default=uuid.uuid4)
     transfer_session_id: Mapped[uuid.UUID] = mapped_column(
-        UNIQUEIDENTIFIER(as_uuid=True), ForeignKey("transfer_sessions.id")
+        Uuid, ForeignKey("multipart_uploads.transfer_session_id"), primary_key=True
     )
+    part_number: Mapped[int] = mapped_column(Integer, primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    sha256: Mapped[str] = mapped_column(String(64))
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class DirectOffer(Base):
+    """Sender endpoint of a direct (peer-to-peer) transfer; the server only relays it."""
+
+    __tablename__ = "direct_offers"
+
+    transfer_session_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("transfer_sessions.id"), primary_key=True)
+    # Comma-separated IP addresses the sender agent listens on, all on `port`.
+    addresses: Mapped[str] = mapped_column(String(512))
+    port: Mapped[int] = mapped_column(Integer)
+    # Address the server saw the offer come from (the sender's NAT on the way out).
+    observed_ip: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # The transfer token is derived from the nonce; a new offer invalidates older tokens.
+    nonce: Mapped[str] = mapped_column(String(64))
+    expires_at: Mapped[datetime] = mapped_column(UtcDateTime)
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class TransferLog(Base):
+    __tablename__ = "transfer_logs"
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    transfer_session_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("transfer_sessions.id"))
     event: Mapped[str] = mapped_column(String(64))
+    # Set for events of one recipient of a fan-out session.
+    recipient_user_id: Mapped[uuid.UUID | None] = mapped_column(Uuid, ForeignKey("users.id"), nullable=True)
     message: Mapped[str | None] = mapped_column(Text, nullable=True)
     ip: Mapped[str | None] = mapped_column(String(64), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-
-
-Index("ix_transfer_sender", TransferSession.sender_user_id)
-Index("ix_transfer_receiver", TransferSession.receiver_user_id)
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, default=lambda: datetime.now(timezone.utc))
+
+
+# Per-role keyset indexes for the session listing; also serve the FK lookups.
+Index("ix_transfer_sender_created", TransferSession.sender_user_id, TransferSession.created_at, TransferSession.id)
+Index("ix_transfer_receiver_created", TransferSession.receiver_user_id, TransferSession.created_at, TransferSession.id)
+# Change feed (`changed_since`) and the listing ETag validator.
+Index("ix_transfer_sender_updated", TransferSession.sender_user_id, TransferSession.updated_at, TransferSession.id)
+Index("ix_transfer_receiver_updated", TransferSession.receiver_user_id, TransferSession.updated_at, TransferSession.id)
+# Fan-out sessions in each recipient's listing and change feed.
+Index(
+    "ix_recipient_user_created",
+    TransferRecipient.user_id,
+    TransferRecipient.created_at,
+    TransferRecipient.transfer_session_id,
+)
+Index(
+    "ix_recipient_user_updated",
+    TransferRecipient.user_id,
+    TransferRecipient.updated_at,
+    TransferRecipient.transfer_session_id,
+)
@@ -1,15 +1,84 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.db_profiling import instrument_engine, pool_class_for
+from app.db.sqlite import configure_engine, is_sqlite, write_gate
 
 
+def _sync_engine_options(url: str) -> dict:
+    # Bulk inserts (audit log batches) go out as one round trip per batch.
+    if make_url(url).drivername == "mssql+pyodbc":
+        return {"fast_executemany": True}
+    return {}
+
+
+# An embedded SQLite file cannot drop the connection, so it skips the pre-ping.
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
+    pool_pre_ping=not is_sqlite(settings.database_url),
+    poolclass=pool_class_for(settings.database_url),
     future=True,
+    **_sync_engine_options(settings.database_url),
 )
+instrument_engine(engine)
+if is_sqlite(settings.database_url):
+    configure_engine(engine)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+_ASYNC_DRIVERS = {
+    "mssql": "aioodbc",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync SQLAlchemy URL onto the async driver of the same dialect."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.drivername}; set ASYNC_DATABASE_URL.")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _async_engine_options(url: str) -> dict:
+    if is_sqlite(url):
+        if not issubclass(pool_class_for(url), QueuePool):
+            return {}
+        # One writer at a time anyway; a few connections serve the WAL readers.
+        return {
+            "pool_size": settings.sqlite_pool_size,
+            "max_overflow": 0,
+            "pool_timeout": settings.db_pool_timeout_seconds,
+        }
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+    }
+
+
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+
+# Request handlers run on the event loop and wait on this pool, so the number of
+# in-flight queries is capped by DB_POOL_SIZE + DB_MAX_OVERFLOW rather than by
+# how many threads the server happens to have.
+async_engine = create_async_engine(
+    _async_url,
+    pool_pre_ping=not is_sqlite(_async_url),
+    poolclass=pool_class_for(_async_url),
+    **_async_engine_options(_async_url),
+)
+instrument_engine(async_engine.sync_engine)
+if is_sqlite(_async_url):
+    configure_engine(async_engine.sync_engine)
+    write_gate.attach(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
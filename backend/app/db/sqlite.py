@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.util import await_only
+
+from app.core.config import settings
+
+
+# Embedded SQLite for single-node deployments (DATABASE_URL=sqlite:///...).
+#
+# Every connection switches the file to WAL, so readers work on a snapshot and
+# never block the writer or each other; only one write transaction can be open
+# at a time. The sqlite3 driver starts a transaction right before the first
+# INSERT/UPDATE/DELETE, which is when SQLite takes the write lock, and reads
+# before that run outside a transaction.
+#
+# SQLite's own busy handler waits for the lock by sleeping and retrying (up to
+# 100 ms per round), which turns contention into long, unfair tails. Write
+# transactions of the async engine therefore queue on an asyncio.Lock first, in
+# arrival order, and reach SQLite one at a time; only writers of other processes
+# (and of the sync engine, i.e. audit batches) still meet the busy handler.
+
+_SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+class WriteGateTimeout(Exception):
+    pass
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _pragmas() -> list[str]:
+    synchronous = settings.sqlite_synchronous.upper()
+    if synchronous not in _SYNCHRONOUS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(_SYNCHRONOUS)}")
+    return [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_bytes)}",
+        "PRAGMA temp_store=MEMORY",
+        # Off by default in SQLite; the code relies on the same FK errors as on SQL Server.
+        "PRAGMA foreign_keys=ON",
+    ]
+
+
+def configure_engine(engine: Engine) -> None:
+    """Apply the pragmas to every new connection of a (sync) SQLite Engine."""
+    pragmas = _pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class WriteGate:
+    """Admits one write transaction of the async engine at a time, first come first served."""
+
+    def __init__(self) -> None:
+        self._locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self.transactions = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def attach(self, engine: Engine) -> None:
+        """Hook into the sync face of an async engine (`AsyncEngine.sync_engine`)."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+            if "write_gate" not in conn.info and _is_write(context):
+                conn.info["write_gate"] = self._acquire()
+
+        @event.listens_for(engine, "commit")
+        def _commit(conn) -> None:  # noqa: ANN001
+            _release(conn.info)
+
+        @event.listens_for(engine, "rollback")
+        def _rollback(conn) -> None:  # noqa: ANN001
+            _release(conn.info)
+
+        @event.listens_for(engine.pool, "checkin")
+        def _checkin(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+            # A connection that was invalidated mid-transaction ends without a rollback event.
+            _release(connection_record.info)
+
+    def _acquire(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        contended = lock.locked()
+        started = time.perf_counter()
+        try:
+            # Runs inside the engine's greenlet, so the event loop keeps serving while we wait.
+            await_only(asyncio.wait_for(lock.acquire(), settings.sqlite_busy_timeout_ms / 1000))
+        except asyncio.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise WriteGateTimeout() from None
+        with self._stats_lock:
+            self.transactions += 1
+            if contended:
+                self.waits += 1
+                self.wait_seconds += time.perf_counter() - started
+        return lock
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "transactions": self.transactions,
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_seconds * 1000, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+def _is_write(context) -> bool:  # noqa: ANN001
+    return bool(context is not None and (context.isinsert or context.isupdate or context.isdelete or context.isddl))
+
+
+def _release(info: dict) -> None:
+    lock = info.pop("write_gate", None)
+    if lock is not None:
+        lock.release()
+
+
+write_gate = WriteGate()
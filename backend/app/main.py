@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
 
 from contextlib import asynccontextmanager
@@ -7,13 +9,26 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 
+from app.core.audit_log import audit_log
 from app.core.config import settings
-from app.core.ip_filter import IPFilterMiddleware
+from app.core.db_profiling import DbProfilingMiddleware, db_profiler, pool_status
+from app.core.events import event_bus
+from app.core.hash_executor import HashExecutorBusy
+from app.core.ip_filter import IPFilterMiddleware, ip_filter
+from app.core.lifecycle import lifecycle
+from app.core.metrics import MetricsMiddleware, monitor_event_loop_lag, registry
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import rate_limiter
+from app.core.security import hash_executor
+from app.core.storage import storage
 from app.api.routes.auth import router as auth_router
+from app.api.routes.events import router as events_router
 from app.api.routes.transfers import router as transfers_router
 from app.db.init_db import init_db
+from app.db.session import async_engine, engine
+from app.db.sqlite import WriteGateTimeout, is_sqlite, write_gate
 
 
 logging.basicConfig(level=logging.INFO)
@@ -28,12 +43,48 @@ _SERVE_FRONTEND = _FRONTEND_INDEX.exists()
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
+    await audit_log.start()
+    background: list[asyncio.Task] = []
+    if settings.metrics_enabled:
+        background.append(asyncio.create_task(monitor_event_loop_lag(settings.event_loop_lag_interval_seconds)))
+    if settings.ip_allowlist_file or settings.ip_blocklist_file:
+        background.append(asyncio.create_task(ip_filter.watch(settings.ip_list_reload_interval_seconds)))
+    background.append(asyncio.create_task(lifecycle.run_forever()))
     yield
+    for task in background:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await audit_log.close()
+    await rate_limiter.backend.close()
+    hash_executor.shutdown()
+    await async_engine.dispose()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.add_middleware(IPFilterMiddleware)
+app.add_middleware(DbProfilingMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(HashExecutorBusy)
+async def hash_executor_busy_handler(_: Request, __: HashExecutorBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Sunucu yoğun, lütfen tekrar deneyin."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(WriteGateTimeout)
+async def write_gate_timeout_handler(_: Request, __: WriteGateTimeout) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Sunucu yoğun, lütfen tekrar deneyin."},
+        headers={"Retry-After": "1"},
+    )
 
 cors = settings.parsed_cors_origins()
 if settings.env.lower() == "dev":
@@ -46,6 +97,7 @@ if settings.env.lower() == "dev":
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "X-Change-Cursor"],
     )
 elif cors:
     app.add_middleware(
@@ -53,11 +105,13 @@ elif cors:
         allow_origins=cors,
         allow_credentials=True,
         allow_methods=["*"],
-        allow_headers=["*"]
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "X-Change-Cursor"],
     )
 
 app.include_router(auth_router, prefix=settings.api_prefix)
 app.include_router(transfers_router, prefix=settings.api_prefix)
+app.include_router(events_router, prefix=settings.api_prefix)
 
 
 @app.get("/health")
@@ -65,6 +119,106 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/health/db")
+def health_db() -> dict:
+    status = {
+        "pools": {"async": pool_status(async_engine.sync_engine), "sync": pool_status(engine)},
+        **db_profiler.snapshot(),
+    }
+    if is_sqlite(settings.database_url):
+        status["sqlite_write_gate"] = write_gate.stats()
+    return status
+
+
+def _runtime_metrics():
+    pools = {"async": pool_status(async_engine.sync_engine), "sync": pool_status(engine)}
+    for key, help_text in (
+        ("size", "Configured pool size."),
+        ("checked_out", "Connections currently checked out."),
+        ("overflow", "Connections opened beyond the pool size."),
+    ):
+        samples = [({"engine": name}, status[key]) for name, status in pools.items() if key in status]
+        yield f"ulak_db_pool_{key}", "gauge", help_text, samples
+
+    db = db_profiler.snapshot()
+    yield "ulak_db_pool_checkouts_total", "counter", "Pool checkouts.", [({}, db["checkouts"])]
+    yield "ulak_db_pool_checkout_seconds_total", "counter", "Time spent waiting for pool checkouts.", [
+        ({}, db["checkout_ms_total"] / 1000)
+    ]
+    yield "ulak_db_pool_pre_ping_failures_total", "counter", "Connections replaced after a failed pre-ping.", [
+        ({}, db["pre_ping_failures"])
+    ]
+
+    if is_sqlite(settings.database_url):
+        gate = write_gate.stats()
+        yield "ulak_sqlite_write_waits_total", "counter", "SQLite write transactions that queued for the writer.", [
+            ({}, gate["waits"])
+        ]
+        yield "ulak_sqlite_write_wait_seconds_total", "counter", "Time write transactions queued for the writer.", [
+            ({}, gate["wait_ms_total"] / 1000)
+        ]
+
+    hashing = hash_executor.stats()
+    yield "ulak_password_hash_in_flight", "gauge", "Password hashing jobs running or queued.", [({}, hashing["in_flight"])]
+    yield "ulak_password_hash_queue_depth", "gauge", "Password hashing jobs waiting for a worker.", [
+        ({}, hashing["queue_depth"])
+    ]
+    yield "ulak_password_hash_rejected_total", "counter", "Password hashing jobs shed with 503.", [
+        ({}, hashing["rejected_total"])
+    ]
+
+    events = event_bus.stats()
+    yield "ulak_event_stream_subscribers", "gauge", "Open transfer event streams.", [({}, events["subscribers"])]
+    yield "ulak_events_dropped_total", "counter", "Events dropped for subscribers that fell behind.", [
+        ({}, events["dropped"])
+    ]
+
+    cache = principal_cache.stats()
+    yield "ulak_principal_cache_requests_total", "counter", "Principal cache lookups.", [
+        ({"result": "hit"}, cache["hits"]),
+        ({"result": "miss"}, cache["misses"]),
+    ]
+
+    limits = rate_limiter.stats()
+    yield "ulak_rate_limited_total", "counter", "Pre-authentication attempts rejected with 429.", [
+        ({"rule": rule}, count) for rule, count in limits.items() if rule != "backend_errors"
+    ]
+
+    ip = ip_filter.stats()
+    yield "ulak_ip_filter_rejected_total", "counter", "Requests rejected by the IP allow/block lists.", [
+        ({}, ip["rejected"])
+    ]
+
+    volumes = [v for v in storage.status() if "volume" in v]
+    if volumes:
+        yield "ulak_storage_volume_free_bytes", "gauge", "Free space on each storage volume.", [
+            ({"volume": v["volume"]}, v["free_bytes"]) for v in volumes
+        ]
+
+    reclaimed = lifecycle.stats()
+    yield "ulak_lifecycle_deleted_total", "counter", "Expired sessions and orphaned files deleted.", [
+        ({"kind": kind}, count) for kind, count in reclaimed["deleted"].items()
+    ]
+    yield "ulak_lifecycle_reclaimed_bytes_total", "counter", "Storage bytes freed by the lifecycle task.", [
+        ({"kind": kind}, size) for kind, size in reclaimed["reclaimed_bytes"].items()
+    ]
+
+    audit = audit_log.stats()
+    yield "ulak_audit_log_pending", "gauge", "Audit events buffered and not yet written.", [({}, audit["pending"])]
+    yield "ulak_audit_log_written_total", "counter", "Audit events written to the database.", [({}, audit["written"])]
+    yield "ulak_audit_log_failed_flushes_total", "counter", "Audit log flushes that failed and were retried.", [
+        ({}, audit["failed_flushes"])
+    ]
+
+
+if settings.metrics_enabled:
+    registry.add_collector(_runtime_metrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if _SERVE_FRONTEND:
     @app.get("/", include_in_schema=False)
     def frontend_root() -> FileResponse:
@@ -79,7 +233,7 @@ if _SERVE_FRONTEND:
         if api_prefix and (path == api_prefix or path.startswith(api_prefix + "/")):
             raise HTTPException(status_code=404)
 
-        if path in {"/docs", "/redoc", "/openapi.json", "/health"}:
+        if path in {"/docs", "/redoc", "/openapi.json", "/health", "/health/db", "/metrics"}:
             raise HTTPException(status_code=404)
 
         candidate = (_FRONTEND_DIST / full_path).resolve()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +12,8 @@ from app.db.models import TransferStatus
 class TransferSessionCreateRequest(BaseModel):
     receiver_user_id: uuid.UUID | None = None
     receiver_ip: str | None = None
+    # Fan-out: one session and one upload for all of these recipients.
+    receiver_user_ids: list[uuid.UUID] | None = Field(default=None, min_length=1)
 
     file_name: str = Field(min_length=1, max_length=512)
     file_size: int = Field(ge=0)
@@ -30,7 +33,86 @@ class TransferSessionPublic(BaseModel):
     checksum_sha256: str
 
     status: TransferStatus
+    # Fan-out sessions only. A recipient sees receiver_user_id set to themselves and
+    # the status of their own copy.
+    recipient_count: int | None = None
     created_at: datetime
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class TransferRecipientPublic(BaseModel):
+    user_id: uuid.UUID
+    status: TransferStatus
+    downloaded_at: datetime | None
+    updated_at: datetime
+
+
+class DedupChallenge(BaseModel):
+    offset: int
+    length: int
+
+
+class TransferSessionCreateResponse(TransferSessionPublic):
+    # True when the server already stores content with this checksum and size; the
+    # sender may then link it instead of uploading (see /upload/link).
+    blob_available: bool = False
+    dedup_challenge: DedupChallenge | None = None
+
+
+class BlobLinkRequest(BaseModel):
+    proof_sha256: str = Field(min_length=64, max_length=64)
+
+
+class UploadStatusPublic(BaseModel):
+    offset: int
+    file_size: int
+    status: TransferStatus
+
+
+class MultipartInitRequest(BaseModel):
+    part_size: int = Field(ge=1024 * 1024, le=1024 * 1024 * 1024)
+
+
+class UploadPartPublic(BaseModel):
+    part_number: int
+    size: int
+    sha256: str
+
+    model_config = {"from_attributes": True}
+
+
+class MultipartStatusPublic(BaseModel):
+    part_size: int
+    part_count: int
+    parts: list[UploadPartPublic]
+
+
+class DirectOfferRequest(BaseModel):
+    # LAN addresses the sender agent listens on, all on `port`.
+    addresses: list[str] = Field(min_length=1, max_length=8)
+    port: int = Field(ge=1, le=65535)
+
+
+class DirectOfferPublic(BaseModel):
+    token: str
+    expires_at: datetime
+
+
+class DirectPeerPublic(BaseModel):
+    addresses: list[str]
+    port: int
+    token: str
+    expires_at: datetime
+    file_size: int
+    checksum_sha256: str
+    # The server saw both peers come from the same address (same office NAT).
+    same_network: bool
+
+
+class DirectReportRequest(BaseModel):
+    result: Literal["completed", "failed"]
+    size: int | None = Field(default=None, ge=0)
+    sha256: str | None = Field(default=None, min_length=64, max_length=64)
+    message: str | None = Field(default=None, max_length=1000)
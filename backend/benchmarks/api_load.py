@@ -0,0 +1,591 @@
+"""Reproducible load test of the API, with JSON baselines and a regression check.
+
+    python benchmarks/api_load.py run --output baseline.json
+    python benchmarks/api_load.py run --baseline baseline.json        # exit 1 on regression
+    python benchmarks/api_load.py compare baseline.json current.json
+
+`run` boots the backend (uvicorn, one worker, lifespan on) in a child process
+against a throwaway SQLite database and storage directory in a temp dir, so the
+numbers do not depend on a database server. `--database-url` boots it against
+another database instead (e.g. a SQL Server test database, which must be empty);
+`--base-url` measures an already running server and boots nothing. `--env
+KEY=VALUE` passes settings to the booted server (e.g. `--env BCRYPT_ROUNDS=10`).
+
+The data set and the request order are fixed by `--seed` and `--scale`, so two
+runs of the same commit issue the same requests. Scenarios, in order:
+
+    register        registration of --users users (bcrypt hash)
+    login_burst     every user logs in at once, --login-rounds times (bcrypt verify)
+    create_session  --sessions-per-user sessions per user
+    list_poll       GET /transfers/sessions (first page of 50)
+    list_poll_etag  the same with If-None-Match, as a polling client sends it
+    list_poll_serial
+                    list_poll_etag one request at a time: the floor of a DB-backed
+                    request, i.e. pool checkout plus one query (compare SQLite
+                    with `--env SQLITE_POOL_SIZE=0`, a connection per request)
+    upload_<size>   concurrent raw uploads (PUT .../upload) of each --sizes-kb size
+    download_<size> concurrent downloads of those files by their receivers
+    mixed           a weighted mix of polls, session creation, logins, small
+                    uploads and downloads, reported per operation (mixed/<op>)
+
+Each scenario reports requests, errors, req/s, p50/p95/p99/max/mean latency and,
+for transfers, MB/s. The client runs in this process; on a small machine it
+competes with the server for CPU, so compare runs from the same machine only.
+
+`compare` (and `run --baseline`) flags a scenario when p95 latency grew, or req/s
+or MB/s dropped, by more than --threshold, or when it has errors the baseline had
+not. Latency changes under --min-delta-ms are ignored as noise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from upload_latency import percentile
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+SCENARIOS = (
+    "register",
+    "login_burst",
+    "create_session",
+    "list_poll",
+    "list_poll_serial",
+    "list_poll_etag",
+    "upload",
+    "download",
+    "mixed",
+)
+
+# Relative weights of the operations in the mixed scenario.
+MIXED_WEIGHTS = {"poll": 50, "poll_etag": 20, "create": 10, "upload": 8, "download": 8, "login": 4}
+
+_PASSWORD = "135790"
+
+
+class RequestFailed(Exception):
+    pass
+
+
+class User:
+    def __init__(self, email: str) -> None:
+        self.email = email
+        self.id = ""
+        self.headers: dict[str, str] = {}
+        self.etag: str | None = None
+
+
+class Transfer:
+    def __init__(self, sender: User, receiver: User, body: bytes) -> None:
+        self.sender = sender
+        self.receiver = receiver
+        self.body = body
+        self.checksum = hashlib.sha256(body).hexdigest()
+        self.id = ""
+
+
+# --- measurement ------------------------------------------------------------
+
+
+def summarize(latencies: list[float], errors: list[str], elapsed: float, transferred: int) -> dict:
+    summary = {
+        "requests": len(latencies) + len(errors),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+    }
+    if transferred:
+        summary["mb_s"] = round(transferred / 1024**2 / elapsed, 2)
+    if errors:
+        summary["error_samples"] = sorted(set(errors))[:5]
+    return summary
+
+
+async def run_ops(labels: list[str], concurrency: int, op) -> dict[str, dict]:  # type: ignore[no-untyped-def]
+    """Run op(0..n-1) on `concurrency` workers; summaries per label of the op."""
+    latencies: dict[str, list[float]] = {label: [] for label in labels}
+    errors: dict[str, list[str]] = {label: [] for label in labels}
+    transferred = dict.fromkeys(labels, 0)
+    indexes = iter(range(len(labels)))
+
+    async def worker() -> None:
+        for i in indexes:
+            label = labels[i]
+            started = time.perf_counter()
+            try:
+                transferred[label] += await op(i)
+            except (httpx.HTTPError, RequestFailed) as exc:
+                errors[label].append(f"{type(exc).__name__}: {exc}"[:200])
+                continue
+            latencies[label].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(labels))))))
+    elapsed = time.perf_counter() - started
+    return {label: summarize(latencies[label], errors[label], elapsed, transferred[label]) for label in latencies}
+
+
+def expect(r: httpx.Response, *statuses: int) -> httpx.Response:
+    if r.status_code not in statuses:
+        raise RequestFailed(f"{r.request.method} {r.request.url.path} -> {r.status_code} {r.text[:120]}")
+    return r
+
+
+# --- API operations -----------------------------------------------------------
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+        self.client = client
+        self.args = args
+        self.prefix = args.api_prefix
+        self.rng = random.Random(args.seed)
+        self.tag = uuid.UUID(int=self.rng.getrandbits(128)).hex[:8] if args.base_url is None else uuid.uuid4().hex[:8]
+        self.users = [User(f"bench-{self.tag}-{i}@example.com") for i in range(scaled(args.users, args.scale))]
+        self.block = self.rng.randbytes(max(args.sizes_kb) * 1024)
+
+    def make_transfer(self, index: int, size: int) -> Transfer:
+        sender = self.users[index % len(self.users)]
+        receiver = self.users[(index + 1) % len(self.users)]
+        # Unique leading bytes, so no two uploads collapse into one blob.
+        head = f"{size}:{index}:".encode().ljust(32, b".")
+        return Transfer(sender, receiver, head + self.block[: max(0, size - len(head))])
+
+    async def register(self, i: int) -> int:
+        user = self.users[i]
+        r = await self.client.post(
+            f"{self.prefix}/auth/register",
+            json={
+                "first_name": "Bench",
+                "last_name": "User",
+                "email": user.email,
+                "password": _PASSWORD,
+                "password_confirm": _PASSWORD,
+                "security_question": "bench",
+                "security_answer": "bench",
+            },
+        )
+        user.id = expect(r, 201).json()["id"]
+        return 0
+
+    async def login(self, i: int) -> int:
+        user = self.users[i % len(self.users)]
+        r = await self.client.post(f"{self.prefix}/auth/login", json={"email": user.email, "password": _PASSWORD})
+        user.headers = {"Authorization": f"Bearer {expect(r, 200).json()['access_token']}"}
+        return 0
+
+    async def create_session(self, i: int) -> int:
+        sender = self.users[i % len(self.users)]
+        receiver = self.users[(i + 1) % len(self.users)]
+        r = await self.client.post(
+            f"{self.prefix}/transfers/sessions",
+            headers=sender.headers,
+            json={
+                "receiver_user_id": receiver.id,
+                "file_name": f"bench-{i}.bin",
+                "file_size": 1024 * (1 + i % 4096),
+                "checksum_sha256": hashlib.sha256(f"{self.tag}:{i}".encode()).hexdigest(),
+            },
+        )
+        expect(r, 201)
+        return 0
+
+    async def poll(self, i: int) -> int:
+        user = self.users[i % len(self.users)]
+        r = expect(await self.client.get(f"{self.prefix}/transfers/sessions", headers=user.headers), 200)
+        user.etag = r.headers.get("etag")
+        return 0
+
+    async def poll_etag(self, i: int) -> int:
+        user = self.users[i % len(self.users)]
+        headers = {**user.headers, "If-None-Match": user.etag} if user.etag else user.headers
+        r = expect(await self.client.get(f"{self.prefix}/transfers/sessions", headers=headers), 200, 304)
+        user.etag = r.headers.get("etag", user.etag)
+        return 0
+
+    async def open_transfer(self, transfer: Transfer) -> None:
+        r = await self.client.post(
+            f"{self.prefix}/transfers/sessions",
+            headers=transfer.sender.headers,
+            json={
+                "receiver_user_id": transfer.receiver.id,
+                "file_name": "bench.bin",
+                "file_size": len(transfer.body),
+                "checksum_sha256": transfer.checksum,
+            },
+        )
+        transfer.id = expect(r, 201).json()["id"]
+        expect(
+            await self.client.post(
+                f"{self.prefix}/transfers/sessions/{transfer.id}/accept", headers=transfer.receiver.headers
+            ),
+            200,
+        )
+
+    async def upload(self, transfer: Transfer) -> int:
+        r = await self.client.put(
+            f"{self.prefix}/transfers/sessions/{transfer.id}/upload",
+            headers=transfer.sender.headers,
+            content=transfer.body,
+        )
+        if expect(r, 200).json()["status"] != "completed":
+            raise RequestFailed(f"upload of {transfer.id} did not complete")
+        return len(transfer.body)
+
+    async def download(self, transfer: Transfer) -> int:
+        received = 0
+        url = f"{self.prefix}/transfers/sessions/{transfer.id}/download"
+        async with self.client.stream("GET", url, headers=transfer.receiver.headers) as r:
+            expect(r, 200)
+            async for chunk in r.aiter_raw():
+                received += len(chunk)
+        if received != len(transfer.body):
+            raise RequestFailed(f"download of {transfer.id}: {received} of {len(transfer.body)} bytes")
+        return received
+
+
+def scaled(count: int, scale: float) -> int:
+    return max(1, round(count * scale))
+
+
+def size_label(size_kb: int) -> str:
+    return f"{size_kb // 1024}MiB" if size_kb % 1024 == 0 else f"{size_kb}KiB"
+
+
+async def run_workload(client: httpx.AsyncClient, args: argparse.Namespace) -> dict[str, dict]:
+    selected = set(args.scenarios.split(","))
+    unknown = selected - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    w = Workload(client, args)
+    users = len(w.users)
+    concurrency = args.concurrency
+    results: dict[str, dict] = {}
+
+    async def scenario(  # type: ignore[no-untyped-def]
+        key: str, name: str, count: int, op, *, parallel: int = concurrency
+    ) -> None:
+        # Unselected setup scenarios still run, unmeasured, for the data later ones need.
+        summary = await run_ops([name] * count, parallel, op)
+        if key in ("register", "login_burst") and summary[name]["errors"]:
+            raise SystemExit(f"{name} failed, nothing else can run: {summary[name]['error_samples']}")
+        if key in selected:
+            results.update(summary)
+            print(f"{name}: {summary[name]}", file=sys.stderr)
+
+    await scenario("register", "register", users, w.register)
+    rounds = args.login_rounds if "login_burst" in selected else 1
+    await scenario("login_burst", "login_burst", users * rounds, w.login, parallel=users)
+    await scenario("create_session", "create_session", users * args.sessions_per_user, w.create_session)
+
+    # Warm up connections and caches before the polling scenarios.
+    await run_ops(["warmup"] * users, concurrency, w.poll)
+    if "list_poll" in selected:
+        await scenario("list_poll", "list_poll", scaled(2000, args.scale), w.poll)
+    if "list_poll_etag" in selected:
+        await scenario("list_poll_etag", "list_poll_etag", scaled(2000, args.scale), w.poll_etag)
+    if "list_poll_serial" in selected:
+        await scenario("list_poll_serial", "list_poll_serial", scaled(1000, args.scale), w.poll_etag, parallel=1)
+
+    index = 0
+    for size_kb in args.sizes_kb if selected & {"upload", "download"} else ():
+        count = scaled(max(1, 1024 * 64 // size_kb), args.scale)
+        transfers = [w.make_transfer(index + i, size_kb * 1024) for i in range(count)]
+        index += count
+        await asyncio.gather(*(w.open_transfer(t) for t in transfers))
+        label = size_label(size_kb)
+        await scenario("upload", f"upload_{label}", count, lambda i, t=transfers: w.upload(t[i]))
+        if "download" in selected:
+            await scenario("download", f"download_{label}", count, lambda i, t=transfers: w.download(t[i]))
+
+    if "mixed" in selected:
+        results.update(await run_mixed(w, args, index))
+    return results
+
+
+async def run_mixed(w: Workload, args: argparse.Namespace, index: int) -> dict[str, dict]:
+    ops = list(MIXED_WEIGHTS)
+    plan = w.rng.choices(ops, weights=[MIXED_WEIGHTS[op] for op in ops], k=scaled(1000, args.scale))
+    small = min(args.sizes_kb) * 1024
+
+    # Sessions for the planned uploads, and uploaded files to download, set up unmeasured.
+    to_upload = [w.make_transfer(index + i, small) for i in range(plan.count("upload"))]
+    to_download = [w.make_transfer(index + len(to_upload) + i, small) for i in range(min(16, plan.count("download")))]
+    await asyncio.gather(*(w.open_transfer(t) for t in to_upload + to_download))
+    await asyncio.gather(*(w.upload(t) for t in to_download))
+    uploads = iter(to_upload)
+    counters = dict.fromkeys(ops, 0)
+
+    async def op(i: int) -> int:
+        kind = plan[i]
+        n = counters[kind]
+        counters[kind] += 1
+        if kind == "upload":
+            return await w.upload(next(uploads))
+        if kind == "download":
+            return await w.download(to_download[n % len(to_download)])
+        if kind == "create":
+            return await w.create_session(10_000_000 + i)
+        return await getattr(w, kind)(n)
+
+    summary = await run_ops([f"mixed/{kind}" for kind in plan], args.concurrency, op)
+    for name, values in sorted(summary.items()):
+        print(f"{name}: {values}", file=sys.stderr)
+    return summary
+
+
+# --- server -------------------------------------------------------------------
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env(workdir: Path, args: argparse.Namespace) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": args.database_url or f"sqlite:///{workdir / 'bench.db'}",
+            "ASYNC_DATABASE_URL": "",
+            "JWT_SECRET": "bench-secret",
+            "STORAGE_BACKEND": "local",
+            "STORAGE_VOLUMES": str(workdir / "storage"),
+            "STORAGE_STAGING_DIR": "",
+            "STORAGE_MIN_FREE_BYTES": "0",
+            "AUDIT_LOG_SPILL_DIR": str(workdir / "audit"),
+            "LIFECYCLE_ENABLED": "false",
+            "LIFECYCLE_LOCK_FILE": str(workdir / "lifecycle.lock"),
+            # Login bursts come from one client address.
+            "LOGIN_ATTEMPTS_PER_MINUTE_PER_IP": "0",
+            "LOGIN_ATTEMPTS_PER_MINUTE_PER_EMAIL": "0",
+            "IP_ALLOWLIST": "",
+            "IP_BLOCKLIST": "",
+            "IP_ALLOWLIST_FILE": "",
+            "IP_BLOCKLIST_FILE": "",
+        }
+    )
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Child process: the backend on --port, as uvicorn would run it."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    import uvicorn
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+class BootedServer:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._tmp = tempfile.TemporaryDirectory(prefix="ulak-bench-")
+        self.workdir = Path(self._tmp.name)
+        self.log_path = self.workdir / "server.log"
+        self.process: subprocess.Popen | None = None
+
+    async def __aenter__(self) -> BootedServer:
+        log = self.log_path.open("wb")
+        self.process = subprocess.Popen(
+            [sys.executable, __file__, "serve", "--port", str(self.port)],
+            cwd=BACKEND_DIR,
+            env=server_env(self.workdir, self.args),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        log.close()
+        deadline = time.monotonic() + 60
+        async with httpx.AsyncClient(base_url=self.base_url) as client:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    break
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        return self
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.2)
+        tail = self.log_path.read_text(errors="replace")[-4000:]
+        await self.__aexit__(None, None, None)
+        raise SystemExit(f"backend did not start:\n{tail}")
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._tmp.cleanup()
+
+
+# --- run / compare --------------------------------------------------------------
+
+
+def metadata(args: argparse.Namespace) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    if args.base_url:
+        database = "external"
+    else:
+        database = (args.database_url or "sqlite").split(":", 1)[0]
+    return {
+        "commit": commit,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": database,
+        "options": {
+            "seed": args.seed,
+            "scale": args.scale,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "sessions_per_user": args.sessions_per_user,
+            "login_rounds": args.login_rounds,
+            "sizes_kb": args.sizes_kb,
+            "scenarios": args.scenarios,
+            "env": args.env,
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> int:
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.users) + 8)
+    timeout = httpx.Timeout(120)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+            scenarios = await run_workload(client, args)
+    else:
+        async with BootedServer(args) as server:
+            async with httpx.AsyncClient(base_url=server.base_url, limits=limits, timeout=timeout) as client:
+                scenarios = await run_workload(client, args)
+
+    report = {"meta": metadata(args), "scenarios": scenarios}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_comparison(baseline, report, args.threshold, args.min_delta_ms)
+    return 0
+
+
+def compare_scenario(old: dict, new: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    problems = []
+    if new.get("errors") and not old.get("errors"):
+        problems.append(f"{new['errors']} errors")
+    old_p95, new_p95 = old.get("p95_ms"), new.get("p95_ms")
+    if old_p95 and new_p95 and new_p95 > old_p95 * (1 + threshold) and new_p95 - old_p95 >= min_delta_ms:
+        problems.append(f"p95 {old_p95} -> {new_p95} ms")
+    for key in ("rps", "mb_s"):
+        if old.get(key) and new.get(key) is not None and new[key] < old[key] * (1 - threshold):
+            problems.append(f"{key} {old[key]} -> {new[key]}")
+    return problems
+
+
+def print_comparison(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> int:
+    regressions = 0
+    print(f"{'scenario':28} {'p95 ms':>21} {'req/s':>21} {'MB/s':>19}  verdict", file=sys.stderr)
+    for name, new in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"{name:28} (not in baseline)", file=sys.stderr)
+            continue
+        problems = compare_scenario(old, new, threshold, min_delta_ms)
+        regressions += bool(problems)
+
+        def pair(key: str) -> str:
+            return f"{old.get(key, '-')} -> {new.get(key, '-')}"
+
+        verdict = "REGRESSION: " + "; ".join(problems) if problems else "ok"
+        print(f"{name:28} {pair('p95_ms'):>21} {pair('rps'):>21} {pair('mb_s'):>19}  {verdict}", file=sys.stderr)
+    print(f"{regressions} regression(s) at threshold {threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    checks = argparse.ArgumentParser(add_help=False)
+    checks.add_argument("--threshold", type=float, default=0.15, help="Allowed relative change (default 0.15).")
+    checks.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore smaller p95 changes.")
+
+    runner = commands.add_parser("run", parents=[checks], help="Boot the backend and run the scenarios.")
+    runner.add_argument("--base-url", help="Measure this running server instead of booting one.")
+    runner.add_argument("--database-url", help="Boot the backend against this (empty) database.")
+    runner.add_argument("--api-prefix", default="/api")
+    runner.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Setting for the server.")
+    runner.add_argument("--scenarios", default=",".join(SCENARIOS))
+    runner.add_argument("--seed", type=int, default=1)
+    runner.add_argument("--scale", type=float, default=1.0, help="Multiplier for every request count.")
+    runner.add_argument("--users", type=int, default=32)
+    runner.add_argument("--concurrency", type=int, default=16)
+    runner.add_argument("--sessions-per-user", type=int, default=25)
+    runner.add_argument("--login-rounds", type=int, default=3)
+    runner.add_argument(
+        "--sizes-kb",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[64, 1024, 16384],
+        help="Upload/download sizes in KiB; 64 MiB of each size is transferred at scale 1.",
+    )
+    runner.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    runner.add_argument("--baseline", help="Compare with this report; exit 1 on regression.")
+
+    comparer = commands.add_parser("compare", parents=[checks], help="Compare two saved reports.")
+    comparer.add_argument("baseline")
+    comparer.add_argument("current")
+
+    server = commands.add_parser("serve", help=argparse.SUPPRESS)
+    server.add_argument("--port", type=int, required=True)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.command == "serve":
+        serve(arguments)
+    elif arguments.command == "compare":
+        reports = [json.loads(Path(p).read_text(encoding="utf-8")) for p in (arguments.baseline, arguments.current)]
+        sys.exit(print_comparison(*reports, arguments.threshold, arguments.min_delta_ms))
+    else:
+        sys.exit(asyncio.run(run(arguments)))
@@ -0,0 +1,203 @@
+"""Compare download throughput and CPU cost of the file response paths.
+
+Runs in-process against a local file, without a database or HTTP server:
+
+    python benchmarks/download_throughput.py --size-mb 2048 --downloads 4 --repeat 3
+
+Each mode serves the file through its response class to a socket, and a child
+process drains the sockets, like a client on the loopback. The sending side
+plays the ASGI server: body messages go out with `sock_sendall`, zero-copy
+messages with `sock_sendfile` (os.sendfile), as a server offering the
+`http.response.zerocopy` extension would do. Reported per mode: MB/s and CPU
+seconds (user + system, all threads of this process) per GB sent.
+
+Modes:
+    starlette  starlette.responses.FileResponse (64 KiB reads in a thread)
+    previous   RangeFileResponse as it was before the local-file paths: a file
+               object read in 1 MiB chunks (still used for S3 and decoded blobs)
+    pread      RangeFileResponse, local file, server without zero-copy
+    zerocopy   RangeFileResponse, local file, server with zero-copy
+
+`--cold` evicts the file from the page cache before every run (posix_fadvise
+DONTNEED, no root needed); otherwise the file is served from a warm cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import selectors
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from starlette.datastructures import Headers  # noqa: E402
+from starlette.responses import FileResponse  # noqa: E402
+
+from app.core.file_response import RangeFileResponse  # noqa: E402
+
+
+MODES = ("starlette", "previous", "pread", "zerocopy")
+_ZEROCOPY = "http.response.zerocopy"
+
+
+def drain(sockets: list[socket.socket], inherited: list[socket.socket]) -> None:
+    """Read every socket to EOF (runs in a child process)."""
+    for sock in inherited:
+        # With fork the child holds the sending ends too; keep only the parent's open.
+        sock.close()
+    selector = selectors.DefaultSelector()
+    for sock in sockets:
+        selector.register(sock, selectors.EVENT_READ)
+    buffer = bytearray(1024 * 1024)
+    open_sockets = len(sockets)
+    while open_sockets:
+        for key, _ in selector.select():
+            if not key.fileobj.recv_into(buffer):
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                open_sockets -= 1
+
+
+class _PreviousResponse(RangeFileResponse):
+    chunk_size = 1024 * 1024
+
+
+def make_response(mode: str, path: Path, checksum: str):  # type: ignore[no-untyped-def]
+    if mode == "starlette":
+        return FileResponse(path)
+    headers = Headers({})
+    if mode == "previous":
+        stat = path.stat()
+        return _PreviousResponse(
+            None,
+            request_headers=headers,
+            opener=functools.partial(path.open, "rb"),
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            checksum_sha256=checksum,
+        )
+    return RangeFileResponse(path, request_headers=headers, checksum_sha256=checksum)
+
+
+async def serve_one(mode: str, path: Path, checksum: str, sock: socket.socket) -> int:
+    loop = asyncio.get_running_loop()
+    sent = 0
+
+    async def receive() -> dict:
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if body:
+                await loop.sock_sendall(sock, body)
+                sent += len(body)
+        elif message["type"] == _ZEROCOPY:
+            sent += await loop.sock_sendfile(sock, message["file"], message["offset"], message["count"])
+
+    extensions = {_ZEROCOPY: {}} if mode == "zerocopy" else {}
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "extensions": extensions}
+    await make_response(mode, path, checksum)(scope, receive, send)
+    sock.close()
+    return sent
+
+
+def evict(path: Path) -> None:
+    if hasattr(os, "posix_fadvise"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+async def run_once(mode: str, path: Path, checksum: str, downloads: int) -> dict:
+    pairs = [socket.socketpair() for _ in range(downloads)]
+    reader = multiprocessing.Process(target=drain, args=([r for r, _ in pairs], [w for _, w in pairs]))
+    reader.start()
+    for r, w in pairs:
+        r.close()
+        w.setblocking(False)
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    sent = await asyncio.gather(*(serve_one(mode, path, checksum, w) for _, w in pairs))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    reader.join()
+
+    gb = sum(sent) / 1024**3
+    return {"elapsed_s": elapsed, "mb_s": sum(sent) / 1024**2 / elapsed, "cpu_s_per_gb": cpu / gb}
+
+
+def summarize(runs: list[dict]) -> dict:
+    return {
+        "runs": len(runs),
+        "mb_s": round(statistics.median(r["mb_s"] for r in runs), 1),
+        "cpu_s_per_gb": round(statistics.median(r["cpu_s_per_gb"] for r in runs), 3),
+        "best_mb_s": round(max(r["mb_s"] for r in runs), 1),
+    }
+
+
+def create_file(directory: str, size: int) -> Path:
+    path = Path(directory) / "download.bin"
+    block = os.urandom(1024 * 1024)
+    with path.open("wb") as f:
+        for offset in range(0, size, len(block)):
+            f.write(block[: min(len(block), size - offset)])
+    return path
+
+
+async def main(args: argparse.Namespace) -> dict:
+    modes = [m for m in args.modes.split(",") if m]
+    if "zerocopy" in modes and not hasattr(os, "sendfile"):
+        modes.remove("zerocopy")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = create_file(directory, args.size_mb * 1024 * 1024)
+        checksum = hashlib.sha256(b"").hexdigest()
+        results = {}
+        for mode in modes:
+            runs = []
+            for _ in range(args.repeat):
+                if args.cold:
+                    evict(path)
+                runs.append(await run_once(mode, path, checksum, args.downloads))
+            results[mode] = summarize(runs)
+
+    return {
+        "size_mb": args.size_mb,
+        "downloads": args.downloads,
+        "cache": "cold" if args.cold else "warm",
+        "chunk_size": RangeFileResponse.chunk_size,
+        "results": results,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--downloads", type=int, default=1, help="Concurrent downloads of the file per run.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--cold", action="store_true", help="Evict the file from the page cache before each run.")
+    parser.add_argument("--dir", default=None, help="Where to create the test file (default: system temp dir).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
@@ -0,0 +1,202 @@
+"""Measure API latency while many large uploads are in flight.
+
+Runs against an already started backend, e.g.:
+
+    uvicorn app.main:app --host 127.0.0.1 --port 8000
+    python benchmarks/upload_latency.py --base-url http://127.0.0.1:8000 --uploads 20 --size-mb 1024
+
+Two throwaway users are registered, `--uploads` transfer sessions are created and
+uploaded concurrently while `/health` and `GET /api/transfers/sessions` are probed
+at a fixed interval. p50/p95/p99 latency of the probes is reported for an idle
+baseline and for the loaded phase.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+_BLOCK = os.urandom(1024 * 1024)
+
+
+class SyntheticFile:
+    """File-like object producing `size` bytes by repeating one random block."""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._position = 0
+
+    def read(self, n: int = -1) -> bytes:
+        remaining = self._size - self._position
+        if remaining <= 0:
+            return b""
+        offset = self._position % len(_BLOCK)
+        n = len(_BLOCK) if n is None or n < 0 else n
+        n = min(n, len(_BLOCK) - offset, remaining)
+        self._position += n
+        return _BLOCK[offset : offset + n]
+
+
+def synthetic_checksum(size: int) -> str:
+    hasher = hashlib.sha256()
+    remaining = size
+    while remaining > 0:
+        n = min(len(_BLOCK), remaining)
+        hasher.update(_BLOCK[:n])
+        remaining -= n
+    return hasher.hexdigest()
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else None,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else None,
+    }
+
+
+async def register_and_login(client: httpx.AsyncClient, prefix: str) -> tuple[str, dict]:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    r = await client.post(
+        f"{prefix}/auth/register",
+        json={
+            "first_name": "Bench",
+            "last_name": "User",
+            "email": email,
+            "password": "135790",
+            "password_confirm": "135790",
+            "security_question": "bench",
+            "security_answer": "bench",
+        },
+    )
+    r.raise_for_status()
+    user_id = r.json()["id"]
+    r = await client.post(f"{prefix}/auth/login", json={"email": email, "password": "135790"})
+    r.raise_for_status()
+    return user_id, {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def probe(client: httpx.AsyncClient, url: str, headers: dict, interval: float, stop: asyncio.Event) -> list[float]:
+    samples: list[float] = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        r = await client.get(url, headers=headers)
+        r.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+    return samples
+
+
+async def run_probes(client: httpx.AsyncClient, prefix: str, headers: dict, interval: float, stop: asyncio.Event) -> dict:
+    health, listing = await asyncio.gather(
+        probe(client, "/health", {}, interval, stop),
+        probe(client, f"{prefix}/transfers/sessions", headers, interval, stop),
+    )
+    return {"/health": summarize(health), "/transfers/sessions": summarize(listing)}
+
+
+async def synthetic_body(size: int):
+    source = SyntheticFile(size)
+    while chunk := source.read():
+        yield chunk
+
+
+async def upload_one(
+    client: httpx.AsyncClient, prefix: str, headers: dict, receiver_id: str, size: int, checksum: str, mode: str
+) -> float:
+    r = await client.post(
+        f"{prefix}/transfers/sessions",
+        headers=headers,
+        json={"receiver_user_id": receiver_id, "file_name": "bench.bin", "file_size": size, "checksum_sha256": checksum},
+    )
+    r.raise_for_status()
+    transfer_id = r.json()["id"]
+
+    started = time.perf_counter()
+    url = f"{prefix}/transfers/sessions/{transfer_id}/upload"
+    if mode == "raw":
+        r = await client.put(url, headers={**headers, "Content-Length": str(size)}, content=synthetic_body(size))
+    else:
+        r = await client.post(url, headers=headers, files={"file": ("bench.bin", SyntheticFile(size), "application/octet-stream")})
+    r.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> dict:
+    size = args.size_mb * 1024 * 1024
+    checksum = synthetic_checksum(size)
+    timeout = httpx.Timeout(None)
+    limits = httpx.Limits(max_connections=args.uploads + 8)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+        _, sender_headers = await register_and_login(client, args.api_prefix)
+        receiver_id, _ = await register_and_login(client, args.api_prefix)
+
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(run_probes(client, args.api_prefix, sender_headers, args.interval, stop))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        baseline = await baseline_task
+
+        stop = asyncio.Event()
+        loaded_task = asyncio.create_task(run_probes(client, args.api_prefix, sender_headers, args.interval, stop))
+        started = time.perf_counter()
+        durations = await asyncio.gather(
+            *(
+                upload_one(client, args.api_prefix, sender_headers, receiver_id, size, checksum, args.mode)
+                for _ in range(args.uploads)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        loaded = await loaded_task
+
+    return {
+        "mode": args.mode,
+        "uploads": args.uploads,
+        "size_mb": args.size_mb,
+        "elapsed_s": round(elapsed, 2),
+        "aggregate_mb_s": round(args.uploads * args.size_mb / elapsed, 2),
+        "slowest_upload_s": round(max(durations), 2),
+        "baseline": baseline,
+        "under_load": loaded,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-prefix", default="/api")
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--mode", choices=["multipart", "raw"], default="multipart", help="Upload endpoint to exercise.")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between probe requests.")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
@@ -6,6 +6,7 @@ enum TransferStatus {
   completed,
   cancelled,
   failed,
+  expired,
 }
 
 TransferStatus transferStatusFromApi(String value) {
@@ -24,6 +25,8 @@ TransferStatus transferStatusFromApi(String value) {
       return TransferStatus.cancelled;
     case 'failed':
       return TransferStatus.failed;
+    case 'expired':
+      return TransferStatus.expired;
     default:
       return TransferStatus.pending;
   }
@@ -45,6 +48,8 @@ String transferStatusLabel(TransferStatus status) {
       return 'İptal';
     case TransferStatus.failed:
       return 'Hata';
+    case TransferStatus.expired:
+      return 'Süresi doldu';
   }
 }
 